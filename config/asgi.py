@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Each request runs in its own thread here, so don't keep connections open
+# after it (CONN_MAX_AGE in config/settings.py) unless the deployment says so
+os.environ.setdefault('DJANGO_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
+
+# Parse templates now rather than on the first requests (config.production)
+from habits.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,61 @@
+"""
+Production settings: DJANGO_SETTINGS_MODULE=config.production.
+
+Reads DJANGO_SECRET_KEY, DJANGO_ALLOWED_HOSTS (comma separated) and,
+for Prometheus, DJANGO_METRICS_TOKEN from the environment; everything else comes from config/settings.py.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import MIDDLEWARE, TEMPLATES
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+DEBUG = False
+
+ALLOWED_HOSTS = [host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',') if host]
+
+# Parse each template once per process, and all of them at worker startup
+# (see habits/warmup.py) rather than on the first requests.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+PRECOMPILE_TEMPLATES = True
+
+# Time one request in ten: enough for the histograms, cheap for the rest
+METRICS_SAMPLE_RATE = 0.1
+# Behind a reverse proxy every REMOTE_ADDR is the proxy's (often
+# 127.0.0.1), so no address is trusted: scrape /metrics with
+# DJANGO_METRICS_TOKEN as a bearer token.
+METRICS_ALLOWED_IPS = []
+
+# `python manage.py collectstatic` is a required deploy step: it writes
+# content-hashed copies of every asset plus .gz (and, with `brotli`
+# installed, .br) variants, which the middleware serves with far-future
+# cache headers. Until it has run, every page using {% static %} fails
+# with "Missing staticfiles manifest entry".
+# Set DJANGO_STATIC_ROOT to collect somewhere else than ./staticfiles.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'habits.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+
+MIDDLEWARE = [
+    MIDDLEWARE[0],  # SecurityMiddleware
+    'habits.staticfiles.static_files_middleware',
+    *MIDDLEWARE[1:],
+]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +43,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'habits.metrics.metrics_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -54,7 +56,9 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for habits.metrics
+        'BACKEND': 'habits.metrics.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [BASE_DIR / "templates"],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -69,6 +73,39 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Compile every project template when a WSGI/ASGI worker starts (see
+# habits/warmup.py). Only worth it with the cached loader: config.production.
+PRECOMPILE_TEMPLATES = False
+
+# Share of requests habits.metrics times (Server-Timing header and the
+# histograms on /metrics). Besides staff users, /metrics answers requests
+# with "Authorization: Bearer <METRICS_TOKEN>" and, here only, requests
+# from METRICS_ALLOWED_IPS. The histograms are per process: scrape every
+# worker.
+METRICS_SAMPLE_RATE = 1.0
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+
+# Sessions and authentication
+# https://docs.djangoproject.com/en/6.0/topics/http/sessions/#configuring-the-session-engine
+
+# Sessions are read on every request. "cached_db" answers reads from the
+# in-process "sessions" cache and only goes to the database on a miss or
+# a write. 'django.contrib.sessions.backends.signed_cookies' keeps the
+# whole session in the (signed, not encrypted) cookie and needs no
+# database or cache at all.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+
+# CachedModelBackend loads request.user from a per-process cache (see
+# habits/auth.py). ModelBackend stays listed so sessions logged in
+# through it remain valid.
+AUTHENTICATION_BACKENDS = [
+    'habits.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -77,9 +114,57 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse connections (and the pragmas set on them) across requests,
+        # checking they still work before each request that reuses one.
+        # Under ASGI every request runs in its own thread, so a kept
+        # connection would never be reused: config/asgi.py defaults
+        # DJANGO_CONN_MAX_AGE to 0 to close them at the end of each request.
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock when a transaction begins, so concurrent
+            # writers wait on busy_timeout instead of failing with
+            # "database is locked" when a read lock can't be upgraded
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Applied to every new SQLite connection (see habits/db.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # readers and the writer no longer block each other
+    'synchronous': 'NORMAL',  # safe with WAL; only the last commits can be lost on power failure
+    'busy_timeout': 5000,  # ms to wait for a lock before giving up
+    'cache_size': -20000,  # page cache, in KiB
+    'mmap_size': 268435456,  # read the file through a 256 MiB memory map
+    'temp_store': 'MEMORY',
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered history/entries pages (see habits/pages.py). Local memory is
+    # per process: with several worker processes, use FileBasedCache so
+    # they share one copy.
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'habits-pages',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Session reads for the cached_db engine; a miss falls back to the database
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'habits-sessions',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -117,3 +202,5 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / "static"]
+# Where collectstatic puts them (content-hashed and precompressed under config.production)
+STATIC_ROOT = os.environ.get('DJANGO_STATIC_ROOT') or BASE_DIR / 'staticfiles'
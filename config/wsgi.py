@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Parse templates now rather than on the first requests (config.production)
+from habits.warmup import warm_up  # noqa: E402
+
+warm_up()
@@ -0,0 +1,168 @@
+"""Mood analytics over a habit's whole history, vectorized with NumPy.
+
+All entries are loaded with one query straight into an array, and every
+statistic below is computed with array operations, no per-entry Python
+loop. Results are cached under the habit's data version
+(HabitStats.version), so they are recomputed only after a write.
+"""
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+
+from .models import MOOD_CHOICES, SLEEP_DURATION_CHOICES, MoodEntry
+
+ANALYTICS_CACHE_TIMEOUT = 24 * 60 * 60
+MOODS = np.array([value for value, _ in MOOD_CHOICES])
+SLEEP_CHOICES = np.array([value for value, _ in SLEEP_DURATION_CHOICES])
+SLEEP_LABELS = dict(SLEEP_DURATION_CHOICES)
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+# Fewer entries than this in a group and its figure is left out as noise
+MIN_GROUP_SIZE = 3
+
+# Every entry packed as fixed-width text, read from the covering index:
+# the dates as YYYY-MM-DD, and in the same row order one three-digit code
+# per entry holding mood, sleep (0 when unset) and yoga.
+PACKED_SQL = f"""
+    SELECT group_concat(date, ''), group_concat(mood * 100 + coalesce(sleep_duration, 0) * 10 + yoga, '')
+    FROM {MoodEntry._meta.db_table} WHERE habit_id = %s
+"""
+
+
+def load_entries(habit_id):
+    """(n, 4) float array of mood, sleep_duration (NaN when unset), yoga (0/1), weekday (0 = Monday).
+
+    On SQLite the rows come back packed into two strings (see
+    PACKED_SQL) that NumPy parses in one pass; elsewhere the columns are
+    fetched on a raw cursor, which at least skips model and converter
+    work. Either way weekdays are worked out from the dates in NumPy.
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(PACKED_SQL, [habit_id])
+            packed_dates, packed_codes = cursor.fetchone()
+        if not packed_dates:
+            return np.empty((0, 4))
+        dates = np.frombuffer(packed_dates.encode("ascii"), dtype="S10").astype("datetime64[D]")
+        codes = np.frombuffer(packed_codes.encode("ascii"), dtype=np.uint8).reshape(-1, 3) - ord("0")
+        mood, sleep, yoga = codes.astype(np.float64).T
+        sleep[sleep == 0] = np.nan
+    else:
+        query = MoodEntry.objects.filter(habit_id=habit_id).values_list("date", "mood", "sleep_duration", "yoga")
+        sql, params = query.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            fetched = cursor.fetchall()
+        if not fetched:
+            return np.empty((0, 4))
+        dates, mood, sleep, yoga = zip(*fetched)
+        dates = np.array(dates, dtype="datetime64[D]")
+        mood, sleep, yoga = (np.array(column, dtype=np.float64) for column in (mood, sleep, yoga))
+
+    # 1970-01-01 was a Thursday, so days since the epoch + 3 is 0 on Mondays
+    weekday = (dates.astype(np.int64) + 3) % 7
+    return np.column_stack([mood, sleep, yoga, weekday])
+
+
+def pearson(x, y):
+    """Pearson correlation of two equal-length arrays, or None when either is constant."""
+    if len(x) < MIN_GROUP_SIZE:
+        return None
+    dx = x - x.mean()
+    dy = y - y.mean()
+    denominator = np.sqrt((dx * dx).sum() * (dy * dy).sum())
+    if denominator == 0:
+        return None
+    return float((dx * dy).sum() / denominator)
+
+
+def rank(values):
+    """Ranks starting at 1, ties sharing their average rank (vectorized over small integer scales)."""
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    average_ranks = np.cumsum(counts) - (counts - 1) / 2
+    return average_ranks[inverse]
+
+
+def spearman(x, y):
+    if len(x) < MIN_GROUP_SIZE:
+        return None
+    return pearson(rank(x), rank(y))
+
+
+def _mean(values):
+    return round(float(values.mean()), 2) if len(values) >= MIN_GROUP_SIZE else None
+
+
+def analyse(data):
+    """Correlations and group effects from a load_entries() array, as a JSON-ready dict."""
+    mood, sleep, yoga, weekday = data.T
+    has_sleep = ~np.isnan(sleep)
+    slept_mood = mood[has_sleep]
+    slept = sleep[has_sleep]
+    overall = float(mood.mean()) if len(mood) else None
+
+    def correlation(x, y):
+        values = {"pearson": pearson(x, y), "spearman": spearman(x, y)}
+        return {name: None if value is None else round(value, 3) for name, value in values.items()}
+
+    # Mood distribution per sleep choice: a (sleep x mood) count matrix from one bincount
+    sleep_index = slept.astype(np.int64) - 1
+    mood_index = slept_mood.astype(np.int64) - 1
+    counts = np.bincount(sleep_index * len(MOODS) + mood_index, minlength=len(SLEEP_CHOICES) * len(MOODS))
+    counts = counts.reshape(len(SLEEP_CHOICES), len(MOODS))
+    totals = counts.sum(axis=1)
+    mood_sums = counts @ MOODS
+    by_sleep = [
+        {
+            "sleep": int(choice),
+            "label": SLEEP_LABELS[int(choice)],
+            "entries": int(total),
+            "avg_mood": round(float(mood_sum / total), 2) if total >= MIN_GROUP_SIZE else None,
+            "moods": counts[i].tolist(),
+        }
+        for i, (choice, total, mood_sum) in enumerate(zip(SLEEP_CHOICES, totals, mood_sums))
+    ]
+
+    # Weekday effects: mean mood per weekday against the overall mean
+    weekday_index = weekday.astype(np.int64)
+    day_counts = np.bincount(weekday_index, minlength=7)
+    day_sums = np.bincount(weekday_index, weights=mood, minlength=7)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        day_means = day_sums / day_counts
+    by_weekday = [
+        {
+            "weekday": WEEKDAYS[i],
+            "entries": int(day_counts[i]),
+            "avg_mood": round(float(day_means[i]), 2) if day_counts[i] >= MIN_GROUP_SIZE else None,
+            "effect": round(float(day_means[i] - overall), 2) if day_counts[i] >= MIN_GROUP_SIZE else None,
+        }
+        for i in range(7)
+    ]
+
+    yoga_days = yoga == 1
+    yoga_mood = _mean(mood[yoga_days])
+    rest_mood = _mean(mood[~yoga_days])
+
+    return {
+        "entries": int(len(mood)),
+        "avg_mood": None if overall is None else round(overall, 2),
+        "sleep_vs_mood": correlation(slept, slept_mood),
+        "yoga_vs_mood": correlation(yoga, mood),
+        "by_sleep": by_sleep,
+        "yoga": {
+            "days": int(yoga_days.sum()),
+            "avg_mood": yoga_mood,
+            "other_days_avg_mood": rest_mood,
+            "delta": None if yoga_mood is None or rest_mood is None else round(yoga_mood - rest_mood, 2),
+        },
+        "by_weekday": by_weekday,
+    }
+
+
+def habit_analytics(habit_id, version):
+    """analyse() for a habit, cached until its data version changes."""
+    key = f"habits:analytics:{habit_id}:{version}"
+    result = cache.get(key)
+    if result is None:
+        result = analyse(load_entries(habit_id))
+        cache.set(key, result, ANALYTICS_CACHE_TIMEOUT)
+    return result
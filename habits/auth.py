@@ -0,0 +1,49 @@
+"""Load request.user without an auth_user query on every request.
+
+AuthenticationMiddleware asks the session's backend for the user on each
+request; with ModelBackend that is one query each time. CachedModelBackend
+keeps users in a bounded per-process LRU for USER_CACHE_TTL seconds and
+hands every request its own copy.
+
+Saving or deleting a user and logging out drop the cached copy straight
+away (see habits.signals), so a password change ends other sessions at
+once in this process. Other processes keep the old copy, and with it the
+old session hash, until it expires.
+"""
+import copy
+
+from django.contrib.auth.backends import ModelBackend
+
+from .caching import LRUCache
+
+USER_CACHE_TTL = 60
+
+_users = LRUCache(maxsize=4096, ttl=USER_CACHE_TTL)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() is answered from this process's cache when it can."""
+
+    def get_user(self, user_id):
+        user = _users.get(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            _users.set(user_id, user)
+        # Requests may set attributes (permission caches, last_login) on their user
+        return copy.copy(user)
+
+    async def aget_user(self, user_id):
+        user = _users.get(user_id)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is None:
+                return None
+            _users.set(user_id, user)
+        return copy.copy(user)
+
+
+def forget_user(user_id):
+    """Drop this process's cached copy of a user."""
+    _users.delete(user_id)
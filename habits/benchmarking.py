@@ -0,0 +1,276 @@
+"""Helpers shared by the benchmark management commands."""
+import asyncio
+import io
+import math
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .models import MoodEntry
+
+
+@contextmanager
+def benchmark_database(test_name=None):
+    """Run the block against a fresh, migrated test database (never the real one).
+
+    By default that is SQLite's in-memory test database; pass a file path
+    as `test_name` for an on-disk one (needed to see locking and journal
+    behaviour).
+    """
+    test_settings = connection.settings_dict["TEST"]
+    old_test_name = test_settings["NAME"]
+    if test_name:
+        test_settings["NAME"] = test_name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        test_settings["NAME"] = old_test_name
+
+
+def create_entries(habit, count, end_date=None, seed=0, batch_size=5000):
+    """Bulk insert `count` consecutive daily entries for `habit`, ending on `end_date`."""
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=count - 1)
+    entries = (
+        MoodEntry(
+            habit=habit,
+            date=start_date + timedelta(days=i),
+            mood=rng.randint(1, 5),
+            sleep_duration=rng.randint(1, 6),
+            yoga=rng.random() < 0.3,
+            note=rng.choice(["", "", "Felt productive and calm.", "Low energy day."]),
+        )
+        for i in range(count)
+    )
+    created = 0
+    while True:
+        batch = [entry for _, entry in zip(range(batch_size), entries)]
+        if not batch:
+            return created
+        MoodEntry.objects.bulk_create(batch)
+        created += len(batch)
+
+
+class _CountedIteration:
+    """A DB-API cursor whose rows, when iterated, are counted into a RowCounter."""
+
+    def __init__(self, cursor, counter):
+        self._cursor = cursor
+        self._counter = counter
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._counter.rows += 1
+            yield row
+
+
+class RowCounter:
+    """Execute wrapper that counts the rows fetched from every cursor it sees.
+
+    Install with ``connection.execute_wrapper(counter)``; ``counter.rows``
+    then grows with each row the ORM (or raw SQL) actually reads back.
+    """
+
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        cursor = context["cursor"]
+        wrap_errors = context["connection"].wrap_database_errors
+        # Shadow CursorWrapper.__getattr__ for this cursor's fetch methods
+        cursor.fetchone = self._count_one(wrap_errors(cursor.cursor.fetchone))
+        cursor.fetchmany = self._count_many(wrap_errors(cursor.cursor.fetchmany))
+        cursor.fetchall = self._count_many(wrap_errors(cursor.cursor.fetchall))
+        # Raw querysets iterate the cursor instead, which reads the DB-API cursor directly
+        if not isinstance(cursor.cursor, _CountedIteration):
+            cursor.cursor = _CountedIteration(cursor.cursor, self)
+        return result
+
+    def _count_one(self, fetch):
+        def fetchone():
+            row = fetch()
+            if row is not None:
+                self.rows += 1
+            return row
+        return fetchone
+
+    def _count_many(self, fetch):
+        def fetchmany(*args, **kwargs):
+            rows = fetch(*args, **kwargs)
+            self.rows += len(rows)
+            return rows
+        return fetchmany
+
+
+class QueryTimer:
+    """Execute wrapper that counts queries and times each one with perf_counter().
+
+    CaptureQueriesContext only keeps times rounded to the millisecond,
+    which sums sub-millisecond queries to zero.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure(func, repeat=5):
+    """Call `func` `repeat` times and return timing, query and memory figures.
+
+    Timings are taken without tracemalloc running; peak memory and rows
+    fetched come from one extra traced call so the tracing overhead does
+    not skew the latency. ``ms`` is the median; ``p50``/``p95``/``p99``
+    are nearest-rank percentiles of the same timings.
+    """
+    timings = []
+    sql_timings = []
+    queries = 0
+    for _ in range(repeat):
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        sql_timings.append(timer.seconds * 1000)
+        queries = timer.queries
+
+    counter = RowCounter()
+    tracemalloc.start()
+    try:
+        with connection.execute_wrapper(counter):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    ordered = sorted(timings)
+    return {
+        "ms": statistics.median(timings),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "sql_ms": statistics.median(sql_timings),
+        "queries": queries,
+        "rows": counter.rows,
+        "peak_kib": peak / 1024,
+    }
+
+
+def cookie_header(cookies):
+    """A Cookie request header value from a SimpleCookie (e.g. a logged-in test Client's)."""
+    return "; ".join(f"{morsel.key}={morsel.coded_value}" for morsel in cookies.values())
+
+
+def browser_login(user):
+    """Cookie header and CSRF header of a fresh session for `user`, as a browser would send them."""
+    client = Client()
+    client.force_login(user)
+    request = HttpRequest()
+    token = get_token(request)
+    client.cookies[settings.CSRF_COOKIE_NAME] = request.META["CSRF_COOKIE"]
+    return cookie_header(client.cookies), {"X-CSRFToken": token}
+
+
+def wsgi_request(handler, method, path, query="", cookies="", body=b"", content_type="", headers=None):
+    """Run one request through a WSGIHandler, as a WSGI server would. Returns the status code."""
+    environ = {
+        **{f"HTTP_{name.upper().replace('-', '_')}": value for name, value in (headers or {}).items()},
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_HOST": "testserver",
+        "HTTP_COOKIE": cookies,
+        "CONTENT_TYPE": content_type,
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.url_scheme": "http",
+        "wsgi.version": (1, 0),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    status = []
+    response = handler(environ, lambda status_line, response_headers, exc_info=None: status.append(status_line))
+    for _ in response:
+        pass
+    response.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_request(application, method, path, query="", cookies="", body=b"", content_type="", headers=None):
+    """Run one request through an ASGIHandler, as an ASGI server would. Returns the status code."""
+    raw_headers = [(b"host", b"testserver"), (b"cookie", cookies.encode())]
+    if content_type:
+        raw_headers.append((b"content-type", content_type.encode()))
+    raw_headers.extend((name.lower().encode(), value.encode()) for name, value in (headers or {}).items())
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+    connected = asyncio.Event()
+    status = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # The client never disconnects; Django cancels this wait once it has responded
+        await connected.wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await application(scope, receive, send)
+    return status[0]
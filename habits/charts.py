@@ -0,0 +1,97 @@
+"""Chart series for the history page, downsampled on the server.
+
+A chart only has a few hundred pixels to draw on, so long ranges are
+reduced to at most `points` points before they are sent: either bucket
+averages, or Largest-Triangle-Three-Buckets (LTTB), which keeps the
+peaks and dips a plain average would flatten. Yoga is always reported
+as the share of days per bucket.
+"""
+from datetime import date, timedelta
+
+from .models import MoodEntry
+
+CHART_RANGES = {"30d": 30, "90d": 90, "1y": 365, "all": None}
+DEFAULT_RANGE = "30d"
+CHART_METHODS = ("avg", "lttb")
+DEFAULT_POINTS = 200
+MAX_POINTS = 1000
+
+
+def chart_rows(habit_id, days=None, today=None):
+    """(date, mood, sleep_duration, yoga) rows of the last `days` days (all when None), oldest first.
+
+    Every column is in the covering (habit, date, ...) index, so this is
+    an index-only range read.
+    """
+    rows = MoodEntry.objects.filter(habit_id=habit_id)
+    if days:
+        rows = rows.filter(date__gt=(today or date.today()) - timedelta(days=days))
+    return list(rows.order_by("date").values_list("date", "mood", "sleep_duration", "yoga"))
+
+
+def bucket_bounds(count, buckets):
+    """(start, end) index pairs splitting `count` items into `buckets` near-equal runs."""
+    return [(count * i // buckets, count * (i + 1) // buckets) for i in range(buckets)]
+
+
+def bucket_averages(points, buckets):
+    """Average each run of (date, value) points; the bucket is dated by its first point."""
+    averaged = []
+    for start, end in bucket_bounds(len(points), buckets):
+        if end > start:
+            run = points[start:end]
+            averaged.append((run[0][0], sum(value for _, value in run) / len(run)))
+    return averaged
+
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of (date, value) points to `threshold` points.
+
+    Keeps the first and last points, and from each bucket in between the
+    point forming the largest triangle with the previously kept point
+    and the average of the next bucket.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    xs = [day.toordinal() for day, _ in points]
+    ys = [value for _, value in points]
+    sampled = [points[0]]
+    kept = 0
+    # The first and last points are fixed; the rest is split into threshold - 2 buckets
+    bounds = [(start + 1, end + 1) for start, end in bucket_bounds(len(points) - 2, threshold - 2)]
+    for i, (start, end) in enumerate(bounds):
+        next_start, next_end = bounds[i + 1] if i + 1 < len(bounds) else (len(points) - 1, len(points))
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = start, -1
+        for j in range(start, end):
+            area = abs((xs[kept] - avg_x) * (ys[j] - ys[kept]) - (xs[kept] - xs[j]) * (avg_y - ys[kept]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        kept = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def chart_series(rows, points=DEFAULT_POINTS, method="avg"):
+    """Downsampled mood, sleep and yoga series from chart_rows(), as lists of [iso date, value]."""
+    mood = [(day, mood) for day, mood, _, _ in rows]
+    sleep = [(day, sleep) for day, _, sleep, _ in rows if sleep is not None]
+    yoga = [(day, 1 if yoga else 0) for day, _, _, yoga in rows]
+
+    if len(rows) > points:
+        yoga = bucket_averages(yoga, points)
+        if method == "lttb":
+            mood = lttb(mood, points)
+            sleep = lttb(sleep, points)
+        else:
+            mood = bucket_averages(mood, points)
+            sleep = bucket_averages(sleep, points)
+
+    def serialize(series):
+        return [[day.isoformat(), round(value, 2)] for day, value in series]
+
+    return {"mood": serialize(mood), "sleep": serialize(sleep), "yoga": serialize(yoga)}
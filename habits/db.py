@@ -0,0 +1,30 @@
+"""SQLite connection setup, applied to every new connection.
+
+The pragmas come from the SQLITE_PRAGMAS setting ({name: value}), so a
+deployment can tune them without code changes. journal_mode is stored
+in the database file; the others only last as long as the connection,
+which is why connections are kept open between requests (CONN_MAX_AGE).
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PRAGMA_VALUE = re.compile(r"^-?\w+$")
+
+
+def sqlite_pragmas():
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    for name, value in pragmas.items():
+        if not name.isidentifier() or not PRAGMA_VALUE.match(str(value)):
+            raise ImproperlyConfigured(f"SQLITE_PRAGMAS has an invalid entry: {name!r}: {value!r}")
+    return pragmas
+
+
+def apply_sqlite_pragmas(conn):
+    """Run the configured PRAGMA statements on a freshly opened connection."""
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cursor:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,93 @@
+"""Filtering and keyset pagination for the entries list."""
+from datetime import date
+
+from django.db.models import Q
+from django.utils.dateformat import format as format_date
+
+from .models import MoodEntry
+from .search import note_filter
+
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+
+def filter_entries(habit_id, mood=None, yoga=None, search=None):
+    """A habit's entries, newest first, with the entries-page filters applied in SQL."""
+    entries = MoodEntry.objects.filter(habit_id=habit_id)
+    if mood:
+        entries = entries.filter(mood=mood)
+    if yoga:
+        entries = entries.filter(yoga=(yoga == "yes"))
+    if search:
+        entries = entries.filter(note_filter(search, habit_id) | Q(date__contains=search))
+    return entries.order_by("-date", "-id")
+
+
+def encode_cursor(entry):
+    return f"{entry.date.isoformat()}_{entry.id}"
+
+
+def decode_cursor(cursor):
+    """Parse a cursor back into (date, id); raises ValueError when malformed."""
+    day, _, entry_id = cursor.partition("_")
+    entry_id = int(entry_id)
+    # Ids are positive 64-bit integers; anything else could not come from encode_cursor()
+    if not 0 < entry_id < 2 ** 63:
+        raise ValueError(f"Invalid entries cursor: {cursor!r}")
+    return date.fromisoformat(day), entry_id
+
+
+def keyset_page(entries, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of `entries` (ordered by -date, -id) strictly after `cursor`.
+
+    Returns (page, next_cursor); next_cursor is None on the last page. The
+    (date, id) comparison keeps every page an index range read, however
+    deep the user scrolls.
+    """
+    page = list(_page_query(entries, cursor, limit))
+    return _split_page(page, limit)
+
+
+async def akeyset_page(entries, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Async keyset_page()."""
+    page = [entry async for entry in _page_query(entries, cursor, limit)]
+    return _split_page(page, limit)
+
+
+def _page_query(entries, cursor, limit):
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        entries = entries.filter(Q(date__lt=after_date) | Q(date=after_date, id__lt=after_id))
+    # One extra row tells whether there is a next page
+    return entries[:limit + 1]
+
+
+def _split_page(page, limit):
+    if len(page) > limit:
+        page = page[:limit]
+        return page, encode_cursor(page[-1])
+    return page, None
+
+
+def entry_filters(params):
+    """Read the mood/yoga/search filters from a GET QueryDict, dropping invalid values."""
+    mood = params.get("mood", "")
+    yoga = params.get("yoga", "")
+    return {
+        "mood": int(mood) if mood in ("1", "2", "3", "4", "5") else None,
+        "yoga": yoga if yoga in ("yes", "no") else None,
+        "search": params.get("q", "").strip(),
+    }
+
+
+def serialize_entry(entry):
+    return {
+        "id": entry.id,
+        "date": entry.date.isoformat(),
+        "date_display": format_date(entry.date, "l, F d, Y"),
+        "date_short": format_date(entry.date, "M d, Y"),
+        "mood": entry.mood,
+        "sleep": entry.sleep_duration,
+        "yoga": entry.yoga,
+        "note": entry.note,
+    }
@@ -0,0 +1,104 @@
+"""Streaming CSV / NDJSON export of a habit's entries.
+
+Rows are read with a chunked iterator and written out as they arrive,
+so memory use stays flat however long the history is. Under ASGI the
+view serves aexport_lines() over aexport_rows() instead: Django reads
+a sync iterator there into a list before sending any of it.
+"""
+import csv
+import json
+from datetime import date
+
+from .models import MoodEntry
+
+EXPORT_FIELDS = ("date", "mood", "sleep_duration", "yoga", "note")
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+CHUNK_SIZE = 2000
+# Rows joined into each piece of output, so the server writes a few KiB at a time
+ROWS_PER_WRITE = 200
+
+
+class Echo:
+    """File-like object whose write() hands the line back, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def parse_export_range(params):
+    """Read optional `start` / `end` ISO dates from a GET QueryDict; raises ValueError when malformed."""
+    start = params.get("start") or None
+    end = params.get("end") or None
+    start = date.fromisoformat(start) if start else None
+    end = date.fromisoformat(end) if end else None
+    if start and end and start > end:
+        raise ValueError("start is after end")
+    return start, end
+
+
+def _export_queryset(habit_id, start, end):
+    entries = MoodEntry.objects.filter(habit_id=habit_id)
+    if start:
+        entries = entries.filter(date__gte=start)
+    if end:
+        entries = entries.filter(date__lte=end)
+    return entries.order_by("date")
+
+
+def export_rows(habit_id, start=None, end=None, chunk_size=CHUNK_SIZE):
+    """A habit's entries as EXPORT_FIELDS tuples, oldest first, read `chunk_size` rows at a time."""
+    return _export_queryset(habit_id, start, end).values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+async def aexport_rows(habit_id, start=None, end=None, chunk_size=CHUNK_SIZE):
+    """Async export_rows(), yielding the same tuples."""
+    # values(), not values_list(): aiterator() over values_list() runs the
+    # query in the event loop thread, which Django refuses
+    rows = _export_queryset(habit_id, start, end).values(*EXPORT_FIELDS).aiterator(chunk_size=chunk_size)
+    async for row in rows:
+        yield tuple(row[field] for field in EXPORT_FIELDS)
+
+
+def csv_lines(rows, header=True):
+    writer = csv.writer(Echo())
+    if header:
+        yield writer.writerow(EXPORT_FIELDS)
+    for day, mood, sleep_duration, yoga, note in rows:
+        yield writer.writerow([day.isoformat(), mood, sleep_duration, "yes" if yoga else "no", note])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record["date"] = record["date"].isoformat()
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def export_lines(rows, fmt):
+    """Serialize `rows` in `fmt` ("csv" or "ndjson"), yielding ROWS_PER_WRITE lines per string."""
+    lines = csv_lines(rows) if fmt == "csv" else ndjson_lines(rows)
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= ROWS_PER_WRITE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+async def aexport_lines(rows, fmt):
+    """export_lines() over an async iterator of rows (aexport_rows()), serializing ROWS_PER_WRITE rows at a time."""
+    header = fmt == "csv"
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= ROWS_PER_WRITE:
+            yield "".join(csv_lines(batch, header) if fmt == "csv" else ndjson_lines(batch))
+            header = False
+            batch = []
+    if batch or header:
+        yield "".join(csv_lines(batch, header) if fmt == "csv" else ndjson_lines(batch))
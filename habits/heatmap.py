@@ -0,0 +1,59 @@
+"""A habit's year packed into one byte per day, for the year heatmap.
+
+Slot `n` holds day-of-year `n + 1`; there are always 366 slots, so in
+other years than leap years the last one stays empty. Each byte is
+
+    bits 0-2  mood (1-5, 0 when the day has no entry)
+    bits 3-5  sleep_duration choice (1-6, 0 when not given)
+    bit  6    yoga
+
+A year is read with one range query answered by the covering
+(habit, date, mood, sleep_duration, yoga) index and cached until the
+habit's data version changes, like the analytics.
+"""
+from datetime import date
+
+from django.core.cache import cache
+
+from .models import MoodEntry
+
+YEAR_SLOTS = 366
+SLEEP_SHIFT = 3
+YOGA_BIT = 1 << 6
+YEAR_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def pack_day(mood, sleep_duration, yoga):
+    return mood | (sleep_duration or 0) << SLEEP_SHIFT | (YOGA_BIT if yoga else 0)
+
+
+def unpack_day(value):
+    """(mood, sleep_duration, yoga) of a packed day; None for a day without an entry."""
+    if not value:
+        return None
+    return value & 0b111, (value >> SLEEP_SHIFT & 0b111) or None, bool(value & YOGA_BIT)
+
+
+def pack_year(rows):
+    """Pack (date, mood, sleep_duration, yoga) rows of one year."""
+    packed = bytearray(YEAR_SLOTS)
+    for day, mood, sleep_duration, yoga in rows:
+        packed[day.timetuple().tm_yday - 1] = pack_day(mood, sleep_duration, yoga)
+    return bytes(packed)
+
+
+def load_year(habit_id, year):
+    rows = MoodEntry.objects.filter(
+        habit_id=habit_id, date__range=(date(year, 1, 1), date(year, 12, 31))
+    ).values_list("date", "mood", "sleep_duration", "yoga")
+    return pack_year(rows)
+
+
+def habit_year(habit_id, year, version):
+    """load_year() for a habit, cached until its data version changes."""
+    key = f"habits:year:{habit_id}:{year}:{version}"
+    packed = cache.get(key)
+    if packed is None:
+        packed = load_year(habit_id, year)
+        cache.set(key, packed, YEAR_CACHE_TIMEOUT)
+    return packed
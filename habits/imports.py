@@ -0,0 +1,156 @@
+"""Bulk import of entries from CSV / NDJSON, upserted on (habit, date).
+
+Input is read line by line and written in batches, so a file of any
+size is imported with bounded memory. The columns match the export
+(see exports.EXPORT_FIELDS); rows that fail validation are skipped and
+reported with their line number.
+"""
+import csv
+import json
+import os
+from datetime import date
+
+from django.db import transaction
+
+from .models import MOOD_CHOICES, SLEEP_DURATION_CHOICES, MoodEntry
+from .writes import UPSERT_FIELDS, record_bulk_write
+
+MOOD_VALUES = {value for value, _ in MOOD_CHOICES}
+SLEEP_VALUES = {value for value, _ in SLEEP_DURATION_CHOICES}
+YOGA_VALUES = {"yes": True, "true": True, "1": True, "no": False, "false": False, "0": False, "": False}
+IMPORT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".json": "ndjson"}
+BATCH_SIZE = 2000
+# Largest batch the JSON write API takes in one request
+MAX_BATCH_ENTRIES = 366
+# Only the first few problems are reported back; the rest are just counted
+MAX_ERRORS = 20
+
+
+def detect_format(filename):
+    """"csv" or "ndjson" from a file name's extension, or None when unknown."""
+    return IMPORT_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+
+
+def read_records(lines, fmt):
+    """(line number, record) pairs: a dict per CSV row, the raw text per NDJSON line."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_num, line in enumerate(lines, 1):
+            if line.strip():
+                yield line_num, line
+
+
+def _choice(value, allowed, field):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number, got {value!r}")
+    if number not in allowed:
+        raise ValueError(f"{field} must be one of {sorted(allowed)}, got {number}")
+    return number
+
+
+def clean_record(record):
+    """Validate one record into a (date, mood, sleep_duration, yoga, note) tuple; raises ValueError."""
+    if isinstance(record, str):
+        record = json.loads(record)
+        if not isinstance(record, dict):
+            raise ValueError("expected a JSON object")
+
+    try:
+        day = date.fromisoformat(str(record.get("date") or "").strip())
+    except ValueError:
+        raise ValueError(f"date must be YYYY-MM-DD, got {record.get('date')!r}")
+
+    mood = _choice(record.get("mood"), MOOD_VALUES, "mood")
+
+    sleep_duration = record.get("sleep_duration")
+    if sleep_duration in (None, ""):
+        sleep_duration = None
+    else:
+        sleep_duration = _choice(sleep_duration, SLEEP_VALUES, "sleep_duration")
+
+    yoga = record.get("yoga")
+    if not isinstance(yoga, bool):
+        key = str(yoga if yoga is not None else "").strip().lower()
+        if key not in YOGA_VALUES:
+            raise ValueError(f"yoga must be yes or no, got {yoga!r}")
+        yoga = YOGA_VALUES[key]
+
+    note = record.get("note") or ""
+    if not isinstance(note, str):
+        raise ValueError("note must be text")
+
+    return day, mood, sleep_duration, yoga, note
+
+
+def clean_batch(records):
+    """Validate a JSON batch (a list of entry objects) into (rows, errors); errors name the list index."""
+    rows = []
+    errors = []
+    for index, record in enumerate(records):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            rows.append(clean_record(record))
+        except ValueError as exc:
+            errors.append(f"entries[{index}]: {exc}")
+    return rows, errors
+
+
+def build_entries(habit_id, rows):
+    """Unsaved MoodEntry objects for cleaned rows, one per date."""
+    # A statement cannot update the same row twice, so the last row for a date wins
+    by_date = {row[0]: row for row in rows}
+    return [
+        MoodEntry(habit_id=habit_id, date=day, mood=mood, sleep_duration=sleep_duration, yoga=yoga, note=note)
+        for day, mood, sleep_duration, yoga, note in by_date.values()
+    ]
+
+
+def _upsert_import_batch(habit_id, rows):
+    """Insert or update one batch of cleaned rows with a single upsert per SQL batch; returns the row count.
+
+    Unlike writes.upsert_entries() this does no bookkeeping: import_records()
+    rebuilds the habit's derived data once at the end.
+    """
+    entries = build_entries(habit_id, rows)
+    MoodEntry.objects.bulk_create(
+        entries,
+        update_conflicts=True,
+        unique_fields=["habit", "date"],
+        update_fields=UPSERT_FIELDS,
+    )
+    return len(entries)
+
+
+def import_records(habit_id, lines, fmt, batch_size=BATCH_SIZE):
+    """Upsert every valid record from `lines` into the habit, `batch_size` rows at a time.
+
+    Runs in one transaction and rebuilds the habit's totals and rollups at the end.
+    Returns {"imported", "invalid", "errors"}, where errors holds the
+    first MAX_ERRORS problems as "line N: message".
+    """
+    imported = 0
+    invalid = 0
+    errors = []
+    batch = []
+    with transaction.atomic():
+        for line_num, record in read_records(lines, fmt):
+            try:
+                batch.append(clean_record(record))
+            except ValueError as exc:
+                invalid += 1
+                if len(errors) < MAX_ERRORS:
+                    errors.append(f"line {line_num}: {exc}")
+                continue
+            if len(batch) >= batch_size:
+                imported += _upsert_import_batch(habit_id, batch)
+                batch = []
+        if batch:
+            imported += _upsert_import_batch(habit_id, batch)
+        record_bulk_write([habit_id])
+    return {"imported": imported, "invalid": invalid, "errors": errors}
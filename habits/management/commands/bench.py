@@ -0,0 +1,276 @@
+import json
+import platform
+from collections import Counter
+from datetime import date
+from io import StringIO
+from itertools import count
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from habits.benchmarking import benchmark_database, measure
+from habits.models import MoodEntry
+from habits.pages import PAGE_CACHE_ALIAS, page_cache_counts
+
+
+User = get_user_model()
+
+# Routes rendered through the per-user page cache (habits.pages)
+PAGE_CACHED_ROUTES = ("history", "history_past_months", "entries", "entries_filtered")
+# Conditional GETs, and the full GETs they save
+REVALIDATED_ROUTES = {"history_304": "history", "entries_304": "entries"}
+# Settings overrides per --auth mode: the project's cached sessions and users, or Django's database-backed defaults
+AUTH_MODES = {
+    "cached": {},
+    "database": {
+        "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+        "AUTHENTICATION_BACKENDS": ["django.contrib.auth.backends.ModelBackend"],
+    },
+}
+
+
+def months_back(today, months):
+    """(year, month) of the month `months` before `today`'s."""
+    index = today.year * 12 + today.month - 1 - months
+    return index // 12, index % 12 + 1
+
+
+def build_routes(client, entries):
+    """(name, method, path, call) for every habits route worth timing.
+
+    `entries` are the benchmark user's entry ids, oldest first; edit uses
+    the newest one and delete works through the oldest ones, one per call.
+    """
+    today = date.today()
+    history = reverse("mood_history")
+    first_page = client.get(reverse("entries_api")).json()
+    sync = reverse("sync_entries")
+    # Caught up now: sync_delta then only sees what the routes before it write
+    synced = {"has_more": True, "next_cursor": None}
+    while synced["has_more"]:
+        synced = client.get(sync, {"since": synced["next_cursor"] or "", "limit": 1000}).json()
+    edit_url = reverse("edit_entry", args=[entries[-1]])
+    tracker_post = {"mood": "4", "sleep_duration": "4", "yoga": "yes", "note": "Benchmark entry."}
+    edit_post = {"mood": "3", "sleep_duration": "5", "yoga": "no", "note": "Edited by the benchmark."}
+
+    # Walk back through past months so every call hits a different window
+    month_calls = count(1)
+    delete_calls = iter(entries[:-1])
+
+    def past_month():
+        year, month = months_back(today, next(month_calls) % 36 + 1)
+        return client.get(history, {"year": year, "month": month})
+
+    def delete():
+        return client.post(reverse("delete_entry", args=[next(delete_calls)]))
+
+    def revisit(url):
+        """A browser revalidating its copy of `url`, taken on the first call (after any earlier writes)."""
+        etag = None
+
+        def call():
+            nonlocal etag
+            if etag is None:
+                etag = client.get(url)["ETag"]
+            return client.get(url, headers={"If-None-Match": etag})
+        return call
+
+    return [
+        ("tracker", "GET", reverse("habits_tracker"), lambda: client.get(reverse("habits_tracker"))),
+        ("tracker_post", "POST", reverse("habits_tracker"), lambda: client.post(reverse("habits_tracker"), tracker_post)),
+        ("history", "GET", history, lambda: client.get(history)),
+        ("history_304", "GET", f"{history} (If-None-Match)", revisit(history)),
+        ("history_past_months", "GET", f"{history}?year=…&month=…", past_month),
+        ("chart_30d", "GET", f"{reverse('chart_data')}?range=30d",
+         lambda: client.get(reverse("chart_data"), {"range": "30d"})),
+        ("chart_all_lttb", "GET", f"{reverse('chart_data')}?range=all&method=lttb",
+         lambda: client.get(reverse("chart_data"), {"range": "all", "method": "lttb"})),
+        ("year", "GET", reverse("year_heatmap"), lambda: client.get(reverse("year_heatmap"))),
+        ("weekly_summary", "GET", f"{reverse('weekly_summary')}?weeks=52",
+         lambda: client.get(reverse("weekly_summary"), {"weeks": 52})),
+        ("entries", "GET", reverse("all_entries"), lambda: client.get(reverse("all_entries"))),
+        ("entries_304", "GET", f"{reverse('all_entries')} (If-None-Match)", revisit(reverse("all_entries"))),
+        ("entries_filtered", "GET", f"{reverse('all_entries')}?mood=3&yoga=no&q=calm",
+         lambda: client.get(reverse("all_entries"), {"mood": "3", "yoga": "no", "q": "calm"})),
+        ("entries_api_next", "GET", f"{reverse('entries_api')}?cursor=…",
+         lambda: client.get(reverse("entries_api"), {"cursor": first_page["next_cursor"]})),
+        ("search", "GET", f"{reverse('search_entries')}?q=prod",
+         lambda: client.get(reverse("search_entries"), {"q": "prod"})),
+        ("edit", "GET", edit_url, lambda: client.get(edit_url)),
+        ("edit_post", "POST", edit_url, lambda: client.post(edit_url, edit_post)),
+        ("delete", "POST", reverse("delete_entry", args=[entries[0]]), delete),
+        ("sync_full", "GET", f"{sync}?limit=1000", lambda: client.get(sync, {"limit": 1000})),
+        ("sync_delta", "GET", f"{sync}?since=…",
+         lambda: client.get(sync, {"since": synced["next_cursor"], "limit": 1000})),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Benchmark every habits route (latency percentiles, queries, rows fetched, peak memory) on a seeded dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20,
+                            help="Seeded users sharing the database (default: 20)")
+        parser.add_argument("--days", type=int, default=1095,
+                            help="Days of entries per user (default: 1095, three years)")
+        parser.add_argument("--repeat", type=int, default=30, help="Requests per route (default: 30)")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the dataset (default: 0)")
+        parser.add_argument("--routes", type=str, default="",
+                            help="Comma separated route names to run (default: all)")
+        parser.add_argument("--output", type=str, default="",
+                            help="Write the results as JSON to this file")
+        parser.add_argument("--compare", type=str, default="",
+                            help="A previous --output file to show p50/p95 changes against")
+        parser.add_argument("--auth", choices=sorted(AUTH_MODES), default="cached",
+                            help="Session and user loading: the project settings (cached, default) or "
+                                 "database-backed sessions and ModelBackend (database)")
+        parser.add_argument("--metrics-sample-rate", type=float, default=None,
+                            help="Override METRICS_SAMPLE_RATE (0 to measure without habits.metrics timing)")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["days"] < 2 or options["repeat"] < 1:
+            raise CommandError("--users and --repeat must be at least 1 and --days at least 2.")
+        if options["days"] < options["repeat"] + 3:
+            raise CommandError("--days must exceed --repeat by 3 or more: each delete call needs its own entry.")
+
+        baseline = {}
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as f:
+                    baseline = json.load(f)["routes"]
+            except (OSError, ValueError, KeyError) as exc:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {exc}")
+
+        sample_rate = options["metrics_sample_rate"]
+        if sample_rate is None:
+            sample_rate = settings.METRICS_SAMPLE_RATE
+
+        with benchmark_database(), override_settings(METRICS_SAMPLE_RATE=sample_rate, **AUTH_MODES[options["auth"]]):
+            call_command("seed_entries", users=options["users"], days=options["days"],
+                         seed=options["seed"], stdout=StringIO())
+            entry_count = MoodEntry.objects.count()
+            user = User.objects.order_by("username").first()
+            entries = list(
+                MoodEntry.objects.filter(habit__user=user).order_by("date").values_list("id", flat=True)
+            )
+
+            client = Client()
+            client.force_login(user)
+            routes = build_routes(client, entries)
+            if options["routes"]:
+                wanted = set(options["routes"].split(","))
+                unknown = wanted - {name for name, *_ in routes}
+                if unknown:
+                    raise CommandError(f"Unknown route(s): {', '.join(sorted(unknown))}")
+                routes = [route for route in routes if route[0] in wanted]
+
+            results = {}
+            self.stdout.write(
+                f"{'route':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sql ms':>8} "
+                f"{'queries':>8} {'rows':>7} {'peak KiB':>9}"
+            )
+            for name, method, path, call in routes:
+                response = call()  # warm up templates and caches
+                counts_before = Counter(page_cache_counts)
+                result = measure(call, repeat=options["repeat"])
+                cache_counts = page_cache_counts - counts_before
+                results[name] = {
+                    "method": method,
+                    "path": path,
+                    "p50_ms": round(result["p50"], 3),
+                    "p95_ms": round(result["p95"], 3),
+                    "p99_ms": round(result["p99"], 3),
+                    "sql_ms": round(result["sql_ms"], 3),
+                    "queries": result["queries"],
+                    "rows": result["rows"],
+                    "peak_kib": round(result["peak_kib"], 1),
+                    "status": response.status_code,
+                    "response_kib": round(len(response.content) / 1024, 1),
+                }
+                self.stdout.write(self.format_row(name, results[name], baseline.get(name)))
+                if name in PAGE_CACHED_ROUTES:
+                    results[name]["page_cache"] = self.measure_page_cache(call, result, cache_counts, options)
+
+            revalidated = [name for name in REVALIDATED_ROUTES if name in results and REVALIDATED_ROUTES[name] in results]
+            if revalidated:
+                self.stdout.write(
+                    f"\n{'conditional GET':<20} {'status':>6} {'p50 ms':>8} {'full ms':>8} {'KiB':>6} {'full KiB':>9}"
+                )
+                for name in revalidated:
+                    full = results[REVALIDATED_ROUTES[name]]
+                    self.stdout.write(
+                        f"{name:<20} {results[name]['status']:>6} {results[name]['p50_ms']:>8.2f} "
+                        f"{full['p50_ms']:>8.2f} {results[name]['response_kib']:>6.1f} {full['response_kib']:>9.1f}"
+                    )
+
+            page_cached = [name for name in PAGE_CACHED_ROUTES if name in results]
+            if page_cached:
+                self.stdout.write(
+                    f"\n{'page cache':<20} {'hit ratio':>9} {'p50 ms':>8} {'uncached':>9} {'saved':>7}"
+                )
+                for name in page_cached:
+                    page_cache = results[name]["page_cache"]
+                    hit_ratio = "-" if page_cache["hit_ratio"] is None else f"{page_cache['hit_ratio']:.0%}"
+                    self.stdout.write(
+                        f"{name:<20} {hit_ratio:>9} {results[name]['p50_ms']:>8.2f} "
+                        f"{page_cache['uncached_p50_ms']:>9.2f} {page_cache['saved_pct']:>6.0f}%"
+                    )
+
+        report = {
+            "dataset": {"users": options["users"], "days": options["days"], "seed": options["seed"],
+                        "entries": entry_count},
+            "repeat": options["repeat"],
+            "auth": options["auth"],
+            "metrics_sample_rate": sample_rate,
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": f"{connection.vendor} {connection.Database.sqlite_version}"
+                if connection.vendor == "sqlite" else connection.vendor,
+            },
+            "routes": results,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+                f.write("\n")
+            self.stdout.write(f"Results written to {options['output']}")
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
+
+    def measure_page_cache(self, call, cached, cache_counts, options):
+        """Hit ratio seen while measuring a route, and its p50 again with the page cache switched off."""
+        no_page_cache = {**settings.CACHES, PAGE_CACHE_ALIAS: {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+        with override_settings(CACHES=no_page_cache):
+            uncached = measure(call, repeat=options["repeat"])
+        lookups = cache_counts["hit"] + cache_counts["miss"]
+        return {
+            "hit_ratio": round(cache_counts["hit"] / lookups, 3) if lookups else None,
+            "hits": cache_counts["hit"],
+            "misses": cache_counts["miss"],
+            "bypassed": cache_counts["bypass"],
+            "uncached_p50_ms": round(uncached["p50"], 3),
+            "saved_pct": round((1 - cached["p50"] / uncached["p50"]) * 100, 1) if uncached["p50"] else 0,
+        }
+
+    def format_row(self, name, result, previous=None):
+        row = (
+            f"{name:<20} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['sql_ms']:>8.2f} {result['queries']:>8} {result['rows']:>7} {result['peak_kib']:>9.1f}"
+        )
+        if previous:
+            changes = []
+            for key in ("p50_ms", "p95_ms"):
+                if previous.get(key):
+                    changes.append(f"{key[:3]} {(result[key] - previous[key]) / previous[key]:+.0%}")
+            if previous.get("queries") != result["queries"]:
+                changes.append(f"queries {previous.get('queries')}→{result['queries']}")
+            row += "  (" + ", ".join(changes) + ")"
+        return row
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from habits.analytics import analyse, load_entries
+from habits.benchmarking import benchmark_database, create_entries
+from habits.models import Action
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Benchmark the mood analytics (one-query load plus vectorized analysis) against growing histories."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=str, default="1000,10000,100000",
+                            help="Comma separated entry counts (default: 1000,10000,100000)")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per size (default: 5)")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        repeat = options["repeat"]
+
+        with benchmark_database():
+            self.stdout.write(f"{'entries':>9} {'load ms':>9} {'analyse ms':>11} {'total ms':>9}")
+            for size in sizes:
+                user = User.objects.create_user(username=f"bench{size}", password="bench-password")
+                habit = Action.objects.create(user=user, name="Daily Mood")
+                create_entries(habit, size)
+
+                load_ms = []
+                analyse_ms = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    data = load_entries(habit.id)
+                    loaded = time.perf_counter()
+                    analyse(data)
+                    load_ms.append((loaded - started) * 1000)
+                    analyse_ms.append((time.perf_counter() - loaded) * 1000)
+
+                load, analysed = min(load_ms), min(analyse_ms)
+                self.stdout.write(f"{size:>9} {load:>9.2f} {analysed:>11.2f} {load + analysed:>9.2f}")
+
+        self.stdout.write(self.style.SUCCESS("Analytics benchmark complete."))
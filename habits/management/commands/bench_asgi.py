@@ -0,0 +1,125 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from habits.benchmarking import asgi_request, benchmark_database, cookie_header, percentile, wsgi_request
+
+
+User = get_user_model()
+
+
+def routes():
+    """(name, path, query) of the pages served by async views."""
+    return [
+        ("tracker", reverse("habits_tracker"), ""),
+        ("history", reverse("mood_history"), ""),
+        ("entries", reverse("all_entries"), ""),
+        ("entries_filtered", reverse("all_entries"), "mood=3&yoga=no&q=calm"),
+    ]
+
+
+def summarize(timings, elapsed, statuses):
+    ordered = sorted(timings)
+    return {
+        "rps": len(timings) / elapsed,
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "errors": sum(1 for status in statuses if status != 200),
+    }
+
+
+def run_wsgi(path, query, cookies, requests, concurrency):
+    """`requests` GETs through WSGIHandler from `concurrency` threads, like a threaded WSGI server."""
+    handler = WSGIHandler()
+
+    def call(_):
+        started = time.perf_counter()
+        status = wsgi_request(handler, "GET", path, query, cookies)
+        return (time.perf_counter() - started) * 1000, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+    return summarize([ms for ms, _ in results], elapsed, [status for _, status in results])
+
+
+def run_asgi(path, query, cookies, requests, concurrency):
+    """`requests` GETs through ASGIHandler on one event loop, at most `concurrency` in flight."""
+    application = ASGIHandler()
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def call():
+            async with slots:
+                started = time.perf_counter()
+                status = await asgi_request(application, "GET", path, query, cookies)
+                return (time.perf_counter() - started) * 1000, status
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(call() for _ in range(requests)))
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(main())
+    return summarize([ms for ms, _ in results], elapsed, [status for _, status in results])
+
+
+class Command(BaseCommand):
+    help = "Compare WSGI (threads) and ASGI (event loop) throughput of the async views on a seeded dataset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20,
+                            help="Seeded users sharing the database (default: 20)")
+        parser.add_argument("--days", type=int, default=1095,
+                            help="Days of entries per user (default: 1095, three years)")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the dataset (default: 0)")
+        parser.add_argument("--requests", type=int, default=200,
+                            help="Requests per route and server (default: 200)")
+        parser.add_argument("--concurrency", type=int, default=8,
+                            help="Requests in flight at once (default: 8)")
+        parser.add_argument("--routes", type=str, default="",
+                            help="Comma separated route names to run (default: all)")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["days"] < 1 or options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--users, --days, --requests and --concurrency must be at least 1.")
+
+        with benchmark_database():
+            call_command("seed_entries", users=options["users"], days=options["days"],
+                         seed=options["seed"], stdout=StringIO())
+            client = Client()
+            client.force_login(User.objects.order_by("username").first())
+            cookies = cookie_header(client.cookies)
+
+            selected = routes()
+            if options["routes"]:
+                wanted = set(options["routes"].split(","))
+                unknown = wanted - {name for name, *_ in selected}
+                if unknown:
+                    raise CommandError(f"Unknown route(s): {', '.join(sorted(unknown))}")
+                selected = [route for route in selected if route[0] in wanted]
+
+            self.stdout.write(
+                f"{options['requests']} requests per route, {options['concurrency']} in flight\n"
+                f"{'route':<18} {'server':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}"
+            )
+            for name, path, query in selected:
+                for server, run in (("wsgi", run_wsgi), ("asgi", run_asgi)):
+                    run(path, query, cookies, options["concurrency"], options["concurrency"])  # warm up
+                    result = run(path, query, cookies, options["requests"], options["concurrency"])
+                    self.stdout.write(
+                        f"{name:<18} {server:<6} {result['rps']:>8.1f} {result['p50']:>8.2f} "
+                        f"{result['p95']:>8.2f} {result['errors']:>7}"
+                    )
+
+        self.stdout.write(self.style.SUCCESS("ASGI benchmark complete."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+
+from habits.benchmarking import benchmark_database, create_entries, measure
+from habits.models import Action
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Benchmark the history page (query time and peak memory) against growing histories."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=str, default="100,10000,100000",
+                            help="Comma separated entry counts (default: 100,10000,100000)")
+        parser.add_argument("--repeat", type=int, default=5, help="Requests per size (default: 5)")
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+        repeat = options["repeat"]
+
+        with benchmark_database():
+            self.stdout.write(f"{'entries':>9} {'page ms':>9} {'sql ms':>9} {'queries':>8} {'peak KiB':>10}")
+            for size in sizes:
+                user = User.objects.create_user(username=f"bench{size}", password="bench-password")
+                habit = Action.objects.create(user=user, name="Daily Mood")
+                create_entries(habit, size)
+
+                client = Client()
+                client.force_login(user)
+                url = reverse("mood_history")
+                client.get(url)  # warm up templates and caches
+
+                result = measure(lambda: client.get(url), repeat=repeat)
+                self.stdout.write(
+                    f"{size:>9} {result['ms']:>9.2f} {result['sql_ms']:>9.2f} "
+                    f"{result['queries']:>8} {result['peak_kib']:>10.1f}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("History benchmark complete."))
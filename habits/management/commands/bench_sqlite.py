@@ -0,0 +1,141 @@
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from habits.benchmarking import benchmark_database, browser_login, percentile, wsgi_request
+
+
+User = get_user_model()
+
+
+def configurations():
+    """(name, CONN_MAX_AGE, OPTIONS, SQLITE_PRAGMAS): Django's defaults against the project settings."""
+    tuned = settings.DATABASES[DEFAULT_DB_ALIAS]
+    return [
+        ("default", 0, {}, {"journal_mode": "DELETE"}),
+        ("tuned", tuned.get("CONN_MAX_AGE", 0), tuned.get("OPTIONS", {}), settings.SQLITE_PRAGMAS),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Parallel tracker writers and page readers against an on-disk SQLite database, default vs tuned settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20,
+                            help="Seeded users; each writer posts as its own user (default: 20)")
+        parser.add_argument("--days", type=int, default=365, help="Days of entries per user (default: 365)")
+        parser.add_argument("--writers", type=int, default=8, help="Threads posting mood entries (default: 8)")
+        parser.add_argument("--readers", type=int, default=8, help="Threads loading pages (default: 8)")
+        parser.add_argument("--requests", type=int, default=25, help="Requests per thread (default: 25)")
+
+    def handle(self, *args, **options):
+        if options["writers"] < 1 or options["readers"] < 0 or options["requests"] < 1:
+            raise CommandError("--writers and --requests must be at least 1 and --readers at least 0.")
+        if options["users"] < options["writers"]:
+            raise CommandError("--users must be at least --writers: every writer posts as a different user.")
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark is for SQLite databases.")
+
+        with tempfile.TemporaryDirectory() as directory, benchmark_database(os.path.join(directory, "bench.sqlite3")):
+            call_command("seed_entries", users=options["users"], days=options["days"], stdout=StringIO())
+            sessions = [browser_login(user) for user in User.objects.order_by("username")]
+
+            self.stdout.write(
+                f"{options['writers']} writers, {options['readers']} readers, {options['requests']} requests each\n"
+                f"{'config':<8} {'writes/s':>9} {'reads/s':>8} {'write p95':>10} {'read p95':>9} "
+                f"{'errors':>7} {'locked':>7}"
+            )
+            for name, conn_max_age, db_options, pragmas in configurations():
+                result = self.run(sessions, conn_max_age, db_options, pragmas, options)
+                self.stdout.write(
+                    f"{name:<8} {result['writes_per_s']:>9.1f} {result['reads_per_s']:>8.1f} "
+                    f"{result['write_p95']:>10.1f} {result['read_p95']:>9.1f} "
+                    f"{result['errors']:>7} {result['locked']:>7}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("SQLite benchmark complete."))
+
+    def run(self, sessions, conn_max_age, db_options, pragmas, options):
+        # Connections read these when they open, so every worker thread picks them up
+        db_settings = connections.settings[DEFAULT_DB_ALIAS]
+        saved = db_settings["CONN_MAX_AGE"], db_settings["OPTIONS"]
+        db_settings["CONN_MAX_AGE"], db_settings["OPTIONS"] = conn_max_age, db_options
+
+        handler = WSGIHandler()
+        tracker = reverse("habits_tracker")
+        pages = [reverse("mood_history"), reverse("all_entries")]
+        body = urlencode({"mood": "4", "sleep_duration": "5", "yoga": "yes", "note": "Morning burst."}).encode()
+        failures = Counter()
+
+        def writer(index):
+            cookies, headers = sessions[index]
+            timings = []
+            for _ in range(options["requests"]):
+                started = time.perf_counter()
+                status = wsgi_request(handler, "POST", tracker, cookies=cookies, body=body,
+                                      content_type="application/x-www-form-urlencoded", headers=headers)
+                timings.append(((time.perf_counter() - started) * 1000, status == 302))
+            connections.close_all()
+            return "write", timings
+
+        def reader(index):
+            cookies, _ = sessions[index % len(sessions)]
+            timings = []
+            for i in range(options["requests"]):
+                started = time.perf_counter()
+                status = wsgi_request(handler, "GET", pages[i % len(pages)], cookies=cookies)
+                timings.append(((time.perf_counter() - started) * 1000, status == 200))
+            connections.close_all()
+            return "read", timings
+
+        def count_exception(sender, **kwargs):
+            # Sent from inside the handler's except block
+            failures["database is locked" if "locked" in str(sys.exc_info()[1]) else "other"] += 1
+
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        got_request_exception.connect(count_exception)
+        try:
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                connection.close()
+                connection.ensure_connection()
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["writers"] + options["readers"]) as pool:
+                    jobs = [pool.submit(writer, i) for i in range(options["writers"])]
+                    jobs += [pool.submit(reader, i) for i in range(options["readers"])]
+                    results = [job.result() for job in jobs]
+                elapsed = time.perf_counter() - started
+        finally:
+            got_request_exception.disconnect(count_exception)
+            request_logger.setLevel(level)
+            db_settings["CONN_MAX_AGE"], db_settings["OPTIONS"] = saved
+
+        writes = sorted(ms for kind, timings in results if kind == "write" for ms, _ in timings)
+        reads = sorted(ms for kind, timings in results if kind == "read" for ms, _ in timings)
+        ok_writes = sum(ok for kind, timings in results if kind == "write" for _, ok in timings)
+        ok_reads = sum(ok for kind, timings in results if kind == "read" for _, ok in timings)
+        return {
+            "writes_per_s": ok_writes / elapsed,
+            "reads_per_s": ok_reads / elapsed,
+            "write_p95": percentile(writes, 95),
+            "read_p95": percentile(reads, 95) if reads else 0,
+            "errors": len(writes) + len(reads) - ok_writes - ok_reads,
+            "locked": failures["database is locked"],
+        }
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import StringIO
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.urls import reverse
+
+from habits.benchmarking import benchmark_database, browser_login, percentile, wsgi_request
+from habits.models import Action, MoodEntry
+from habits.writes import record_bulk_write
+
+
+User = get_user_model()
+
+
+def batch_body(request_index, batch_days):
+    """A JSON batch of `batch_days` days; consecutive requests overlap by half, so it mixes inserts and updates."""
+    end = date.today() - timedelta(days=request_index * batch_days // 2)
+    return json.dumps({"entries": [
+        {"date": str(end - timedelta(days=offset)), "mood": offset % 5 + 1, "sleep_duration": offset % 6 + 1,
+         "yoga": offset % 2 == 0, "note": "Queued offline."}
+        for offset in range(batch_days)
+    ]}).encode()
+
+
+class Command(BaseCommand):
+    help = "Concurrent submitters on an on-disk SQLite database: tracker double submits and batched JSON writes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--submitters", type=int, default=8,
+                            help="Threads posting at once; tracker submitters come in pairs per user (default: 8)")
+        parser.add_argument("--requests", type=int, default=25, help="Requests per submitter (default: 25)")
+        parser.add_argument("--days", type=int, default=90, help="Days of seeded entries per user (default: 90)")
+        parser.add_argument("--batch-days", type=int, default=30, help="Days per batch request (default: 30)")
+        parser.add_argument("--scenarios", type=str, default="tracker,batch",
+                            help="Comma separated scenarios to run (default: tracker,batch)")
+
+    def handle(self, *args, **options):
+        if options["submitters"] < 2 or options["requests"] < 1 or options["batch_days"] < 1:
+            raise CommandError("--submitters must be at least 2, --requests and --batch-days at least 1.")
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark is for SQLite databases.")
+
+        scenarios = options["scenarios"].split(",")
+        unknown = set(scenarios) - {"tracker", "batch"}
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        submitters = options["submitters"]
+        with tempfile.TemporaryDirectory() as directory, benchmark_database(os.path.join(directory, "bench.sqlite3")):
+            call_command("seed_entries", users=submitters, days=options["days"], stdout=StringIO())
+            # Today's entries are what the tracker writes race to create
+            MoodEntry.objects.filter(date=date.today()).delete()
+            record_bulk_write(list(Action.objects.values_list("id", flat=True)))
+            sessions = [browser_login(user) for user in User.objects.order_by("username")]
+
+            form = urlencode({"mood": "4", "sleep_duration": "5", "yoga": "yes", "note": "Double submit."}).encode()
+            # (path, content type, expected status, entries per request, (submitter, i) -> (session, body))
+            workloads = {
+                "tracker": (
+                    "habits_tracker", "application/x-www-form-urlencoded", 302, 1,
+                    lambda index, i: (sessions[index // 2], form),
+                ),
+                "batch": (
+                    "batch_entries", "application/json", 200, options["batch_days"],
+                    lambda index, i: (sessions[index], batch_body(index * options["requests"] + i, options["batch_days"])),
+                ),
+            }
+
+            self.stdout.write(
+                f"{submitters} submitters, {options['requests']} requests each, {options['batch_days']}-day batches\n"
+                f"{'scenario':<9} {'req/s':>7} {'entries/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}"
+            )
+            for name in scenarios:
+                url_name, content_type, expected, entries_per_request, request = workloads[name]
+                result = self.run(reverse(url_name), content_type, expected, request, submitters, options["requests"])
+                self.stdout.write(
+                    f"{name:<9} {result['rps']:>7.1f} {result['rps'] * entries_per_request:>10.1f} "
+                    f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['errors']:>7}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Write benchmark complete."))
+
+    def run(self, path, content_type, expected, request, submitters, requests):
+        handler = WSGIHandler()
+
+        def submitter(index):
+            timings = []
+            for i in range(requests):
+                (cookies, headers), body = request(index, i)
+                started = time.perf_counter()
+                status = wsgi_request(handler, "POST", path, cookies=cookies, body=body,
+                                      content_type=content_type, headers=headers)
+                timings.append(((time.perf_counter() - started) * 1000, status == expected))
+            connections.close_all()
+            return timings
+
+        # Failed requests are counted, not logged
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=submitters) as pool:
+                results = [timing for timings in pool.map(submitter, range(submitters)) for timing in timings]
+            elapsed = time.perf_counter() - started
+        finally:
+            request_logger.setLevel(level)
+
+        ordered = sorted(ms for ms, _ in results)
+        ok = sum(ok for _, ok in results)
+        return {
+            "rps": ok / elapsed,
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "errors": len(results) - ok,
+        }
@@ -0,0 +1,61 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+
+from habits.exports import EXPORT_FORMATS
+from habits.imports import BATCH_SIZE, detect_format, import_records
+from habits.models import Action
+from habits.resolvers import DEFAULT_HABIT_NAME
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import (upsert by date) a user's entries from a CSV or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=str, help="CSV or NDJSON file to import")
+        parser.add_argument("--username", type=str, required=True, help="User to import the entries for")
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default=None,
+                            help="Input format (default: from the file extension)")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                            help=f"Rows per upsert batch (default: {BATCH_SIZE})")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or detect_format(path)
+        if not fmt:
+            raise CommandError(f"Cannot tell the format of {path}; pass --format csv or --format ndjson.")
+
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' not found. Create it first.")
+        habit, _ = Action.objects.get_or_create(user=user, name=DEFAULT_HABIT_NAME)
+
+        started = time.perf_counter()
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                result = import_records(habit.id, f, fmt, options["batch_size"])
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        except UnicodeDecodeError:
+            # import_records() rolled everything back
+            raise CommandError(f"{path} is not UTF-8 text: save it as UTF-8 and import it again.")
+        except csv.Error as exc:
+            raise CommandError(f"{path} is not valid CSV: {exc}")
+        elapsed = time.perf_counter() - started
+
+        for error in result["errors"]:
+            self.stderr.write(self.style.WARNING(error))
+        if result["invalid"] > len(result["errors"]):
+            self.stderr.write(self.style.WARNING(f"... and {result['invalid'] - len(result['errors'])} more"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['imported']} entries for '{user.username}' "
+            f"({result['invalid']} invalid rows skipped) in {elapsed:.1f}s "
+            f"({result['imported'] / elapsed if elapsed else 0:,.0f} rows/s)"
+        ))
@@ -0,0 +1,88 @@
+import gzip
+import re
+from io import StringIO
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from habits.benchmarking import benchmark_database
+from habits.staticfiles import compress
+
+
+User = get_user_model()
+
+# Local stylesheets and scripts a page references
+ASSET_RE = re.compile(r'<(?:link[^>]+href|script[^>]+src)="([^"]+)"')
+PAGES = ("habits_tracker", "mood_history", "weekly_summary", "all_entries", "login_view")
+
+
+def transfer_size(data):
+    """Bytes on the wire with the best precompressed variant (what habits.staticfiles serves)."""
+    return min([len(data), *map(len, compress(data).values())])
+
+
+def html_transfer_size(data):
+    # Pages are compressed per response, at a cheaper level
+    return min(len(data), len(gzip.compress(data, compresslevel=6, mtime=0)))
+
+
+def static_assets(html):
+    """Source file paths of the project static files `html` loads."""
+    prefix = urlparse(settings.STATIC_URL).path
+    paths = []
+    for url in ASSET_RE.findall(html):
+        path = urlparse(url).path
+        if path.startswith(prefix):
+            found = finders.find(path[len(prefix):])
+            if found:
+                paths.append(found)
+    return paths
+
+
+class Command(BaseCommand):
+    help = "Page weight of the main pages: HTML and the static CSS/JS they load, raw and compressed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=365, help="Days of entries for the user (default: 365)")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        with benchmark_database():
+            call_command("seed_entries", users=1, days=options["days"], stdout=StringIO())
+            client = Client()
+            client.force_login(User.objects.get())
+
+            self.stdout.write(
+                f"{'page':<16} {'html KiB':>9} {'wire':>7} {'assets':>7} {'KiB':>7} {'wire':>7} "
+                f"{'first view':>11} {'repeat view':>12}"
+            )
+            for name in PAGES:
+                if name == "login_view":
+                    client.logout()
+                response = client.get(reverse(name))
+                if response.status_code != 200:
+                    raise CommandError(f"{name} returned {response.status_code}")
+                html = response.content
+                assets = []
+                for path in static_assets(html.decode()):
+                    with open(path, "rb") as f:
+                        assets.append(f.read())
+
+                html_wire = html_transfer_size(html)
+                assets_wire = sum(map(transfer_size, assets))
+                # A repeat view finds the (content-hashed, long-lived) assets in the browser cache
+                self.stdout.write(
+                    f"{name:<16} {len(html) / 1024:>9.1f} {html_wire / 1024:>7.1f} {len(assets):>7} "
+                    f"{sum(map(len, assets)) / 1024:>7.1f} {assets_wire / 1024:>7.1f} "
+                    f"{(html_wire + assets_wire) / 1024:>11.1f} {html_wire / 1024:>12.1f}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Page weight measured (sizes in KiB; wire = compressed transfer)."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from habits.stats import rebuild_stats, verify_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the HabitStats running totals from MoodEntry and verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habit", type=int, action="append", dest="habits",
+                            help="Only this habit id (repeatable, default: all habits)")
+        parser.add_argument("--verify-only", action="store_true",
+                            help="Report mismatches without rebuilding")
+
+    def handle(self, *args, **options):
+        habit_ids = options["habits"]
+
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rebuilt = rebuild_stats(habit_ids)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} habit(s)."))
+
+        mismatches = verify_stats(habit_ids)
+        for habit_id, stored, expected in mismatches:
+            self.stderr.write(self.style.ERROR(f"Habit {habit_id}: stored {stored}, expected {expected}"))
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} habit(s) have stale stats.")
+        self.stdout.write(self.style.SUCCESS("All habit stats match their entries."))
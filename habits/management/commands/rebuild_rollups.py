@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from habits.rollups import rebuild_rollups, verify_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the weekly and monthly EntryRollup rows from MoodEntry and verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habit", type=int, action="append", dest="habits",
+                            help="Only this habit id (repeatable, default: all habits)")
+        parser.add_argument("--verify-only", action="store_true",
+                            help="Report mismatches without rebuilding")
+
+    def handle(self, *args, **options):
+        habit_ids = options["habits"]
+
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rebuilt = rebuild_rollups(habit_ids)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} rollup row(s)."))
+
+        mismatches = verify_rollups(habit_ids)
+        for habit_id, (period, start), stored, expected in mismatches[:20]:
+            self.stderr.write(self.style.ERROR(
+                f"Habit {habit_id} {period} of {start}: stored {stored}, expected {expected}"
+            ))
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} rollup bucket(s) are stale.")
+        self.stdout.write(self.style.SUCCESS("All rollups match their entries."))
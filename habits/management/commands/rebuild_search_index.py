@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from habits import search
+
+
+class Command(BaseCommand):
+    help = "Reinstall the note search triggers and rebuild the full-text index from MoodEntry."
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            raise CommandError(f"Full-text search needs SQLite FTS5 (database is {connection.vendor}).")
+
+        search.rebuild()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {search.FTS_TABLE}")
+            indexed = cursor.fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({indexed} entries)."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from habits.streaks import rebuild_streaks, verify_streaks
+
+
+class Command(BaseCommand):
+    help = "Recount the logging and yoga streaks on HabitStats from MoodEntry and verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habit", type=int, action="append", dest="habits",
+                            help="Only this habit id (repeatable, default: all habits)")
+        parser.add_argument("--verify-only", action="store_true",
+                            help="Report mismatches without rebuilding")
+
+    def handle(self, *args, **options):
+        habit_ids = options["habits"]
+
+        if not options["verify_only"]:
+            with transaction.atomic():
+                rebuilt = rebuild_streaks(habit_ids)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt streaks for {rebuilt} habit(s)."))
+
+        mismatches = verify_streaks(habit_ids)
+        for habit_id, stored, expected in mismatches[:20]:
+            self.stderr.write(self.style.ERROR(f"Habit {habit_id}: stored {stored}, expected {expected}"))
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} habit(s) have stale streaks.")
+        self.stdout.write(self.style.SUCCESS("All streaks match their entries."))
@@ -1,11 +1,18 @@
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, timedelta
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
 
 from habits.models import MoodEntry, Action
+from habits.resolvers import DEFAULT_HABIT_NAME
+from habits.search import deferred_indexing
+from habits.writes import record_bulk_write
 
 
 User = get_user_model()
@@ -14,125 +21,244 @@ User = get_user_model()
 SLEEP_CHOICES = [1, 2, 3, 4, 5, 6]  # 4h-, 5h, 6h, 7h, 8h, 9h+
 MOOD_CHOICES = [1, 2, 3, 4, 5]      # 😞 😐 🙂 😄 🤩
 
+# Column order of the tuples built by generate_entries()
+INSERT_COLUMNS = ("habit_id", "date", "mood", "yoga", "sleep_duration", "note")
+
+# Users are seeded in chunks: one existing-dates query, one set of
+# bulk inserts and one totals/rollups rebuild per chunk.
+USERS_PER_CHUNK = 50
+
 
 def clamp(n, low, high):
     return max(low, min(high, n))
 
 
+def generate_entries(job):
+    """Mock entries for one habit, as (habit_id, date, mood, yoga, sleep, note) tuples.
+
+    `job` is (habit_id, seed_key, start_date, days, existing_dates). It is a
+    plain function of its arguments so it can run in a worker process, and
+    the same seed key always produces the same entries.
+    """
+    habit_id, seed_key, start_date, days, existing_dates = job
+    rng = random.Random(seed_key)
+
+    # Optional: add a very simple repeating "cycle" effect (~28 days)
+    # This is NOT medical accuracy—just a realistic-looking pattern for mock data.
+    cycle_length = 28
+    cycle_low_mood_days = set(range(0, 3))  # first 3 days of cycle slightly lower mood
+
+    rows = []
+    for i in range(days):
+        d = start_date + timedelta(days=i)
+
+        # Skip if already exists
+        if d in existing_dates:
+            continue
+
+        weekday = d.weekday()  # 0=Mon ... 6=Sun
+        is_weekend = weekday >= 5
+
+        # Yoga probability: more likely on weekends
+        yoga = rng.random() < (0.45 if is_weekend else 0.25)
+
+        # Sleep duration: a bit higher on weekends
+        sleep = rng.choices(
+            population=SLEEP_CHOICES,
+            weights=[5, 12, 20, 25, 22, 16] if not is_weekend else [3, 8, 15, 25, 28, 21],
+            k=1
+        )[0]
+
+        # Base mood around neutral
+        mood = rng.choices(
+            population=MOOD_CHOICES,
+            weights=[8, 18, 34, 26, 14],
+            k=1
+        )[0]
+
+        # Correlate mood with sleep and yoga a bit (makes it look realistic)
+        if sleep >= 5:  # 8h or 9h+
+            mood += 1
+        elif sleep <= 2:  # 4h- or 5h
+            mood -= 1
+
+        if yoga:
+            mood += 1
+
+        # Add small weekly pattern (Mondays slightly harder)
+        if weekday == 0:
+            mood -= 1
+
+        # Add simple cycle pattern
+        cycle_day = i % cycle_length
+        if cycle_day in cycle_low_mood_days:
+            mood -= 1
+
+        mood = clamp(mood, 1, 5)
+
+        # Optional notes (keep light so it’s not repetitive)
+        note = ""
+        if yoga and mood >= 4:
+            note = "Good energy today. Yoga helped."
+        elif mood <= 2 and sleep <= 2:
+            note = "Low energy day. Sleep was short."
+        elif mood >= 4 and sleep >= 4:
+            note = "Felt productive and calm."
+        elif weekday == 0 and mood <= 3:
+            note = "Monday reset. Taking it step by step."
+
+        rows.append((habit_id, d.isoformat(), mood, yoga, sleep, note))
+    return rows
+
+
+def insert_entries(rows, batch_size):
+    """Insert entry tuples with one prepared INSERT, `batch_size` rows per executemany().
+
+    bulk_create() compiles SQL for every value and SQLite caps each statement
+    at a few hundred rows, which tops out around 20k rows/s; reusing a single
+    statement keeps the database, not the ORM, as the bottleneck. Wrap it
+    in deferred_indexing() so the search index is filled in one pass too.
+    """
+    qn = connection.ops.quote_name
+    sql = (
+        f"INSERT INTO {qn(MoodEntry._meta.db_table)} "
+        f"({', '.join(qn(column) for column in INSERT_COLUMNS)}, {qn('updated_at')}) "
+        f"VALUES ({', '.join(['%s'] * (len(INSERT_COLUMNS) + 1))})"
+    )
+    # Stored exactly as the ORM stores updated_at (SQL's CURRENT_TIMESTAMP has
+    # no microseconds), so the sync cursor orders seeded and app-written rows alike
+    updated_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    inserted = 0
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), batch_size):
+            batch = [(*row, updated_at) for row in rows[offset:offset + batch_size]]
+            cursor.executemany(sql, batch)
+            inserted += len(batch)
+    return inserted
+
+
 class Command(BaseCommand):
-    help = "Seed mock MoodEntry data for the last N days for a given user."
+    help = "Seed mock MoodEntry data for the last N days for one user or many synthetic users."
 
     def add_arguments(self, parser):
-        parser.add_argument("--username", type=str, required=True, help="Username to seed data for")
+        parser.add_argument("--username", type=str, help="Existing user to seed data for")
+        parser.add_argument("--users", type=int, default=0,
+                            help="Create (or reuse) this many synthetic users and seed each of them")
+        parser.add_argument("--user-prefix", type=str, default="seed",
+                            help="Username prefix for --users (default: seed -> seed00000, seed00001, ...)")
+        parser.add_argument("--password", type=str, default=None,
+                            help="Password for new synthetic users (default: unusable)")
         parser.add_argument("--days", type=int, default=90, help="How many days back (default: 90)")
         parser.add_argument("--overwrite", action="store_true", help="Delete existing entries in range first")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per executemany() batch (default: 5000)")
+        parser.add_argument("--workers", type=int, default=0,
+                            help="Generate entries in this many processes (default: 0, in-process)")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
 
-    @transaction.atomic
     def handle(self, *args, **options):
         username = options["username"]
+        user_count = options["users"]
         days = options["days"]
-        overwrite = options["overwrite"]
+        workers = options["workers"]
 
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            self.stderr.write(self.style.ERROR(f"User '{username}' not found. Create it first."))
-            return
-
-        # Get or create the default habit for this user
-        
-        , created = Action.objects.get_or_create(
-            user=user,
-            name="Daily Mood"
-        )
-        if created:
-            self.stdout.write(self.style.SUCCESS(f"Created 'Daily Mood' habit for user '{username}'"))
+        if bool(username) == bool(user_count):
+            raise CommandError("Pass exactly one of --username or --users.")
+
+        if username:
+            try:
+                users = [User.objects.get(username=username)]
+            except User.DoesNotExist:
+                self.stderr.write(self.style.ERROR(f"User '{username}' not found. Create it first."))
+                return
+        else:
+            users = self.synthetic_users(options["user_prefix"], user_count, options["password"])
 
         end_date = date.today()
         start_date = end_date - timedelta(days=days - 1)
-
-        if overwrite:
-            deleted, _ = MoodEntry.objects.filter(habit=habit, date__range=(start_date, end_date)).delete()
-            self.stdout.write(self.style.WARNING(f"Deleted {deleted} existing entries in range."))
+        seed = options["seed"] if options["seed"] is not None else random.randrange(2 ** 32)
 
         created_count = 0
         skipped_count = 0
+        started = time.perf_counter()
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+        try:
+            for offset in range(0, len(users), USERS_PER_CHUNK):
+                created, skipped = self.seed_chunk(
+                    users[offset:offset + USERS_PER_CHUNK], start_date, days, seed, options, pool
+                )
+                created_count += created
+                skipped_count += skipped
+        finally:
+            if pool:
+                pool.shutdown()
+        elapsed = time.perf_counter() - started
 
-        # Optional: add a very simple repeating "cycle" effect (~28 days)
-        # This is NOT medical accuracy—just a realistic-looking pattern for mock data.
-        cycle_length = 28
-        cycle_low_mood_days = set(range(0, 3))  # first 3 days of cycle slightly lower mood
-
-        for i in range(days):
-            d = start_date + timedelta(days=i)
-
-            # Skip if already exists
-            if MoodEntry.objects.filter(habit=habit, date=d).exists():
-                skipped_count += 1
-                continue
-
-            weekday = d.weekday()  # 0=Mon ... 6=Sun
-            is_weekend = weekday >= 5
-
-            # Yoga probability: more likely on weekends
-            yoga = random.random() < (0.45 if is_weekend else 0.25)
-
-            # Sleep duration: a bit higher on weekends
-            sleep = random.choices(
-                population=SLEEP_CHOICES,
-                weights=[5, 12, 20, 25, 22, 16] if not is_weekend else [3, 8, 15, 25, 28, 21],
-                k=1
-            )[0]
-
-            # Base mood around neutral
-            mood = random.choices(
-                population=MOOD_CHOICES,
-                weights=[8, 18, 34, 26, 14],
-                k=1
-            )[0]
-
-            # Correlate mood with sleep and yoga a bit (makes it look realistic)
-            if sleep >= 5:  # 8h or 9h+
-                mood += 1
-            elif sleep <= 2:  # 4h- or 5h
-                mood -= 1
-
-            if yoga:
-                mood += 1
-
-            # Add small weekly pattern (Mondays slightly harder)
-            if weekday == 0:
-                mood -= 1
-
-            # Add simple cycle pattern
-            cycle_day = i % cycle_length
-            if cycle_day in cycle_low_mood_days:
-                mood -= 1
-
-            mood = clamp(mood, 1, 5)
-
-            # Optional notes (keep light so it’s not repetitive)
-            note = ""
-            if yoga and mood >= 4:
-                note = "Good energy today. Yoga helped."
-            elif mood <= 2 and sleep <= 2:
-                note = "Low energy day. Sleep was short."
-            elif mood >= 4 and sleep >= 4:
-                note = "Felt productive and calm."
-            elif weekday == 0 and mood <= 3:
-                note = "Monday reset. Taking it step by step."
-
-            MoodEntry.objects.create(
-                habit=habit,
-                date=d,
-                mood=mood,
-                yoga=yoga,
-                sleep_duration=sleep,
-                note=note,
-            )
-            created_count += 1
-
+        who = f"'{username}'" if username else f"{len(users)} users"
         self.stdout.write(self.style.SUCCESS(
-            f"Seeding complete for '{username}'. Created: {created_count}, Skipped: {skipped_count} "
-            f"({start_date} → {end_date})"
+            f"Seeding complete for {who}. Created: {created_count}, Skipped: {skipped_count} "
+            f"({start_date} → {end_date}) in {elapsed:.1f}s "
+            f"({created_count / elapsed if elapsed else 0:,.0f} entries/s, seed {seed})"
         ))
+
+    def synthetic_users(self, prefix, count, password):
+        """Fetch or bulk create users prefix00000 .. prefix{count-1}, in username order."""
+        usernames = [f"{prefix}{i:05d}" for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+        # Hash once: every synthetic user shares the same password
+        password_hash = make_password(password)
+        User.objects.bulk_create(
+            [User(username=name, first_name=name, password=password_hash) for name in usernames if name not in existing],
+            batch_size=1000,
+        )
+        if len(existing) < count:
+            self.stdout.write(self.style.SUCCESS(f"Created {count - len(existing)} user(s) with prefix '{prefix}'"))
+        return list(User.objects.filter(username__in=usernames).order_by("username"))
+
+    def seed_chunk(self, users, start_date, days, seed, options, pool):
+        end_date = start_date + timedelta(days=days - 1)
+
+        with transaction.atomic():
+            # Get or create the default habit for each user
+            habits = dict(
+                Action.objects.filter(user__in=users, name=DEFAULT_HABIT_NAME).values_list("user_id", "id")
+            )
+            missing = [Action(user=user, name=DEFAULT_HABIT_NAME) for user in users if user.id not in habits]
+            if missing:
+                Action.objects.bulk_create(missing)
+                habits = dict(
+                    Action.objects.filter(user__in=users, name=DEFAULT_HABIT_NAME).values_list("user_id", "id")
+                )
+                if options["username"]:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Created '{DEFAULT_HABIT_NAME}' habit for user '{options['username']}'"
+                    ))
+            habit_ids = list(habits.values())
+
+            in_range = MoodEntry.objects.filter(habit_id__in=habit_ids, date__range=(start_date, end_date))
+            if options["overwrite"]:
+                # Row by row, so each deleted entry leaves its sync tombstone (habits.signals)
+                deleted, _ = in_range.delete()
+                self.stdout.write(self.style.WARNING(f"Deleted {deleted} existing entries in range."))
+
+            # Every existing date for the whole chunk in one query
+            existing = {habit_id: set() for habit_id in habit_ids}
+            if not options["overwrite"]:
+                for habit_id, day in in_range.values_list("habit_id", "date"):
+                    existing[habit_id].add(day)
+
+            jobs = [
+                (habits[user.id], f"{seed}:{user.username}", start_date, days, existing[habits[user.id]])
+                for user in users
+            ]
+            results = pool.map(generate_entries, jobs) if pool else map(generate_entries, jobs)
+
+            created_count = 0
+            with deferred_indexing():
+                for rows in results:
+                    created_count += insert_entries(rows, options["batch_size"])
+
+            # Bring the habits' totals and rollups back in step with their entries
+            record_bulk_write(habit_ids)
+
+        skipped_count = sum(len(dates) for dates in existing.values())
+        return created_count, skipped_count
@@ -0,0 +1,131 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.utils import get_random_secret_key
+from django.urls import reverse
+
+
+# Runs in a fresh interpreter: time `import config.wsgi` (Django setup plus
+# any warm-up), then the first and second request through the application
+WORKER_SCRIPT = """
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+import config.wsgi
+imported = time.perf_counter()
+
+def get(path):
+    environ = {"PATH_INFO": path}
+    setup_testing_defaults(environ)
+    statuses = []
+    started = time.perf_counter()
+    body = b"".join(config.wsgi.application(environ, lambda status, headers: statuses.append(status)))
+    return (time.perf_counter() - started) * 1000, int(statuses[0].split()[0]), len(body)
+
+first_ms, status, size = get(sys.argv[1])
+second_ms, _, _ = get(sys.argv[1])
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_ms": first_ms,
+    "second_ms": second_ms,
+    "status": status,
+    "bytes": size,
+}))
+"""
+
+
+def parse_importtime(stderr, top):
+    """The `top` slowest modules by self time from `python -X importtime` output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us) / 1000, int(cumulative_us) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+class Command(BaseCommand):
+    help = "Measure a fresh worker's `import config.wsgi` time and time to first response, per settings module."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--settings-modules", type=str, default="config.settings,config.production",
+                            help="Comma separated settings modules to compare (default: config.settings,config.production)")
+        parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per settings module (default: 5)")
+        parser.add_argument("--path", type=str, default="",
+                            help="Path requested (default: the login page, which needs no session or database)")
+        parser.add_argument("--top", type=int, default=0,
+                            help="Also list the N slowest imports of config.wsgi (from python -X importtime)")
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1.")
+        path = options["path"] or reverse("login_view")
+
+        self.stdout.write(
+            f"{options['runs']} cold starts each, GET {path}\n"
+            f"{'settings':<20} {'import ms':>10} {'first ms':>9} {'second ms':>10} {'status':>7}"
+        )
+        for module in options["settings_modules"].split(","):
+            # Manifest storage (config.production) needs collected files to render any page
+            with tempfile.TemporaryDirectory() as static_root:
+                self.collect_static(module, static_root)
+                runs = [self.run_worker(module, path, static_root) for _ in range(options["runs"])]
+            failed = [run["status"] for run in runs if run["status"] != 200]
+            if failed:
+                raise CommandError(f"GET {path} with {module} returned {failed[0]}: timings would be of an error page.")
+            self.stdout.write(
+                f"{module:<20} {statistics.median(run['import_ms'] for run in runs):>10.1f} "
+                f"{statistics.median(run['first_ms'] for run in runs):>9.1f} "
+                f"{statistics.median(run['second_ms'] for run in runs):>10.1f} {runs[0]['status']:>7}"
+            )
+            if options["top"]:
+                for self_ms, cumulative_ms, name in self.slowest_imports(module, options["top"]):
+                    self.stdout.write(f"    {name:<40} {self_ms:>7.1f} ms self {cumulative_ms:>8.1f} ms total")
+
+        self.stdout.write(self.style.SUCCESS("Startup benchmark complete."))
+
+    def environment(self, module, static_root=None):
+        environment = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": module,
+            "DJANGO_SECRET_KEY": os.environ.get("DJANGO_SECRET_KEY") or get_random_secret_key(),
+            # setup_testing_defaults() requests 127.0.0.1
+            "DJANGO_ALLOWED_HOSTS": "127.0.0.1",
+        }
+        if static_root:
+            environment["DJANGO_STATIC_ROOT"] = static_root
+        return environment
+
+    def collect_static(self, module, static_root):
+        result = subprocess.run(
+            [sys.executable, "manage.py", "collectstatic", "--noinput", "--verbosity", "0"],
+            cwd=settings.BASE_DIR, env=self.environment(module, static_root), capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"collectstatic with {module} failed:\n{result.stderr}")
+
+    def run_worker(self, module, path, static_root):
+        result = subprocess.run(
+            [sys.executable, "-c", WORKER_SCRIPT, path],
+            cwd=settings.BASE_DIR, env=self.environment(module, static_root), capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Worker with {module} failed:\n{result.stderr}")
+        return json.loads(result.stdout.splitlines()[-1])
+
+    def slowest_imports(self, module, top):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import config.wsgi"],
+            cwd=settings.BASE_DIR, env=self.environment(module), capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Importing config.wsgi with {module} failed:\n{result.stderr}")
+        return parse_importtime(result.stderr, top)
@@ -0,0 +1,173 @@
+"""Per-request timings: a Server-Timing header and Prometheus histograms.
+
+metrics_middleware samples METRICS_SAMPLE_RATE of requests. For each
+sampled one it records the view, the SQL queries and the time spent in
+them, template rendering time and response size. The numbers go out as
+a Server-Timing header and into this process's histograms, which the
+/metrics view renders in the Prometheus text format. With several
+worker processes, each keeps and reports its own.
+
+Queries are counted by instrument_queries(), which habits.signals puts
+on every new connection, and templates are timed by
+TimedDjangoTemplates (settings.TEMPLATES). Both do nothing unless the
+request being served was sampled, so requests outside the sample only
+pay for a random() call and a context variable lookup.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+from django.utils.decorators import sync_and_async_middleware
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# The sampled request being served in this context (None when not sampled)
+_current = ContextVar("habits_request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+
+class Histogram:
+    """A Prometheus histogram with one `view` label, safe to observe from many threads."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, value):
+        with self._lock:
+            counts, total = self._series.get(view) or ([0] * (len(self.buckets) + 1), 0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[view] = (counts, total + value)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((view, list(counts), total) for view, (counts, total) in self._series.items())
+        for view, counts, total in series:
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{view}"}} {total:g}')
+            lines.append(f'{self.name}_count{{view="{view}"}} {cumulative}')
+        return "\n".join(lines)
+
+
+REQUEST_SECONDS = Histogram("habits_request_duration_seconds", "Time to respond, by view.", SECONDS_BUCKETS)
+DB_SECONDS = Histogram("habits_request_db_seconds", "Time spent in SQL queries per request.", SECONDS_BUCKETS)
+QUERIES = Histogram("habits_request_queries", "SQL queries per request.", QUERY_BUCKETS)
+TEMPLATE_SECONDS = Histogram("habits_template_render_seconds", "Template rendering time per request.", SECONDS_BUCKETS)
+RESPONSE_BYTES = Histogram("habits_response_bytes", "Response body size.", BYTES_BUCKETS)
+HISTOGRAMS = (REQUEST_SECONDS, DB_SECONDS, QUERIES, TEMPLATE_SECONDS, RESPONSE_BYTES)
+
+
+def instrument_queries(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing the sampled request's queries."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_seconds += time.perf_counter() - started
+        timings.queries += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing top-level renders (includes and parents are inside them)."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def record(request, response, timings):
+    """Add Server-Timing to a sampled request's response and fold its numbers into the histograms."""
+    elapsed = time.perf_counter() - timings.started
+    match = request.resolver_match
+    view = match.view_name if match else "unmatched"
+    size = None if response.streaming else len(response.content)
+
+    response.headers["Server-Timing"] = ", ".join([
+        f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.queries} queries"',
+        f"tpl;dur={timings.template_seconds * 1000:.1f}",
+        f"total;dur={elapsed * 1000:.1f}",
+    ])
+    REQUEST_SECONDS.observe(view, elapsed)
+    DB_SECONDS.observe(view, timings.db_seconds)
+    QUERIES.observe(view, timings.queries)
+    TEMPLATE_SECONDS.observe(view, timings.template_seconds)
+    if size is not None:
+        RESPONSE_BYTES.observe(view, size)
+
+
+def render_metrics():
+    """Every histogram in the Prometheus text exposition format."""
+    return "\n\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n"
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Time a METRICS_SAMPLE_RATE share of requests (see the module docstring)."""
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if random.random() >= settings.METRICS_SAMPLE_RATE:
+                return await get_response(request)
+            timings = RequestTimings()
+            token = _current.set(timings)
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            record(request, response, timings)
+            return response
+    else:
+        def middleware(request):
+            if random.random() >= settings.METRICS_SAMPLE_RATE:
+                return get_response(request)
+            timings = RequestTimings()
+            token = _current.set(timings)
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            record(request, response, timings)
+            return response
+    return middleware
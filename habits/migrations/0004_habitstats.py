@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0003_rename_habit_action_rename_habitentry_moodentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HabitStats',
+            fields=[
+                ('habit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='habits.action')),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('mood_sum', models.PositiveIntegerField(default=0)),
+                ('sleep_count', models.PositiveIntegerField(default=0)),
+                ('sleep_sum', models.PositiveIntegerField(default=0)),
+                ('yoga_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
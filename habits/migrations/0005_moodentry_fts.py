@@ -0,0 +1,25 @@
+# Full-text index over MoodEntry.note (SQLite FTS5; a no-op on other databases)
+
+from django.db import migrations
+
+from habits import search
+
+
+def create_fts(apps, schema_editor):
+    search.install(schema_editor.connection)
+    search.rebuild(schema_editor.connection)
+
+
+def drop_fts(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0004_habitstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0005_moodentry_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='moodentry',
+            index=models.Index(fields=['habit', '-date'], name='moodentry_habit_date_desc'),
+        ),
+        migrations.AddIndex(
+            model_name='moodentry',
+            index=models.Index(fields=['habit', 'date', 'mood', 'sleep_duration', 'yoga'], name='moodentry_habit_date_cover'),
+        ),
+    ]
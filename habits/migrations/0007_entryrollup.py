@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-18 20:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+
+def fill_rollups(apps, schema_editor):
+    """Aggregate the existing entries into week and month buckets."""
+    MoodEntry = apps.get_model('habits', 'MoodEntry')
+    EntryRollup = apps.get_model('habits', 'EntryRollup')
+    for period, trunc in (('week', TruncWeek), ('month', TruncMonth)):
+        rows = (
+            MoodEntry.objects.filter(habit__isnull=False)
+            .annotate(bucket=trunc('date'))
+            .values('habit_id', 'bucket')
+            .annotate(
+                entry_count=Count('id'),
+                mood_sum=Sum('mood'),
+                mood_min=Min('mood'),
+                mood_max=Max('mood'),
+                sleep_count=Count('sleep_duration'),
+                sleep_sum=Sum('sleep_duration', default=0),
+                yoga_count=Count('id', filter=Q(yoga=True)),
+            )
+            .order_by()
+        )
+        EntryRollup.objects.bulk_create(
+            (EntryRollup(period=period, start=row.pop('bucket'), **row) for row in rows.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0006_moodentry_habit_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('start', models.DateField()),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+                ('mood_sum', models.PositiveIntegerField(default=0)),
+                ('mood_min', models.PositiveSmallIntegerField(default=0)),
+                ('mood_max', models.PositiveSmallIntegerField(default=0)),
+                ('sleep_count', models.PositiveIntegerField(default=0)),
+                ('sleep_sum', models.PositiveIntegerField(default=0)),
+                ('yoga_count', models.PositiveIntegerField(default=0)),
+                ('habit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='habits.action')),
+            ],
+            options={
+                'unique_together': {('habit', 'period', 'start')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
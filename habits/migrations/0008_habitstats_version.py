@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0007_entryrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitstats',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+from habits import search
+
+
+def reinstall_fts_triggers(apps, schema_editor):
+    # SQLite adds the column by rebuilding the moodentry table, which drops its triggers
+    search.install(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0008_habitstats_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='action',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='moodentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(reinstall_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 22:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_id', models.PositiveBigIntegerField()),
+                ('date', models.DateField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='moodentry',
+            index=models.Index(fields=['habit', 'updated_at', 'id'], name='moodentry_habit_updated'),
+        ),
+        migrations.AddField(
+            model_name='deletedentry',
+            name='habit',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deleted_entries', to='habits.action'),
+        ),
+        migrations.AddIndex(
+            model_name='deletedentry',
+            index=models.Index(fields=['habit', 'deleted_at', 'id'], name='deletedentry_habit_deleted'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 6.0 on 2026-10-18 21:28
+
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import migrations, models
+
+
+def count_streaks(days):
+    run, end, best = 0, None, 0
+    for day in days:
+        run = run + 1 if end is not None and day == end + timedelta(days=1) else 1
+        end = day
+        best = max(best, run)
+    return run, end, best
+
+
+def fill_streaks(apps, schema_editor):
+    """Count the logging and yoga streaks of the existing entries."""
+    MoodEntry = apps.get_model('habits', 'MoodEntry')
+    HabitStats = apps.get_model('habits', 'HabitStats')
+    fields = ['log_streak', 'log_streak_end', 'log_streak_best', 'yoga_streak', 'yoga_streak_end', 'yoga_streak_best']
+    stored = set(HabitStats.objects.values_list('habit_id', flat=True))
+    rows = (
+        MoodEntry.objects.filter(habit__isnull=False)
+        .order_by('habit_id', 'date')
+        .values_list('habit_id', 'date', 'yoga')
+        .iterator(chunk_size=5000)
+    )
+    updated = []
+    for habit_id, days in groupby(rows, key=lambda row: row[0]):
+        if habit_id not in stored:
+            continue
+        days = list(days)
+        streaks = (*count_streaks(day for _, day, _ in days), *count_streaks(day for _, day, yoga in days if yoga))
+        updated.append(HabitStats(habit_id=habit_id, **dict(zip(fields, streaks))))
+    HabitStats.objects.bulk_update(updated, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0010_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitstats',
+            name='log_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='log_streak_best',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='log_streak_end',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='yoga_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='yoga_streak_best',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='yoga_streak_end',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-18 22:10
+
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import migrations, models
+
+
+def count_best_runs(days):
+    run, end, best, best_runs = 0, None, 0, 0
+    for day in days:
+        run = run + 1 if end is not None and day == end + timedelta(days=1) else 1
+        end = day
+        if run > best:
+            best, best_runs = run, 1
+        elif run == best:
+            best_runs += 1
+    return best_runs
+
+
+def fill_best_runs(apps, schema_editor):
+    """Count how many runs of the existing entries are as long as the best one."""
+    MoodEntry = apps.get_model('habits', 'MoodEntry')
+    HabitStats = apps.get_model('habits', 'HabitStats')
+    fields = ['log_streak_best_runs', 'yoga_streak_best_runs']
+    stored = set(HabitStats.objects.values_list('habit_id', flat=True))
+    rows = (
+        MoodEntry.objects.filter(habit__isnull=False)
+        .order_by('habit_id', 'date')
+        .values_list('habit_id', 'date', 'yoga')
+        .iterator(chunk_size=5000)
+    )
+    updated = []
+    for habit_id, days in groupby(rows, key=lambda row: row[0]):
+        if habit_id not in stored:
+            continue
+        days = list(days)
+        counts = (count_best_runs(day for _, day, _ in days), count_best_runs(day for _, day, yoga in days if yoga))
+        updated.append(HabitStats(habit_id=habit_id, **dict(zip(fields, counts))))
+    HabitStats.objects.bulk_update(updated, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habits', '0011_habitstats_streaks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitstats',
+            name='log_streak_best_runs',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='habitstats',
+            name='yoga_streak_best_runs',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_best_runs, migrations.RunPython.noop),
+    ]
@@ -24,6 +24,7 @@ class Action(models.Model):
     name = models.CharField(max_length=100) 
     # for future use incase I want to add more activities rather than mood
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("user", "name")
@@ -50,9 +51,106 @@ class MoodEntry(models.Model):
     # notes
     note = models.TextField(blank=True)
 
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("habit", "date")
+        indexes = [
+            # newest-first listings (entries page, recent chart points)
+            models.Index(fields=["habit", "-date"], name="moodentry_habit_date_desc"),
+            # stats and range reads answered from the index alone
+            models.Index(fields=["habit", "date", "mood", "sleep_duration", "yoga"], name="moodentry_habit_date_cover"),
+            # delta sync: changes since a cursor, in order
+            models.Index(fields=["habit", "updated_at", "id"], name="moodentry_habit_updated"),
+        ]
 
     def __str__(self):
         return f"{self.habit.name} @ {self.date}"
+
+
+class DeletedEntry(models.Model):
+    """Tombstone of a deleted MoodEntry, so delta sync can tell clients to drop it."""
+    habit = models.ForeignKey(Action, on_delete=models.CASCADE, related_name="deleted_entries")
+    entry_id = models.PositiveBigIntegerField()
+    date = models.DateField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["habit", "deleted_at", "id"], name="deletedentry_habit_deleted"),
+        ]
+
+    def __str__(self):
+        return f"{self.habit} entry {self.entry_id} @ {self.date} (deleted)"
+
+
+class HabitStats(models.Model):
+    """Running totals for one habit, updated on every entry write."""
+    habit = models.OneToOneField(Action, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    entry_count = models.PositiveIntegerField(default=0)
+    mood_sum = models.PositiveIntegerField(default=0)
+    # sleep is optional, so it keeps its own count for the average
+    sleep_count = models.PositiveIntegerField(default=0)
+    sleep_sum = models.PositiveIntegerField(default=0)
+    yoga_count = models.PositiveIntegerField(default=0)
+    # bumped on every write to the habit's entries; keys caches of derived data
+    version = models.PositiveIntegerField(default=0)
+    # when the entries last changed (set with version); the pages' Last-Modified
+    updated_at = models.DateTimeField(auto_now=True)
+    # streaks of consecutive days, for any entry and for yoga (see habits/streaks.py):
+    # the run ending on the latest such day, that day, the longest run and how many runs are that long
+    log_streak = models.PositiveIntegerField(default=0)
+    log_streak_end = models.DateField(null=True, blank=True)
+    log_streak_best = models.PositiveIntegerField(default=0)
+    log_streak_best_runs = models.PositiveIntegerField(default=0)
+    yoga_streak = models.PositiveIntegerField(default=0)
+    yoga_streak_end = models.DateField(null=True, blank=True)
+    yoga_streak_best = models.PositiveIntegerField(default=0)
+    yoga_streak_best_runs = models.PositiveIntegerField(default=0)
+
+    @property
+    def avg_mood(self):
+        return self.mood_sum / self.entry_count if self.entry_count else 0
+
+    @property
+    def avg_sleep(self):
+        return self.sleep_sum / self.sleep_count if self.sleep_count else 0
+
+    def __str__(self):
+        return f"{self.habit} stats ({self.entry_count} entries)"
+
+
+class EntryRollup(models.Model):
+    """Totals of one habit's entries over a week (Monday start) or a calendar month."""
+    WEEK = "week"
+    MONTH = "month"
+    PERIOD_CHOICES = [
+        (WEEK, "Week"),
+        (MONTH, "Month"),
+    ]
+
+    habit = models.ForeignKey(Action, on_delete=models.CASCADE, related_name="rollups")
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    # first day of the bucket: a Monday, or the 1st of the month
+    start = models.DateField()
+    entry_count = models.PositiveIntegerField(default=0)
+    mood_sum = models.PositiveIntegerField(default=0)
+    mood_min = models.PositiveSmallIntegerField(default=0)
+    mood_max = models.PositiveSmallIntegerField(default=0)
+    sleep_count = models.PositiveIntegerField(default=0)
+    sleep_sum = models.PositiveIntegerField(default=0)
+    yoga_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("habit", "period", "start")
+
+    @property
+    def avg_mood(self):
+        return self.mood_sum / self.entry_count if self.entry_count else 0
+
+    @property
+    def avg_sleep(self):
+        return self.sleep_sum / self.sleep_count if self.sleep_count else 0
+
+    def __str__(self):
+        return f"{self.habit} {self.period} of {self.start} ({self.entry_count} entries)"
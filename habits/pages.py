@@ -0,0 +1,85 @@
+"""What a read view's response depends on, for HTTP validators and the page cache.
+
+A UserPage is one user's view (`name` plus its parameters) of a habit's
+data. Every write bumps the habit's HabitStats.version and updated_at,
+so both the ETag / Last-Modified validators and the per-user page cache
+key come from that one row: no entry is loaded to tell whether a page
+changed, and a stale page is never looked up again (it just expires).
+
+The CSRF secret the page was rendered with is part of its identity, as
+the entries page embeds a token that only matches that cookie. Pages
+shown while flash messages are pending get no validators and are
+neither served from nor stored in the cache.
+"""
+import hashlib
+from collections import Counter
+
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+PAGE_CACHE_ALIAS = "pages"
+
+# Process-wide hit/miss/bypass counts, read by the bench command
+page_cache_counts = Counter()
+
+
+class UserPage:
+    """One view of a habit, e.g. UserPage(request, "history", habit_stats, year=2026, month=5)."""
+
+    def __init__(self, request, name, habit_stats, **params):
+        self.request = request
+        self.name = name
+        self.habit_stats = habit_stats
+        self.params = params
+        self.cacheable = request.method in ("GET", "HEAD") and not len(messages.get_messages(request))
+
+    def fingerprint(self):
+        # Read when called: rendering may have just issued the CSRF secret
+        csrf_secret = self.request.META.get("CSRF_COOKIE", "")
+        identity = (
+            self.name, self.request.user.pk, self.habit_stats.habit_id, self.habit_stats.version,
+            sorted(self.params.items()), csrf_secret,
+        )
+        return hashlib.sha256(repr(identity).encode()).hexdigest()[:32]
+
+    def etag(self):
+        return f'"{self.fingerprint()}"'
+
+    def last_modified(self):
+        return int(self.habit_stats.updated_at.timestamp())
+
+    def not_modified(self):
+        """A 304 (or 412) response when the client's copy is current, else None."""
+        if not self.cacheable:
+            return None
+        response = get_conditional_response(self.request, etag=self.etag(), last_modified=self.last_modified())
+        return None if response is None else self.add_validators(response)
+
+    def add_validators(self, response):
+        """Set ETag and Last-Modified, and make browsers revalidate rather than reuse the page unasked."""
+        if self.cacheable and response.status_code in (200, 304):
+            response.headers.setdefault("ETag", self.etag())
+            response.headers.setdefault("Last-Modified", http_date(self.last_modified()))
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def cache_key(self):
+        return f"habits:page:{self.name}:{self.fingerprint()}"
+
+    async def aget_cached(self):
+        """The cached response, or None."""
+        if not self.cacheable:
+            page_cache_counts["bypass"] += 1
+            return None
+        content = await caches[PAGE_CACHE_ALIAS].aget(self.cache_key())
+        page_cache_counts["miss" if content is None else "hit"] += 1
+        return None if content is None else self.add_validators(HttpResponse(content))
+
+    async def acache(self, response):
+        """Store a freshly rendered response and add its validators."""
+        if self.cacheable and response.status_code == 200:
+            await caches[PAGE_CACHE_ALIAS].aset(self.cache_key(), response.content)
+        return self.add_validators(response)
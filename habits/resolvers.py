@@ -0,0 +1,142 @@
+"""Resolve a user's default ("Daily Mood") habit without a query on every request.
+
+The habit id is cached per process in a bounded LRU and, so other
+workers can reuse it, in the user's session. Both copies expire after
+DEFAULT_HABIT_TTL seconds; deleting a habit or a user drops the
+in-process copy straight away (see habits.signals). Other sessions can
+still hold a deleted habit's id until it expires, so the write path
+(`create=True`) never trusts the session copy. Other processes' copies
+outlive the habit too: writes go through with_default_habit(), which
+resolves the id again when a write fails because the habit is gone,
+and reads through get_default_habit_stats(), which does the same when
+the habit's stats row is missing and the habit with it.
+"""
+import time
+
+from django.db import IntegrityError
+
+from .caching import LRUCache
+from .models import Action
+from .stats import aget_habit_stats, get_habit_stats
+
+DEFAULT_HABIT_NAME = "Daily Mood"
+DEFAULT_HABIT_TTL = 300
+SESSION_KEY = "_default_habit"
+
+_habit_ids = LRUCache(maxsize=4096, ttl=DEFAULT_HABIT_TTL)
+
+
+def get_default_habit_id(request, create=False):
+    """Id of the user's default habit, or None if it does not exist (unless `create`)."""
+    user_id = request.user.pk
+    habit_id = _habit_ids.get(user_id)
+    if habit_id is not None:
+        return habit_id
+
+    cached = None if create else request.session.get(SESSION_KEY)
+    if cached and cached[1] > time.time():
+        habit_id = cached[0]
+    else:
+        if create:
+            habit, _ = Action.objects.get_or_create(user=request.user, name=DEFAULT_HABIT_NAME)
+            habit_id = habit.id
+        else:
+            habit_id = Action.objects.filter(
+                user=request.user, name=DEFAULT_HABIT_NAME
+            ).values_list("id", flat=True).first()
+            if habit_id is None:
+                return None
+        request.session[SESSION_KEY] = [habit_id, time.time() + DEFAULT_HABIT_TTL]
+
+    _habit_ids.set(user_id, habit_id)
+    return habit_id
+
+
+async def aget_default_habit_id(request, create=False):
+    """Async get_default_habit_id(), for async views: session and ORM access without blocking the loop."""
+    user = await request.auser()
+    habit_id = _habit_ids.get(user.pk)
+    if habit_id is not None:
+        return habit_id
+
+    cached = None if create else await request.session.aget(SESSION_KEY)
+    if cached and cached[1] > time.time():
+        habit_id = cached[0]
+    else:
+        if create:
+            habit, _ = await Action.objects.aget_or_create(user=user, name=DEFAULT_HABIT_NAME)
+            habit_id = habit.id
+        else:
+            habit_id = await Action.objects.filter(
+                user=user, name=DEFAULT_HABIT_NAME
+            ).values_list("id", flat=True).afirst()
+            if habit_id is None:
+                return None
+        await request.session.aset(SESSION_KEY, [habit_id, time.time() + DEFAULT_HABIT_TTL])
+
+    _habit_ids.set(user.pk, habit_id)
+    return habit_id
+
+
+def with_default_habit(request, func):
+    """func(habit_id) for the user's default habit, created if needed; returns its result.
+
+    The cached id can name a habit another process deleted (habits.signals
+    only clears the copy of the process that deleted it), and a write
+    with it fails on the foreign key. If that habit is indeed gone,
+    forget the id and call `func` once more with a freshly resolved one.
+    """
+    habit_id = get_default_habit_id(request, create=True)
+    try:
+        return func(habit_id)
+    except IntegrityError:
+        if Action.objects.filter(pk=habit_id).exists():
+            raise
+    forget_default_habit(request.user.pk)
+    return func(get_default_habit_id(request, create=True))
+
+
+async def awith_default_habit(request, func):
+    """Async with_default_habit(), for a coroutine function `func`."""
+    habit_id = await aget_default_habit_id(request, create=True)
+    try:
+        return await func(habit_id)
+    except IntegrityError:
+        if await Action.objects.filter(pk=habit_id).aexists():
+            raise
+    forget_default_habit((await request.auser()).pk)
+    return await func(await aget_default_habit_id(request, create=True))
+
+
+def get_default_habit_stats(request):
+    """(habit_id, HabitStats) of the user's default habit, or (None, None) if there is none.
+
+    A stale cached id (see with_default_habit()) has no stats row, and
+    get_habit_stats() builds none for it: drop both cached copies and
+    resolve the id once more.
+    """
+    habit_id = get_default_habit_id(request)
+    habit_stats = get_habit_stats(habit_id) if habit_id else None
+    if habit_id and habit_stats is None:
+        forget_default_habit(request.user.pk)
+        request.session.pop(SESSION_KEY, None)
+        habit_id = get_default_habit_id(request)
+        habit_stats = get_habit_stats(habit_id) if habit_id else None
+    return (habit_id, habit_stats) if habit_stats else (None, None)
+
+
+async def aget_default_habit_stats(request):
+    """Async get_default_habit_stats(), for async views."""
+    habit_id = await aget_default_habit_id(request)
+    habit_stats = await aget_habit_stats(habit_id) if habit_id else None
+    if habit_id and habit_stats is None:
+        forget_default_habit((await request.auser()).pk)
+        await request.session.apop(SESSION_KEY, None)
+        habit_id = await aget_default_habit_id(request)
+        habit_stats = await aget_habit_stats(habit_id) if habit_id else None
+    return (habit_id, habit_stats) if habit_stats else (None, None)
+
+
+def forget_default_habit(user_id):
+    """Drop this process's cached habit id for a user."""
+    _habit_ids.delete(user_id)
@@ -0,0 +1,199 @@
+"""Weekly and monthly totals per habit (EntryRollup), kept in step with MoodEntry writes.
+
+A write only touches the two buckets holding its date. Both are
+re-aggregated from their own entries (at most 31 rows, read from the
+covering index) in one query, which keeps min/max mood exact without
+any extra bookkeeping.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import Action, EntryRollup, MoodEntry
+
+ROLLUP_FIELDS = ("entry_count", "mood_sum", "mood_min", "mood_max", "sleep_count", "sleep_sum", "yoga_count")
+PERIOD_TRUNCS = {EntryRollup.WEEK: TruncWeek, EntryRollup.MONTH: TruncMonth}
+DEFAULT_SUMMARY_WEEKS = 12
+MAX_SUMMARY_WEEKS = 260
+
+
+def bucket_start(day, period):
+    """First day of the week (Monday) or month holding `day`."""
+    if period == EntryRollup.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def bucket_end(start, period):
+    """Last day of the bucket beginning on `start`."""
+    if period == EntryRollup.WEEK:
+        return start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def _aggregates(prefix="", **filter_kwargs):
+    entry_filter = Q(**filter_kwargs) if filter_kwargs else None
+    return {
+        f"{prefix}entry_count": Count("id", filter=entry_filter),
+        f"{prefix}mood_sum": Sum("mood", filter=entry_filter, default=0),
+        f"{prefix}mood_min": Min("mood", filter=entry_filter, default=0),
+        f"{prefix}mood_max": Max("mood", filter=entry_filter, default=0),
+        f"{prefix}sleep_count": Count("sleep_duration", filter=entry_filter),
+        f"{prefix}sleep_sum": Sum("sleep_duration", filter=entry_filter, default=0),
+        f"{prefix}yoga_count": Count("id", filter=(entry_filter or Q()) & Q(yoga=True)),
+    }
+
+
+def _save(habit_id, totals):
+    """Upsert the non-empty buckets in `totals` ({(period, start): fields}) and drop the empty ones."""
+    rows = [
+        EntryRollup(habit_id=habit_id, period=period, start=start, **fields)
+        for (period, start), fields in totals.items()
+        if fields["entry_count"]
+    ]
+    if rows:
+        EntryRollup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["habit", "period", "start"],
+            update_fields=ROLLUP_FIELDS,
+        )
+    empty = Q()
+    for (period, start), fields in totals.items():
+        if not fields["entry_count"]:
+            empty |= Q(period=period, start=start)
+    if empty:
+        EntryRollup.objects.filter(empty, habit_id=habit_id).delete()
+
+
+def refresh_rollups(habit_id, dates):
+    """Re-aggregate the week and month buckets holding `dates` for one habit.
+
+    Call inside the transaction that wrote the entries.
+    """
+    buckets = {(period, bucket_start(day, period)) for day in dates for period in PERIOD_TRUNCS}
+    if not buckets:
+        return
+    aggregates = {}
+    window = Q()
+    for index, (period, start) in enumerate(sorted(buckets)):
+        end = bucket_end(start, period)
+        aggregates.update(_aggregates(f"b{index}_", date__range=(start, end)))
+        window |= Q(date__range=(start, end))
+    result = MoodEntry.objects.filter(window, habit_id=habit_id).aggregate(**aggregates)
+    _save(habit_id, {
+        bucket: {field: result[f"b{index}_{field}"] for field in ROLLUP_FIELDS}
+        for index, bucket in enumerate(sorted(buckets))
+    })
+
+
+def compute_rollups(habit_ids):
+    """Every week and month bucket of the given habits, as {habit_id: {(period, start): fields}}."""
+    totals = {habit_id: {} for habit_id in habit_ids}
+    for period, trunc in PERIOD_TRUNCS.items():
+        rows = (
+            MoodEntry.objects.filter(habit_id__in=habit_ids)
+            .annotate(bucket=trunc("date"))
+            .values("habit_id", "bucket")
+            .annotate(**_aggregates())
+            .order_by()
+        )
+        for row in rows:
+            totals[row.pop("habit_id")][(period, row.pop("bucket"))] = row
+    return totals
+
+
+def rebuild_rollups(habit_ids=None, batch_size=500):
+    """Rebuild every rollup row of the given habits (default: all). Returns the number of rows written."""
+    if habit_ids is None:
+        habit_ids = list(Action.objects.values_list("id", flat=True))
+    written = 0
+    for offset in range(0, len(habit_ids), batch_size):
+        batch = habit_ids[offset:offset + batch_size]
+        totals = compute_rollups(batch)
+        EntryRollup.objects.filter(habit_id__in=batch).delete()
+        rows = [
+            EntryRollup(habit_id=habit_id, period=period, start=start, **fields)
+            for habit_id, buckets in totals.items()
+            for (period, start), fields in buckets.items()
+        ]
+        EntryRollup.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+    return written
+
+
+def verify_rollups(habit_ids=None):
+    """Compare stored rollups with recomputed ones. Returns (habit_id, bucket, stored, expected) mismatches."""
+    if habit_ids is None:
+        habit_ids = list(Action.objects.values_list("id", flat=True))
+    mismatches = []
+    for offset in range(0, len(habit_ids), 500):
+        batch = habit_ids[offset:offset + 500]
+        expected = compute_rollups(batch)
+        stored = {habit_id: {} for habit_id in batch}
+        for row in EntryRollup.objects.filter(habit_id__in=batch).values("habit_id", "period", "start", *ROLLUP_FIELDS):
+            stored[row.pop("habit_id")][(row.pop("period"), row.pop("start"))] = row
+        for habit_id in batch:
+            for bucket in expected[habit_id].keys() | stored[habit_id].keys():
+                if expected[habit_id].get(bucket) != stored[habit_id].get(bucket):
+                    mismatches.append((habit_id, bucket, stored[habit_id].get(bucket), expected[habit_id].get(bucket)))
+    return mismatches
+
+
+def _month_window(habit_id, year, month):
+    first_day = date(year, month, 1)
+    last_day = bucket_end(first_day, EntryRollup.MONTH)
+    return EntryRollup.objects.filter(
+        Q(period=EntryRollup.MONTH, start=first_day)
+        | Q(period=EntryRollup.WEEK, start__range=(first_day - timedelta(days=6), last_day)),
+        habit_id=habit_id,
+    )
+
+
+def _split_month_window(rollups):
+    month_rollup = None
+    weeks = []
+    for rollup in rollups:
+        if rollup.period == EntryRollup.MONTH:
+            month_rollup = rollup
+        else:
+            weeks.append(rollup)
+    weeks.sort(key=lambda rollup: rollup.start)
+    return month_rollup, weeks
+
+
+def month_rollups(habit_id, year, month):
+    """(month rollup or None, week rollups overlapping the month, oldest first) in one indexed read."""
+    return _split_month_window(_month_window(habit_id, year, month))
+
+
+async def amonth_rollups(habit_id, year, month):
+    """Async month_rollups()."""
+    return _split_month_window([rollup async for rollup in _month_window(habit_id, year, month)])
+
+
+def week_start(day):
+    return bucket_start(day, EntryRollup.WEEK)
+
+
+def recent_weeks(habit_id, weeks, today=None):
+    """Week rollups of the last `weeks` weeks (including this one), oldest first; empty weeks are absent."""
+    since = week_start(today or date.today()) - timedelta(weeks=weeks - 1)
+    return list(
+        EntryRollup.objects.filter(habit_id=habit_id, period=EntryRollup.WEEK, start__gte=since).order_by("start")
+    )
+
+
+def serialize_rollup(rollup):
+    return {
+        "period": rollup.period,
+        "start": rollup.start.isoformat(),
+        "entries": rollup.entry_count,
+        "avg_mood": round(rollup.avg_mood, 2),
+        "min_mood": rollup.mood_min,
+        "max_mood": rollup.mood_max,
+        "avg_sleep": round(rollup.avg_sleep, 2),
+        "yoga_days": rollup.yoga_count,
+    }
@@ -0,0 +1,208 @@
+"""Full-text search over MoodEntry.note, backed by an SQLite FTS5 table.
+
+The FTS table uses MoodEntry's table as external content, so it only
+stores the index. Triggers keep it in sync with every INSERT, UPDATE and
+DELETE, including bulk_create and upserts that bypass model signals.
+The habit id is indexed as its own column so a search can be narrowed
+to one user's entries inside the index rather than after it.
+
+Prefixes up to MAX_PREFIX characters are indexed, so every prefix query
+is a direct lookup; filters match longer words on their first
+MAX_PREFIX characters. Ranked search matches whole words as prefixes
+and ranks inside SQLite with bm25() over the note column, loading only
+the `limit` best rows. bm25()'s term statistics read each term's
+matches across all users, but in SQLite's C code rather than as rows
+loaded and scored in Python.
+"""
+import math
+import re
+import unicodedata
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import MoodEntry
+
+FTS_TABLE = "habits_moodentry_fts"
+ENTRY_TABLE = MoodEntry._meta.db_table
+
+CREATE_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        note,
+        habit_id,
+        content='{ENTRY_TABLE}',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4 5 6 7 8'
+    )
+"""
+
+TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, note, habit_id) VALUES (new.id, new.note, new.habit_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, note, habit_id)
+        VALUES ('delete', old.id, old.note, old.habit_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF note, habit_id ON {ENTRY_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, note, habit_id)
+        VALUES ('delete', old.id, old.note, old.habit_id);
+        INSERT INTO {FTS_TABLE}(rowid, note, habit_id) VALUES (new.id, new.note, new.habit_id);
+    END
+    """,
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+INDEX_NEW_ROWS_SQL = f"""
+    INSERT INTO {FTS_TABLE}(rowid, note, habit_id)
+    SELECT id, note, habit_id FROM {ENTRY_TABLE} WHERE id > %s ORDER BY id
+"""
+
+RANKED_SQL = f"""
+    SELECT entry.*, bm25({FTS_TABLE}, 1.0, 0.0) AS rank
+    FROM {FTS_TABLE} CROSS JOIN {ENTRY_TABLE} AS entry ON entry.id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND entry.habit_id = %s
+    ORDER BY rank, entry.date DESC
+    LIMIT %s
+"""
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+MAX_PREFIX = 8
+
+
+def is_supported(conn=connection):
+    return conn.vendor == "sqlite"
+
+
+def install(conn=connection):
+    """Create the FTS table and its triggers if missing (safe to run repeatedly)."""
+    if not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+        for statement in TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+def uninstall(conn=connection):
+    if not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        for statement in DROP_SQL:
+            cursor.execute(statement)
+
+
+def rebuild(conn=connection):
+    """Reinstall the triggers and rebuild the whole index from MoodEntry."""
+    install(conn)
+    if not is_supported(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+@contextmanager
+def deferred_indexing(conn=connection):
+    """Index the rows inserted inside the block with one statement instead of row by row.
+
+    For bulk loads: the insert trigger is dropped for the duration of the
+    block and the new rows (ids above the current maximum) are indexed on
+    the way out, which is several times faster than indexing them one at
+    a time. Only insert inside the block, and do it inside a transaction
+    so a failure rolls the index back along with the rows.
+    """
+    if not is_supported(conn):
+        yield
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {ENTRY_TABLE}")
+        last_id = cursor.fetchone()[0]
+        cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai")
+    try:
+        yield
+        with conn.cursor() as cursor:
+            cursor.execute(INDEX_NEW_ROWS_SQL, [last_id])
+    finally:
+        install(conn)
+
+
+def search_terms(text):
+    """Lower-cased, accent-folded words of `text`, as the FTS tokenizer sees them."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return TERM_RE.findall(folded)
+
+
+def build_match_query(text, habit_id=None, truncate=True):
+    """Turn free text into an FTS5 query: every word must match as a prefix.
+
+    Words are quoted, so FTS5 operators typed by the user are treated as
+    plain text. With `truncate`, words are cut to MAX_PREFIX characters
+    so each one is a prefix-index lookup. Returns an empty string when
+    there is nothing to search.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return ""
+    length = MAX_PREFIX if truncate else None
+    query = "note : (" + " ".join(f'"{term[:length]}"*' for term in terms) + ")"
+    if habit_id is not None:
+        query = f'habit_id : "{int(habit_id)}" AND {query}'
+    return query
+
+
+def note_filter(text, habit_id=None):
+    """A Q object matching entries whose note matches `text`, using the index when available."""
+    match = build_match_query(text, habit_id)
+    if not (match and is_supported()):
+        return Q(note__icontains=text)
+    return Q(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]))
+
+
+def score(note, terms):
+    """Relevance of a note: prefix hits per term, damped by note length (0 if any term is missing)."""
+    words = search_terms(note)
+    hits = [sum(1 for word in words if word.startswith(term)) for term in terms]
+    if not words or not all(hits):
+        return 0
+    return sum(math.log1p(count) for count in hits) / math.sqrt(len(words))
+
+
+def search_entries(habit_id, text, limit=20):
+    """A habit's entries matching `text`, best match first and newest first on ties."""
+    terms = search_terms(text)
+    if not terms:
+        return []
+    if is_supported():
+        # Ranked and cut to `limit` in SQL; bm25() is lower for better matches
+        match = build_match_query(text, habit_id, truncate=False)
+        return list(MoodEntry.objects.raw(RANKED_SQL, [match, habit_id, limit]))
+
+    # No FTS5: substring filters, scored in Python
+    candidates = MoodEntry.objects.filter(habit_id=habit_id)
+    for term in terms:
+        candidates = candidates.filter(note__icontains=term)
+
+    ranked = []
+    for entry in candidates.order_by("-date"):
+        entry.rank = score(entry.note, terms)
+        if entry.rank:
+            ranked.append(entry)
+    # Stable sort, so equal scores stay newest first
+    ranked.sort(key=lambda entry: entry.rank, reverse=True)
+    return ranked[:limit]
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .db import apply_sqlite_pragmas
+from .metrics import instrument_queries
+from .models import Action, DeletedEntry, MoodEntry
+from .resolvers import forget_default_habit
+
+
+@receiver(post_delete, sender=Action)
+def forget_deleted_habit(sender, instance, **kwargs):
+    forget_default_habit(instance.user_id)
+
+
+def _deletes_habit(origin):
+    """Whether a deletion started from a habit or a user, so the entries' habit goes too."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, (Action, get_user_model()))
+
+
+@receiver(post_delete, sender=MoodEntry)
+def record_deleted_entry(sender, instance, origin=None, **kwargs):
+    # Every way an entry is deleted (the view, the admin, queryset deletes in
+    # commands) leaves a tombstone for delta sync. When the habit itself is
+    # deleted its tombstones would cascade away with it: that feed is gone.
+    if instance.habit_id is None or (origin is not None and _deletes_habit(origin)):
+        return
+    DeletedEntry.objects.create(habit_id=instance.habit_id, entry_id=instance.pk, date=instance.date)
+
+
+@receiver(post_delete, sender=get_user_model())
+def forget_deleted_user(sender, instance, **kwargs):
+    forget_default_habit(instance.pk)
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_saved_user(sender, instance, **kwargs):
+    # A new password changes the session auth hash the cached copy would check against
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    apply_sqlite_pragmas(connection)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    connection.execute_wrappers.append(instrument_queries)
@@ -0,0 +1,136 @@
+"""Hashed, precompressed static files and a middleware that serves them.
+
+CompressedManifestStaticFilesStorage is ManifestStaticFilesStorage (file
+names carry a hash of their content) that also writes `.gz` and, when the
+optional `brotli` package is installed, `.br` copies of text assets during
+collectstatic, so nothing is compressed per request.
+
+static_files_middleware serves STATIC_ROOT from the application itself,
+picking the smallest variant the browser accepts. A hashed name never
+changes content, so those are cached for a year; anything else is
+revalidated after STATIC_MAX_AGE seconds.
+"""
+import gzip
+import mimetypes
+import os
+from urllib.parse import urlparse
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.base import ContentFile
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are written
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = (".css", ".js", ".svg", ".txt", ".html", ".json", ".map")
+# Keep a variant only if it saves at least this fraction of the original
+MIN_SAVING = 0.05
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+STATIC_MAX_AGE = 60
+# Content-Encoding and file suffix, most preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(data):
+    """{suffix: compressed bytes} for the variants worth keeping."""
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) <= len(data) * (1 - MIN_SAVING)}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            with self.open(name) as f:
+                data = f.read()
+            for suffix, body in compress(data).items():
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(body))
+                yield name, name + suffix, True
+
+
+def collected_files():
+    """{URL path: (file path, encodings available, immutable)} for everything under STATIC_ROOT."""
+    static_url = urlparse(settings.STATIC_URL)
+    if not settings.STATIC_ROOT or static_url.netloc:
+        return {}
+    hashed = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+    files = {}
+    for directory, _, filenames in os.walk(settings.STATIC_ROOT):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, settings.STATIC_ROOT).replace(os.sep, "/")
+            if name.endswith((".gz", ".br")):
+                continue
+            encodings = [encoding for encoding, suffix in ENCODINGS if os.path.exists(path + suffix)]
+            files[static_url.path + name] = (path, encodings, name in hashed)
+    return files
+
+
+def accepted_encodings(request):
+    """Content codings in the request's Accept-Encoding, leaving out those given q=0."""
+    accepted = set()
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        coding, *params = [value.strip() for value in part.split(";")]
+        quality = next((param[2:] for param in params if param.startswith("q=")), "1")
+        try:
+            if float(quality) > 0:
+                accepted.add(coding.lower())
+        except ValueError:
+            pass
+    return accepted
+
+
+def static_response(request, files):
+    """The response for a collected static file, or None if `request` is not for one."""
+    if request.method not in ("GET", "HEAD") or request.path not in files:
+        return None
+    path, encodings, immutable = files[request.path]
+    accepted = accepted_encodings(request)
+    encoding = next((encoding for encoding in encodings if encoding in accepted), None)
+    suffix = dict(ENCODINGS)[encoding] if encoding else ""
+    with open(path + suffix, "rb") as f:
+        content = f.read()
+
+    content_type, _ = mimetypes.guess_type(path)
+    response = HttpResponse(content, content_type=content_type or "application/octet-stream")
+    response.headers["Content-Length"] = str(len(content))
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    if encodings:
+        patch_vary_headers(response, ["Accept-Encoding"])
+    if immutable:
+        response.headers["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}"
+    return response
+
+
+@sync_and_async_middleware
+def static_files_middleware(get_response):
+    """Answer requests for collected static files before the rest of the stack runs."""
+    files = collected_files()
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = static_response(request, files)
+            return response if response is not None else await get_response(request)
+    else:
+        def middleware(request):
+            response = static_response(request, files)
+            return response if response is not None else get_response(request)
+    return middleware
@@ -0,0 +1,129 @@
+"""Running per-habit totals (HabitStats), kept in step with MoodEntry writes."""
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Action, HabitStats, MoodEntry
+from .streaks import NO_STREAKS, STREAK_FIELDS, compute_streaks
+
+TOTAL_FIELDS = ("entry_count", "mood_sum", "sleep_count", "sleep_sum", "yoga_count")
+
+
+def entry_totals(entry):
+    """What a single entry contributes to its habit's totals."""
+    return {
+        "entry_count": 1,
+        "mood_sum": entry.mood,
+        "sleep_count": 0 if entry.sleep_duration is None else 1,
+        "sleep_sum": entry.sleep_duration or 0,
+        "yoga_count": 1 if entry.yoga else 0,
+    }
+
+
+def record_entry_change(habit_id, before=None, after=None, **fields):
+    """Move a habit's totals from `before` to `after` in one UPDATE.
+
+    `before` and `after` are `entry_totals()` dicts (None for a create or
+    a delete). The same UPDATE bumps the habit's data version and
+    updated_at, and sets any other HabitStats `fields` given (the
+    streaks). Call this inside the transaction that wrote the entry.
+    """
+    before = before or {}
+    after = after or {}
+    delta = {field: after.get(field, 0) - before.get(field, 0) for field in TOTAL_FIELDS}
+    with transaction.atomic():
+        updated = HabitStats.objects.filter(habit_id=habit_id).update(
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+            **{field: F(field) + value for field, value in delta.items()},
+            **fields,
+        )
+        if not updated:
+            # No row yet (habit predates HabitStats): build it from the entries,
+            # which already include the write being recorded.
+            rebuild_stats([habit_id])
+
+
+def compute_totals(habit_ids=None):
+    """Recompute totals from MoodEntry with one grouped query, keyed by habit id."""
+    entries = MoodEntry.objects.filter(habit__isnull=False)
+    if habit_ids is not None:
+        entries = entries.filter(habit_id__in=habit_ids)
+    rows = entries.values("habit_id").annotate(
+        entry_count=Count("id"),
+        mood_sum=Sum("mood"),
+        sleep_count=Count("sleep_duration"),
+        sleep_sum=Sum("sleep_duration", default=0),
+        yoga_count=Count("id", filter=Q(yoga=True)),
+    ).order_by()
+    return {row.pop("habit_id"): row for row in rows}
+
+
+def rebuild_stats(habit_ids=None, batch_size=1000):
+    """Rebuild HabitStats rows (totals and streaks) from scratch. Returns the number of rows written."""
+    totals = compute_totals(habit_ids)
+    streaks = compute_streaks(habit_ids)
+    if habit_ids is None:
+        habit_ids = Action.objects.values_list("id", flat=True)
+    empty = dict.fromkeys(TOTAL_FIELDS, 0)
+    rows = [
+        HabitStats(habit_id=habit_id, **totals.get(habit_id, empty), **streaks.get(habit_id, NO_STREAKS))
+        for habit_id in habit_ids
+    ]
+    HabitStats.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["habit"],
+        update_fields=[*TOTAL_FIELDS, *STREAK_FIELDS],
+    )
+    return len(rows)
+
+
+def bump_versions(habit_ids):
+    """Mark the habits' data as changed, invalidating anything cached against their version."""
+    HabitStats.objects.filter(habit_id__in=habit_ids).update(version=F("version") + 1, updated_at=timezone.now())
+
+
+def verify_stats(habit_ids=None):
+    """Compare stored totals with recomputed ones. Returns (habit_id, stored, expected) mismatches."""
+    totals = compute_totals(habit_ids)
+    stored_rows = HabitStats.objects.values("habit_id", *TOTAL_FIELDS)
+    if habit_ids is None:
+        habit_ids = Action.objects.values_list("id", flat=True)
+    else:
+        stored_rows = stored_rows.filter(habit_id__in=habit_ids)
+    stored = {row.pop("habit_id"): row for row in stored_rows}
+    empty = dict.fromkeys(TOTAL_FIELDS, 0)
+
+    mismatches = []
+    for habit_id in habit_ids:
+        expected = totals.get(habit_id, empty)
+        actual = stored.get(habit_id)
+        if actual != expected:
+            mismatches.append((habit_id, actual, expected))
+    return mismatches
+
+
+def get_habit_stats(habit_id):
+    """Primary-key lookup of a habit's totals, building the row on first use; None if the habit is gone."""
+    try:
+        return HabitStats.objects.get(habit_id=habit_id)
+    except HabitStats.DoesNotExist:
+        # Never build a row for a deleted habit (a stale cached id)
+        if not Action.objects.filter(pk=habit_id).exists():
+            return None
+        rebuild_stats([habit_id])
+        return HabitStats.objects.filter(habit_id=habit_id).first()
+
+
+async def aget_habit_stats(habit_id):
+    """Async get_habit_stats()."""
+    try:
+        return await HabitStats.objects.aget(habit_id=habit_id)
+    except HabitStats.DoesNotExist:
+        if not await Action.objects.filter(pk=habit_id).aexists():
+            return None
+        await sync_to_async(rebuild_stats)([habit_id])
+        return await HabitStats.objects.filter(habit_id=habit_id).afirst()
@@ -0,0 +1,199 @@
+"""Logging and yoga streaks per habit, stored on HabitStats and kept in step with entry writes.
+
+A streak is a run of consecutive days: days with an entry for the
+logging ("log") streak, yoga days for the yoga one. For each kind
+HabitStats keeps the run ending on the latest such day
+(`<kind>_streak`, `<kind>_streak_end`) and the longest run
+(`<kind>_streak_best`). A run still counts as current the day after it
+ends, so a streak survives until the end of a day without an entry.
+It also keeps how many runs are that long (`<kind>_streak_best_runs`).
+
+Logging the day after the latest one, or deleting the latest day of a
+run that is not the only one as long as the best, only does
+arithmetic. Any other single-day change (a backfill, a delete inside a
+run) re-reads the days within `best` of it: no run is longer than that.
+Only shortening the last run as long as the best can lower the best,
+which takes a recount of all the habit's days, as does changing several
+days at once (batch writes).
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.db.models import Q
+
+from .models import Action, HabitStats, MoodEntry
+
+ONE_DAY = timedelta(days=1)
+# Which entries make a day count towards each kind of streak
+STREAK_KINDS = {"log": Q(), "yoga": Q(yoga=True)}
+STREAK_PARTS = ("streak", "streak_end", "streak_best", "streak_best_runs")
+STREAK_FIELDS = tuple(f"{kind}_{part}" for kind in STREAK_KINDS for part in STREAK_PARTS)
+NO_STREAKS = {field: None if field.endswith("_end") else 0 for field in STREAK_FIELDS}
+
+
+def count_streaks(days):
+    """(run ending on the last day, that day, longest run, runs that long) of ascending, distinct `days`."""
+    run, end, best, best_runs = 0, None, 0, 0
+    for day in days:
+        run = run + 1 if end is not None and day == end + ONE_DAY else 1
+        end = day
+        if run > best:
+            best, best_runs = run, 1
+        elif run == best:
+            best_runs += 1
+    return run, end, best, best_runs
+
+
+def _days(habit_id, kind):
+    """The habit's days of this kind, oldest first, from the covering (habit, date, ..., yoga) index."""
+    return MoodEntry.objects.filter(STREAK_KINDS[kind], habit_id=habit_id).order_by("date").values_list("date", flat=True)
+
+
+def _runs_around(habit_id, kind, day, reach):
+    """How many consecutive days of this kind come just before and just after `day` (each at most `reach`)."""
+    nearby = set(_days(habit_id, kind).filter(date__range=(day - reach * ONE_DAY, day + reach * ONE_DAY)))
+    before = after = 0
+    while day - (before + 1) * ONE_DAY in nearby:
+        before += 1
+    while day + (after + 1) * ONE_DAY in nearby:
+        after += 1
+    return before, after
+
+
+def _longer(best, best_runs, length):
+    """(best, best_runs) once a new run of `length` days replaced shorter ones."""
+    if length > best:
+        return length, 1
+    return best, best_runs + (length == best)
+
+
+def add_day(habit_id, kind, streak, day):
+    """The (run, end, best, best_runs) streak after `day` became a day of this kind (already written)."""
+    run, end, best, best_runs = streak
+    if end is None or day > end + ONE_DAY:
+        return 1, day, *_longer(best, best_runs, 1)
+    if day == end + ONE_DAY:
+        return run + 1, day, *_longer(best, best_runs, run + 1)
+    # A backfill joins the runs on either side of it
+    before, after = _runs_around(habit_id, kind, day, best)
+    joined = before + 1 + after
+    if day + after * ONE_DAY == end:
+        run = joined
+    return run, end, *_longer(best, best_runs, joined)
+
+
+def remove_day(habit_id, kind, streak, day):
+    """The (run, end, best, best_runs) streak after `day` stopped being a day of this kind (already written)."""
+    run, end, best, best_runs = streak
+    if day == end and run > 1 and (run < best or best_runs > 1):
+        return run - 1, end - ONE_DAY, best, best_runs - (run == best)
+    before, after = _runs_around(habit_id, kind, day, best)
+    if before + 1 + after == best:
+        if best_runs == 1:
+            # The only run that long: the next longest is unknown
+            return count_streaks(_days(habit_id, kind))
+        best_runs -= 1
+    if day + after * ONE_DAY != end:
+        return run, end, best, best_runs
+    if after:
+        return after, end, best, best_runs
+    if before:
+        return before, day - ONE_DAY, best, best_runs
+    # The latest run is gone: the one before it is the latest now
+    latest = _days(habit_id, kind).filter(date__lt=day).last()
+    if latest is None:
+        return 0, None, best, best_runs
+    return _runs_around(habit_id, kind, latest, best)[0] + 1, latest, best, best_runs
+
+
+def streak_changes(habit_id, before=(), after=()):
+    """HabitStats streak fields to set after entries went from `before` to `after` (entry_state() dicts).
+
+    Empty when no day was added to or removed from either kind of
+    streak; otherwise reads the habit's current streaks (one primary-key
+    lookup) plus whatever add_day()/remove_day() need. Call inside the
+    transaction that wrote the entries.
+    """
+    days_before = {"log": {state["date"] for state in before},
+                   "yoga": {state["date"] for state in before if state["totals"]["yoga_count"]}}
+    days_after = {"log": {state["date"] for state in after},
+                  "yoga": {state["date"] for state in after if state["totals"]["yoga_count"]}}
+    changed = {kind: (days_after[kind] - days_before[kind], days_before[kind] - days_after[kind]) for kind in STREAK_KINDS}
+    changed = {kind: days for kind, days in changed.items() if any(days)}
+    if not changed:
+        return {}
+    stored = HabitStats.objects.filter(habit_id=habit_id).values(*STREAK_FIELDS).first()
+    if stored is None:
+        # No row yet: rebuild_stats() counts the streaks when it creates it
+        return {}
+
+    fields = {}
+    for kind, (added, removed) in changed.items():
+        streak = tuple(stored[field] for field in STREAK_FIELDS if field.startswith(f"{kind}_"))
+        if len(added) + len(removed) > 1:
+            streak = count_streaks(_days(habit_id, kind))
+        elif added:
+            streak = add_day(habit_id, kind, streak, *added)
+        else:
+            streak = remove_day(habit_id, kind, streak, *removed)
+        fields.update(zip((f"{kind}_{part}" for part in STREAK_PARTS), streak))
+    return fields
+
+
+def compute_streaks(habit_ids=None):
+    """Every streak field of the given habits (default: all), counted from their entries, keyed by habit id."""
+    entries = MoodEntry.objects.filter(habit__isnull=False)
+    if habit_ids is not None:
+        entries = entries.filter(habit_id__in=habit_ids)
+    streaks = {}
+    rows = entries.order_by("habit_id", "date").values_list("habit_id", "date", "yoga").iterator(chunk_size=5000)
+    for habit_id, days in groupby(rows, key=lambda row: row[0]):
+        days = list(days)
+        streaks[habit_id] = dict(zip(STREAK_FIELDS, (
+            *count_streaks(day for _, day, _ in days),
+            *count_streaks(day for _, day, yoga in days if yoga),
+        )))
+    return streaks
+
+
+def rebuild_streaks(habit_ids=None, batch_size=500):
+    """Recount the streaks of the given habits' existing HabitStats rows (default: all). Returns the row count."""
+    if habit_ids is None:
+        habit_ids = list(Action.objects.values_list("id", flat=True))
+    rebuilt = 0
+    for offset in range(0, len(habit_ids), batch_size):
+        batch = habit_ids[offset:offset + batch_size]
+        streaks = compute_streaks(batch)
+        rows = [
+            HabitStats(habit_id=habit_id, **streaks.get(habit_id, NO_STREAKS))
+            for habit_id in HabitStats.objects.filter(habit_id__in=batch).values_list("habit_id", flat=True)
+        ]
+        HabitStats.objects.bulk_update(rows, STREAK_FIELDS)
+        rebuilt += len(rows)
+    return rebuilt
+
+
+def verify_streaks(habit_ids=None):
+    """Compare stored streaks with recounted ones. Returns (habit_id, stored, expected) mismatches."""
+    stored_rows = HabitStats.objects.values("habit_id", *STREAK_FIELDS)
+    if habit_ids is not None:
+        stored_rows = stored_rows.filter(habit_id__in=habit_ids)
+    stored = {row.pop("habit_id"): row for row in stored_rows}
+    expected = compute_streaks(list(stored))
+    return [
+        (habit_id, row, expected.get(habit_id, NO_STREAKS))
+        for habit_id, row in stored.items()
+        if row != expected.get(habit_id, NO_STREAKS)
+    ]
+
+
+def current_streaks(habit_stats, today):
+    """{"log"/"yoga": {"current", "best"}} for display; a run is current if it ended today or yesterday."""
+    streaks = {}
+    for kind in STREAK_KINDS:
+        end = getattr(habit_stats, f"{kind}_streak_end")
+        streaks[kind] = {
+            "current": getattr(habit_stats, f"{kind}_streak") if end and end >= today - ONE_DAY else 0,
+            "best": getattr(habit_stats, f"{kind}_streak_best"),
+        }
+    return streaks
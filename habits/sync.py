@@ -0,0 +1,87 @@
+"""Delta sync: what changed in a habit's entries since a cursor.
+
+Every entry write sets MoodEntry.updated_at and every deletion, however
+it is made, leaves a DeletedEntry tombstone (habits.signals). Both are read in (timestamp, id) order from
+their (habit, timestamp, id) indexes and merged into one stream; the
+cursor is the position of the last change returned, so a client that is
+up to date gets an empty page.
+
+Writes take SQLite's lock when their transaction begins (settings:
+transaction_mode IMMEDIATE) and stamp rows after that, so changes commit
+in timestamp order and none can appear behind a cursor already handed out.
+
+Deleting a habit deletes its tombstones too, so responses carry the
+habit id: a client that sees it change drops its copy and starts over.
+"""
+import heapq
+from datetime import datetime, timezone
+from itertools import islice
+
+from django.db.models import Q
+
+from .entries import serialize_entry
+from .models import DeletedEntry, MoodEntry
+
+DEFAULT_SYNC_LIMIT = 200
+MAX_SYNC_LIMIT = 1000
+
+# Order of the two kinds of change when their timestamps are equal
+CHANGED, DELETED = 0, 1
+
+
+def encode_cursor(timestamp, kind, row_id):
+    # UTC with a "Z": no "+" to be mangled in a query string
+    return f"{timestamp.astimezone(timezone.utc):%Y-%m-%dT%H:%M:%S.%fZ}_{kind}_{row_id}"
+
+
+def decode_cursor(cursor):
+    """Parse a cursor back into (timestamp, kind, id); raises ValueError when malformed."""
+    timestamp, kind, row_id = cursor.split("_")
+    timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None or kind not in ("0", "1"):
+        raise ValueError(f"Invalid sync cursor: {cursor!r}")
+    return timestamp, int(kind), int(row_id)
+
+
+def _after(rows, field, kind, position):
+    """`rows` strictly after `position` in (timestamp, kind, id) order."""
+    if position is None:
+        return rows
+    timestamp, after_kind, after_id = position
+    later = Q(**{f"{field}__gt": timestamp})
+    if kind > after_kind:
+        later |= Q(**{field: timestamp})
+    elif kind == after_kind:
+        later |= Q(**{field: timestamp, "id__gt": after_id})
+    return rows.filter(later)
+
+
+def serialize_change(kind, row):
+    if kind == DELETED:
+        return {"id": row.entry_id, "date": row.date.isoformat(), "deleted": True}
+    return {**serialize_entry(row), "deleted": False}
+
+
+def changes_since(habit_id, cursor=None, limit=DEFAULT_SYNC_LIMIT):
+    """Up to `limit` changes after `cursor` (all of them without one), oldest first.
+
+    Returns (changes, next_cursor, has_more). Changed entries are
+    serialized as on the entries API plus "deleted": false; deleted ones
+    are {"id", "date", "deleted": true}. next_cursor is `cursor` itself
+    when nothing changed.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    changed = _after(MoodEntry.objects.filter(habit_id=habit_id), "updated_at", CHANGED, position)
+    deleted = _after(DeletedEntry.objects.filter(habit_id=habit_id), "deleted_at", DELETED, position)
+    # One extra row from each side tells whether there is more
+    merged = heapq.merge(
+        ((entry.updated_at, CHANGED, entry.id, entry) for entry in changed.order_by("updated_at", "id")[:limit + 1]),
+        ((tombstone.deleted_at, DELETED, tombstone.id, tombstone)
+         for tombstone in deleted.order_by("deleted_at", "id")[:limit + 1]),
+        key=lambda change: change[:3],
+    )
+    page = list(islice(merged, limit + 1))
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = encode_cursor(*page[-1][:3]) if page else cursor
+    return [serialize_change(kind, row) for _, kind, _, row in page], next_cursor, has_more
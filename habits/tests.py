@@ -1,3 +1,1283 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import random
+import tempfile
+from io import StringIO
+from datetime import date, timedelta
+from unittest import skipUnless
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Avg, Count, Q
+from django.http import HttpResponse
+from django.templatetags.static import static
+from django.test import AsyncClient, Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .analytics import analyse, load_entries
+from .auth import _users
+from .benchmarking import RowCounter, measure
+from .charts import lttb
+from .db import apply_sqlite_pragmas
+from .entries import keyset_page
+from .heatmap import YEAR_SLOTS, pack_day, unpack_day
+from .metrics import HISTOGRAMS
+from .models import Action, DeletedEntry, HabitStats, MoodEntry
+from .pages import PAGE_CACHE_ALIAS
+from .resolvers import DEFAULT_HABIT_NAME, SESSION_KEY, _habit_ids, forget_default_habit
+from .rollups import verify_rollups
+from .search import FTS_TABLE, build_match_query, search_entries
+from .stats import get_habit_stats, verify_stats
+from .staticfiles import static_files_middleware
+from .streaks import STREAK_FIELDS, add_day, compute_streaks, remove_day, verify_streaks
+from .warmup import precompile_templates
+from .writes import entry_state, record_bulk_write, record_entry_write, upsert_entries
+
+
+def clear_caches():
+    """Drop cached analytics, pages, sessions and users: ids are reused once a test's transaction rolls back."""
+    for alias in ("default", PAGE_CACHE_ALIAS, settings.SESSION_CACHE_ALIAS):
+        caches[alias].clear()
+    _users.clear()
+
+
+def create_history(habit, days):
+    """Bulk insert `days` consecutive entries ending today."""
+    start = date.today() - timedelta(days=days - 1)
+    MoodEntry.objects.bulk_create(
+        MoodEntry(
+            habit=habit,
+            date=start + timedelta(days=i),
+            mood=i % 5 + 1,
+            sleep_duration=i % 6 + 1,
+            yoga=i % 3 == 0,
+            note="Felt productive and calm." if i % 4 == 0 else "",
+        )
+        for i in range(days)
+    )
+    record_bulk_write([habit.id])
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class QueryPlanTests(TestCase):
+    """Every habits query a view runs must be an index search: no full scans, no temp B-tree sorts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="planner", password="plan-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 120)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+        self.entry = MoodEntry.objects.filter(habit=self.habit).earliest("date")
+
+    def assertUsesIndexes(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as captured:
+            getattr(self.client, method)(url, data or {})
+
+        checked = 0
+        for query in captured.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or "habits_" not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                steps = [row[-1] for row in cursor.fetchall()]
+            for step in steps:
+                with self.subTest(url=url, sql=sql, step=step):
+                    self.assertNotIn("TEMP B-TREE", step)
+                    if step.startswith("SCAN"):
+                        # FTS5 lookups are reported as a scan of the virtual table
+                        self.assertIn("VIRTUAL TABLE", step)
+            checked += 1
+        self.assertTrue(checked, f"{url} ran no habits queries")
+
+    def test_tracker(self):
+        self.assertUsesIndexes("get", reverse("habits_tracker"))
+        self.assertUsesIndexes("post", reverse("habits_tracker"), {"mood": "4", "sleep_duration": "3", "yoga": "yes"})
+
+    def test_history(self):
+        self.assertUsesIndexes("get", reverse("mood_history"))
+        past = date.today() - timedelta(days=60)
+        self.assertUsesIndexes("get", reverse("mood_history"), {"year": past.year, "month": past.month})
+        self.assertUsesIndexes("get", reverse("weekly_summary"), {"weeks": 26})
+        self.assertUsesIndexes("get", reverse("chart_data"), {"range": "90d"})
+        self.assertUsesIndexes("get", reverse("year_heatmap"))
+
+    def test_entries(self):
+        self.assertUsesIndexes("get", reverse("all_entries"))
+        self.assertUsesIndexes("get", reverse("all_entries"), {"mood": "3", "yoga": "no", "q": "calm"})
+
+    def test_entries_api(self):
+        cursor = f"{date.today() - timedelta(days=30)}_{self.entry.id}"
+        self.assertUsesIndexes("get", reverse("entries_api"), {"cursor": cursor})
+
+    def test_search(self):
+        self.assertUsesIndexes("get", reverse("search_entries"), {"q": "prod"})
+
+    def test_sync(self):
+        self.client.post(reverse("delete_entry", args=[self.entry.id]))
+        cursor = self.client.get(reverse("sync_entries"), {"limit": 50}).json()["next_cursor"]
+        self.assertUsesIndexes("get", reverse("sync_entries"), {"since": cursor})
+
+    def test_edit_and_delete(self):
+        edit_url = reverse("edit_entry", args=[self.entry.id])
+        self.assertUsesIndexes("get", edit_url)
+        self.assertUsesIndexes("post", edit_url, {"mood": "5", "sleep_duration": "4", "yoga": "no"})
+        self.assertUsesIndexes("post", reverse("delete_entry", args=[self.entry.id]))
+
+
+class HabitStatsTests(TestCase):
+    """The running totals equal a recount over MoodEntry after every write path."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="counter", password="count-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 10)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def assertMatchesRecount(self):
+        stats = get_habit_stats(self.habit.id)
+        recount = MoodEntry.objects.filter(habit=self.habit).aggregate(
+            entries=Count("id"), mood=Avg("mood"), sleep=Avg("sleep_duration"), yoga=Count("id", filter=Q(yoga=True)),
+        )
+        self.assertEqual(stats.entry_count, recount["entries"])
+        self.assertAlmostEqual(stats.avg_mood, recount["mood"] or 0)
+        self.assertAlmostEqual(stats.avg_sleep, recount["sleep"] or 0)
+        self.assertEqual(stats.yoga_count, recount["yoga"])
+        self.assertEqual(verify_stats([self.habit.id]), [])
+
+    def test_every_write_path_keeps_totals(self):
+        MoodEntry.objects.filter(habit=self.habit, date=date.today()).delete()
+        record_bulk_write([self.habit.id])
+        self.assertMatchesRecount()
+
+        tracker = {"mood": "5", "sleep_duration": "6", "yoga": "yes"}
+        self.client.post(reverse("habits_tracker"), tracker)
+        self.assertMatchesRecount()
+        self.client.post(reverse("habits_tracker"), {**tracker, "mood": "1", "yoga": "no"})  # resubmit updates
+        self.assertMatchesRecount()
+
+        entry = MoodEntry.objects.filter(habit=self.habit).earliest("date")
+        self.client.post(reverse("edit_entry", args=[entry.id]), {"mood": "2", "sleep_duration": "1", "yoga": "yes"})
+        self.assertMatchesRecount()
+
+        self.client.post(reverse("delete_entry", args=[entry.id]))
+        self.assertMatchesRecount()
+
+    def test_command_reports_and_rebuilds_drifted_stats(self):
+        HabitStats.objects.filter(habit=self.habit).update(entry_count=99, mood_sum=1)
+
+        with self.assertRaisesMessage(CommandError, "1 habit(s) have stale stats."):
+            call_command("rebuild_habit_stats", "--verify-only", "--habit", str(self.habit.id),
+                         stdout=StringIO(), stderr=StringIO())
+
+        call_command("rebuild_habit_stats", "--habit", str(self.habit.id), stdout=StringIO())
+        self.assertMatchesRecount()
+
+    def test_double_submitted_delete_counts_once(self):
+        entry = MoodEntry.objects.filter(habit=self.habit).first()
+        url = reverse("delete_entry", args=[entry.id])
+        self.client.post(url)
+        response = self.client.post(url, follow=True)
+        self.assertContains(response, "Entry not found!")
+        self.assertMatchesRecount()
+        self.assertEqual(DeletedEntry.objects.filter(entry_id=entry.id).count(), 1)
+
+
+class KeysetPaginationTests(TestCase):
+    """entries_api pages never skip or repeat an entry, with or without filters."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="pager", password="pager-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 45)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def walk(self, **params):
+        ids, cursor = [], None
+        while True:
+            response = self.client.get(reverse("entries_api"), {**params, **({"cursor": cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            ids += [entry["id"] for entry in payload["entries"]]
+            cursor = payload["next_cursor"]
+            if not cursor:
+                return ids
+
+    def test_pages_cover_every_entry_once(self):
+        expected = list(MoodEntry.objects.filter(habit=self.habit).order_by("-date").values_list("id", flat=True))
+        self.assertEqual(self.walk(limit=7), expected)
+
+    def test_filters_combine_with_cursor(self):
+        expected = list(
+            MoodEntry.objects.filter(habit=self.habit, mood=3, yoga=False).order_by("-date").values_list("id", flat=True)
+        )
+        self.assertTrue(expected)
+        self.assertEqual(self.walk(limit=2, mood=3, yoga="no"), expected)
+
+    def test_id_breaks_ties_between_equal_dates(self):
+        # One date per habit, so many habits give many entries sharing each date
+        day = date(2026, 5, 1)
+        for index in range(6):
+            habit = Action.objects.create(user=self.user, name=f"Habit {index}")
+            MoodEntry.objects.bulk_create(
+                MoodEntry(habit=habit, date=day - timedelta(days=offset), mood=3) for offset in range(2)
+            )
+        entries = MoodEntry.objects.filter(habit__name__startswith="Habit ").order_by("-date", "-id")
+        seen, cursor = [], None
+        while True:
+            page, cursor = keyset_page(entries, cursor, limit=5)
+            seen += [entry.id for entry in page]
+            if not cursor:
+                break
+        self.assertEqual(seen, list(entries.values_list("id", flat=True)))
+
+    def test_malformed_cursor_is_rejected(self):
+        for cursor in ["yesterday", "2026-05-01", "2026-05-01_x", "2026-13-01_5", "2026-05-01_99999999999999999999999"]:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse("entries_api"), {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+
+
+class SearchTests(TestCase):
+    """The FTS5 index follows every write through its triggers, and user text never reaches FTS5 as syntax."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="searcher", password="search-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        other = User.objects.create_user(username="neighbour", password="neighbour-password")
+        cls.other_habit = Action.objects.create(user=other, name="Daily Mood")
+        record_bulk_write([cls.habit.id, cls.other_habit.id])
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def add(self, days_ago, note, habit=None):
+        entry = MoodEntry(habit=habit or self.habit, date=date.today() - timedelta(days=days_ago),
+                          mood=3, sleep_duration=3, yoga=False, note=note)
+        upsert_entries(entry.habit_id, [entry])
+        return MoodEntry.objects.get(habit=entry.habit_id, date=entry.date)
+
+    def found(self, query):
+        return [entry["note"] for entry in self.client.get(reverse("search_entries"), {"q": query}).json()["entries"]]
+
+    def test_edit_then_search(self):
+        entry = self.add(1, "Walked the dog by the river")
+        self.assertEqual(self.found("dog"), ["Walked the dog by the river"])
+
+        self.client.post(reverse("edit_entry", args=[entry.id]),
+                         {"mood": "4", "sleep_duration": "4", "yoga": "no", "note": "Read a book instead"})
+
+        self.assertEqual(self.found("dog"), [])
+        self.assertEqual(self.found("book"), ["Read a book instead"])
+
+    def test_delete_then_search(self):
+        entry = self.add(1, "Baked sourdough bread")
+        self.assertEqual(self.found("sourdough"), ["Baked sourdough bread"])
+
+        self.client.post(reverse("delete_entry", args=[entry.id]))
+
+        self.assertEqual(self.found("sourdough"), [])
+
+    def test_prefixes_accents_and_other_users(self):
+        self.add(1, "Productive morning at the café")
+        self.add(2, "Productive too", habit=self.other_habit)
+        self.assertEqual(self.found("prod"), ["Productive morning at the café"])
+        self.assertEqual(self.found("CAFE morn"), ["Productive morning at the café"])
+        self.assertEqual(self.found("productiveness"), [])
+
+    def test_operator_characters_are_plain_text(self):
+        self.add(1, 'Swam NEAR the "pier" and rested')
+        self.assertEqual(
+            build_match_query('pier" OR * NEAR(-x'),
+            'note : ("pier"* "or"* "near"* "x"*)',
+        )
+        for query in ['"pier', "pier*", "NEAR(pier", "pier AND", "-pier", "^pier", "pier:"]:
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), ['Swam NEAR the "pier" and rested'])
+        self.assertEqual(self.found('"*()'), [])
+
+    def test_ranking_best_match_then_newest(self):
+        self.add(3, "Calm")
+        self.add(2, "A long day, calm in the end but mostly busy with errands")
+        self.add(1, "Calm")
+        ranked = search_entries(self.habit.id, "calm")
+        self.assertEqual([entry.date for entry in ranked], [
+            date.today() - timedelta(days=1), date.today() - timedelta(days=3), date.today() - timedelta(days=2),
+        ])
+
+    def test_only_the_returned_rows_are_loaded(self):
+        for days_ago in range(30):
+            self.add(days_ago, f"Calm day number {days_ago}")
+        counter = RowCounter()
+        with connection.execute_wrapper(counter), self.assertNumQueries(1):
+            ranked = search_entries(self.habit.id, "calm", limit=5)
+        self.assertEqual(counter.rows, 5)
+        self.assertEqual([entry.date for entry in ranked], [date.today() - timedelta(days=i) for i in range(5)])
+
+    def test_rebuild_search_index_command(self):
+        self.add(1, "Journaled before bed")
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+        self.assertEqual(self.found("journal"), [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+
+        self.assertEqual(self.found("journal"), ["Journaled before bed"])
+
+
+class DefaultHabitResolverTests(TestCase):
+    """Once resolved, the default habit costs no query, and the cached session and user none either."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="resolver", password="resolver-password")
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+        # First visit creates the habit and caches its id
+        self.client.get(reverse("habits_tracker"))
+        self.habit = Action.objects.get(user=self.user, name="Daily Mood")
+        create_history(self.habit, 10)
+        # Warm the analytics and page caches, which only a write invalidates
+        self.client.get(reverse("mood_history"))
+
+    def test_query_counts(self):
+        expected = {
+            reverse("habits_tracker"): 2,  # stats (validators), today's entry
+            reverse("mood_history"): 1,  # stats (the page itself is cached)
+            reverse("chart_data"): 2,  # stats, range read
+            reverse("weekly_summary"): 2,  # stats, week rollups
+            reverse("all_entries"): 2,  # stats, first page
+            reverse("entries_api"): 2,  # stats, page
+        }
+        for url, count in expected.items():
+            with self.subTest(url=url), self.assertNumQueries(count):
+                self.client.get(url)
+
+    def test_session_copy_serves_other_workers(self):
+        # Another worker has an empty in-process cache but shares the session
+        forget_default_habit(self.user.pk)
+        with self.assertNumQueries(1):
+            self.client.get(reverse("mood_history"))
+
+    def test_habit_deletion_invalidates_cache(self):
+        self.habit.delete()
+        self.client.get(reverse("habits_tracker"))
+        self.assertNotEqual(Action.objects.get(user=self.user, name="Daily Mood").pk, self.habit.pk)
+
+
+class StaleDefaultHabitTests(TransactionTestCase):
+    """Another worker deleted the habit: this one's cached id is stale until it expires.
+
+    A TransactionTestCase, so writes commit and SQLite checks the
+    (deferred) foreign keys as it would in production.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="stale", password="stale-password")
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+        self.client.get(reverse("habits_tracker"))
+        self.habit_id = Action.objects.get(user=self.user, name=DEFAULT_HABIT_NAME).id
+        # Delete it as another process would: this process's cache keeps the id
+        Action.objects.filter(pk=self.habit_id).delete()
+        _habit_ids.set(self.user.pk, self.habit_id)
+
+    def test_tracker_post_writes_to_a_new_habit(self):
+        response = self.client.post(reverse("habits_tracker"), {"mood": "4", "sleep_duration": "3", "yoga": "yes"})
+        self.assertRedirects(response, reverse("habits_tracker"))
+        habit = Action.objects.get(user=self.user, name=DEFAULT_HABIT_NAME)
+        self.assertNotEqual(habit.id, self.habit_id)
+        self.assertEqual(MoodEntry.objects.get(habit=habit).mood, 4)
+
+    def test_tracker_page_creates_a_new_habit(self):
+        self.assertEqual(self.client.get(reverse("habits_tracker")).status_code, 200)
+        self.assertTrue(Action.objects.filter(user=self.user, name=DEFAULT_HABIT_NAME).exists())
+
+    def test_read_views_drop_the_stale_id(self):
+        urls = [
+            reverse("mood_history"), reverse("all_entries"), reverse("chart_data"), reverse("entries_api"),
+            reverse("sync_entries"), reverse("year_heatmap"), reverse("weekly_summary"), reverse("search_entries"),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                _habit_ids.set(self.user.pk, self.habit_id)
+                self.assertEqual(self.client.get(url).status_code, 200)
+                # Dropped from the session too: another worker would not pick it up
+                self.assertNotIn(SESSION_KEY, self.client.session)
+        self.assertFalse(HabitStats.objects.exists())
+
+    def test_read_views_drop_a_stale_session_copy(self):
+        # Another worker: nothing cached in-process, the deleted habit's id in the session
+        forget_default_habit(self.user.pk)
+        self.assertIn(SESSION_KEY, self.client.session)
+        self.assertEqual(self.client.get(reverse("entries_api")).json(), {"entries": [], "next_cursor": None})
+        self.assertNotIn(SESSION_KEY, self.client.session)
+        self.assertFalse(HabitStats.objects.exists())
+
+    def test_batch_api_writes_to_a_new_habit(self):
+        response = self.client.post(
+            reverse("batch_entries"),
+            json.dumps({"entries": [{"date": "2026-03-01", "mood": 3, "yoga": False}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"created": 1, "updated": 0})
+        self.assertEqual(MoodEntry.objects.get().habit.user, self.user)
+
+
+class SessionAuthTests(TestCase):
+    """Sessions and users are read from in-process caches, which must not outlive a password change or logout."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="sessions", password="sessions-password")
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+        self.client.get(reverse("habits_tracker"))
+
+    def test_password_change_ends_other_sessions(self):
+        self.assertEqual(self.client.get(reverse("all_entries")).status_code, 200)
+        self.user.set_password("changed-password")
+        self.user.save()
+        self.assertEqual(self.client.get(reverse("all_entries")).status_code, 302)
+
+    def test_logout_forgets_user(self):
+        self.assertIsNotNone(_users.get(self.user.pk))
+        self.client.get(reverse("logout_view"))
+        self.assertIsNone(_users.get(self.user.pk))
+        self.assertEqual(self.client.get(reverse("all_entries")).status_code, 302)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookie_sessions(self):
+        client = Client()  # SessionMiddleware picks its engine when the handler loads
+        client.force_login(self.user)
+        client.get(reverse("mood_history"))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get(reverse("mood_history")).status_code, 200)
+        self.assertFalse([query for query in queries if "django_session" in query["sql"]])
+        self.assertEqual(len(queries), 1)
+
+
+class AsyncViewTests(TestCase):
+    """The async views run on the event loop: any sync ORM access there would raise SynchronousOnlyOperation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="asyncer", password="async-password", first_name="Ada")
+        create_history(Action.objects.create(user=cls.user, name="Daily Mood"), 20)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+
+    async def test_pages_render_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        for name in ("habits_tracker", "mood_history", "all_entries"):
+            with self.subTest(view=name):
+                response = await self.async_client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "Hi, Ada!")
+
+        self.assertEqual(response.context["total_entries"], 20)
+        self.assertEqual(len(response.context["entries"]), 20)
+
+    async def test_tracker_post_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(reverse("habits_tracker"), {"mood": "2", "sleep_duration": "3", "yoga": "no"})
+        self.assertRedirects(response, reverse("habits_tracker"), fetch_redirect_response=False)
+        entry = await MoodEntry.objects.filter(habit__user=self.user, date=date.today()).aget()
+        self.assertEqual((entry.mood, entry.sleep_duration, entry.yoga), (2, 3, False))
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite pragmas")
+class ConnectionSetupTests(TestCase):
+    def test_new_connections_get_the_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+    @override_settings(SQLITE_PRAGMAS={"journal_mode": "WAL; DROP TABLE habits_moodentry"})
+    def test_rejects_malformed_pragmas(self):
+        with self.assertRaises(ImproperlyConfigured):
+            apply_sqlite_pragmas(connection)
+
+
+class WarmupTests(TestCase):
+    def test_precompiles_project_templates(self):
+        names = precompile_templates()
+        self.assertIn("base.html", names)
+        self.assertIn("habits/history.html", names)
+
+
+class StaticFilesTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_pages_load_css_and_js_from_static_files(self):
+        user = User.objects.create_user(username="assets", password="assets-password")
+        forget_default_habit(user.pk)
+        self.client.force_login(user)
+        for name in ("habits_tracker", "mood_history", "weekly_summary", "all_entries"):
+            with self.subTest(page=name):
+                html = self.client.get(reverse(name)).content.decode()
+                self.assertNotIn("<style>", html)
+                self.assertNotIn("<script>", html)
+
+    def test_collected_files_are_hashed_compressed_and_cached(self):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(
+            STATIC_ROOT=static_root,
+            STORAGES={**settings.STORAGES, "staticfiles": {
+                "BACKEND": "habits.staticfiles.CompressedManifestStaticFilesStorage",
+            }},
+        ):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            middleware = static_files_middleware(lambda request: HttpResponse("view"))
+            url = static("entries.css")
+            self.assertRegex(url, r"/entries\.[0-9a-f]{12}\.css$")
+
+            response = middleware(RequestFactory().get(url, headers={"Accept-Encoding": "gzip, br;q=0"}))
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn("immutable", response["Cache-Control"])
+            with open(finders.find("entries.css"), "rb") as f:
+                self.assertEqual(gzip.decompress(response.content), f.read())
+
+            plain = middleware(RequestFactory().get(url))
+            self.assertFalse(plain.has_header("Content-Encoding"))
+            self.assertEqual(middleware(RequestFactory().get(reverse("login_view"))).content, b"view")
+
+
+class RollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="roller", password="rollup-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 40)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def test_writes_keep_rollups_in_step(self):
+        entry = MoodEntry.objects.filter(habit=self.habit).earliest("date")
+        self.client.post(reverse("habits_tracker"), {"mood": "1", "sleep_duration": "2", "yoga": "no"})
+        self.client.post(reverse("edit_entry", args=[entry.id]), {"mood": "5", "sleep_duration": "6", "yoga": "yes"})
+        self.client.post(reverse("delete_entry", args=[MoodEntry.objects.filter(habit=self.habit).latest("date").id]))
+
+        self.assertEqual(verify_rollups([self.habit.id]), [])
+
+    def test_deleting_a_bucket_drops_its_rollup(self):
+        entry = MoodEntry.objects.filter(habit=self.habit).earliest("date")
+        week_end = entry.date + timedelta(days=6 - entry.date.weekday())
+        MoodEntry.objects.filter(habit=self.habit, date__lte=week_end).exclude(pk=entry.pk).delete()
+        record_bulk_write([self.habit.id])
+
+        self.client.post(reverse("delete_entry", args=[entry.id]))
+
+        self.assertEqual(verify_rollups([self.habit.id]), [])
+
+    def test_history_month_from_rollups(self):
+        today = date.today()
+        response = self.client.get(reverse("mood_history"), {"year": today.year, "month": today.month})
+        self.assertEqual(response.context["month_rollup"].entry_count, today.day)
+        first_day = today.replace(day=1)
+        weeks_start = first_day - timedelta(days=first_day.weekday())
+        self.assertEqual(sum(week.entry_count for week in response.context["month_weeks"]),
+                         MoodEntry.objects.filter(habit=self.habit, date__gte=weeks_start).count())
+
+    def test_weekly_summary_fills_empty_weeks(self):
+        summary = self.client.get(reverse("weekly_summary"), {"weeks": 10}).context["summary"]
+        self.assertEqual(len(summary), 10)
+        self.assertEqual(sum(week["entries"] for week in summary), 40)
+        self.assertEqual(summary[0]["entries"], 0)
+
+
+class AnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="analyst", password="analytics-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 90)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def test_matches_per_entry_computation(self):
+        entries = list(MoodEntry.objects.filter(habit=self.habit))
+        result = analyse(load_entries(self.habit.id))
+
+        mood = [entry.mood for entry in entries]
+        sleep = [entry.sleep_duration for entry in entries]
+        self.assertEqual(result["entries"], 90)
+        self.assertAlmostEqual(result["sleep_vs_mood"]["pearson"], np.corrcoef(sleep, mood)[0, 1], places=3)
+        yoga_moods = [entry.mood for entry in entries if entry.yoga]
+        self.assertEqual(result["yoga"]["days"], len(yoga_moods))
+        self.assertAlmostEqual(result["yoga"]["avg_mood"], sum(yoga_moods) / len(yoga_moods), places=2)
+        for weekday in result["by_weekday"]:
+            day_moods = [entry.mood for entry in entries if entry.date.strftime("%A") == weekday["weekday"]]
+            self.assertEqual(weekday["entries"], len(day_moods))
+            self.assertAlmostEqual(weekday["avg_mood"], sum(day_moods) / len(day_moods), places=2)
+
+    def test_cached_until_the_next_write(self):
+        self.assertEqual(self.client.get(reverse("mood_history")).context["analytics"]["entries"], 90)
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse("mood_history"))
+        self.assertFalse([query for query in captured.captured_queries if "group_concat" in query["sql"]])
+
+        MoodEntry.objects.filter(habit=self.habit).latest("date").delete()
+        self.client.post(reverse("habits_tracker"), {"mood": "5", "sleep_duration": "6", "yoga": "yes"})
+
+        # Today's entry is now a yoga day, which it was not before
+        analytics = self.client.get(reverse("mood_history")).context["analytics"]
+        self.assertEqual(analytics["entries"], 90)
+        self.assertEqual(analytics["yoga"]["days"], 31)
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cacher", password="cache-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 30)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def test_pages_are_served_from_cache(self):
+        for url, params in ((reverse("mood_history"), {}), (reverse("all_entries"), {"mood": "3"})):
+            with self.subTest(url=url):
+                first = self.client.get(url, params)
+                self.assertIsNotNone(first.context)
+                second = self.client.get(url, params)
+                self.assertIsNone(second.context)  # nothing was rendered
+                self.assertEqual(second.content, first.content)
+                # Other parameters are another page
+                self.assertIsNotNone(self.client.get(url, {"mood": "4", "year": 2020, "month": 1}).context)
+
+    def test_writes_invalidate_cached_pages(self):
+        self.client.get(reverse("mood_history"))
+        self.client.get(reverse("all_entries"))
+        entry = MoodEntry.objects.filter(habit=self.habit).earliest("date")
+
+        writes = [
+            lambda: self.client.post(reverse("edit_entry", args=[entry.id]), {"mood": "5", "sleep_duration": "6", "yoga": "yes"}),
+            lambda: self.client.post(reverse("delete_entry", args=[entry.id])),
+            lambda: record_bulk_write([self.habit.id]),
+        ]
+        for write in writes:
+            write()
+            self.assertIsNotNone(self.client.get(reverse("mood_history")).context)
+            self.assertIsNotNone(self.client.get(reverse("all_entries")).context)
+
+        self.assertEqual(self.client.get(reverse("all_entries")).content.count(b"Felt productive"),
+                         MoodEntry.objects.filter(habit=self.habit, note__startswith="Felt").count())
+
+    def test_flash_messages_are_not_cached(self):
+        self.client.get(reverse("mood_history"))
+        self.client.post(reverse("habits_tracker"), {"mood": "2", "sleep_duration": "3", "yoga": "no"})
+        self.assertContains(self.client.get(reverse("mood_history")), "Entry updated!")
+        self.assertNotContains(self.client.get(reverse("mood_history")), "Entry updated!")
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="revisitor", password="revisit-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 30)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def test_unchanged_pages_answer_304(self):
+        urls = [reverse(name) for name in (
+            "habits_tracker", "mood_history", "weekly_summary", "chart_data", "all_entries", "entries_api",
+        )] + [f"{reverse('search_entries')}?q=calm"]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("private", response["Cache-Control"])
+
+                revisit = self.client.get(url, headers={"If-None-Match": response["ETag"]})
+                self.assertEqual(revisit.status_code, 304)
+                self.assertEqual(revisit.content, b"")
+                self.assertEqual(revisit["ETag"], response["ETag"])
+
+                since = self.client.get(url, headers={"If-Modified-Since": response["Last-Modified"]})
+                self.assertEqual(since.status_code, 304)
+
+    def test_write_changes_the_validators(self):
+        etag = self.client.get(reverse("all_entries"))["ETag"]
+        entry = MoodEntry.objects.filter(habit=self.habit).earliest("date")
+        self.client.post(reverse("edit_entry", args=[entry.id]), {"mood": "5", "sleep_duration": "6", "yoga": "yes"})
+
+        # The first page shows the flash message and carries no validators
+        response = self.client.get(reverse("all_entries"), headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+        response = self.client.get(reverse("all_entries"), headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(MoodEntry.objects.get(pk=entry.pk).updated_at.date(), date.today())
+
+
+class ChartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="charter", password="chart-password")
+        create_history(Action.objects.create(user=cls.user, name="Daily Mood"), 400)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def test_short_range_is_not_downsampled(self):
+        data = self.client.get(reverse("chart_data"), {"range": "30d"}).json()
+        self.assertEqual(data["total"], 30)
+        self.assertEqual(len(data["series"]["mood"]), 30)
+        self.assertEqual(data["series"]["mood"][-1][0], date.today().isoformat())
+
+    def test_long_range_is_downsampled(self):
+        for method in ("avg", "lttb"):
+            with self.subTest(method=method):
+                data = self.client.get(reverse("chart_data"), {"range": "all", "points": 50, "method": method}).json()
+                self.assertEqual(data["total"], 400)
+                for name, series in data["series"].items():
+                    self.assertEqual(len(series), 50, name)
+                    self.assertEqual(series, sorted(series))
+
+    def test_lttb_keeps_extremes(self):
+        start = date(2024, 1, 1)
+        points = [(start + timedelta(days=i), 3) for i in range(100)]
+        points[41] = (points[41][0], 5)
+        sampled = lttb(points, 10)
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual((sampled[0], sampled[-1]), (points[0], points[-1]))
+        self.assertIn(points[41], sampled)
+
+
+class BenchmarkingTests(TestCase):
+    def test_measure_counts_rows_fetched(self):
+        user = User.objects.create_user(username="bencher", password="bench-password")
+        create_history(Action.objects.create(user=user, name="Daily Mood"), 12)
+
+        result = measure(lambda: list(MoodEntry.objects.all()[:10]) + [MoodEntry.objects.count()], repeat=3)
+
+        self.assertEqual(result["queries"], 2)
+        self.assertEqual(result["rows"], 11)
+        # Sub-millisecond queries still add up to some SQL time
+        self.assertGreater(result["sql_ms"], 0)
+        self.assertLessEqual(result["p50"], result["p95"])
+        self.assertLessEqual(result["p95"], result["p99"])
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="exporter", password="export-password")
+        create_history(Action.objects.create(user=cls.user, name="Daily Mood"), 10)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse("export_entries"), params)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        lines = self.export(format="csv").splitlines()
+        self.assertEqual(lines[0], "date,mood,sleep_duration,yoga,note")
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(lines[1], f"{date.today() - timedelta(days=9)},1,1,yes,Felt productive and calm.")
+
+    def test_ndjson_date_range(self):
+        start = date.today() - timedelta(days=2)
+        records = [json.loads(line) for line in self.export(format="ndjson", start=start.isoformat()).splitlines()]
+        self.assertEqual([record["date"] for record in records],
+                         [(start + timedelta(days=i)).isoformat() for i in range(3)])
+        self.assertIs(records[0]["yoga"], False)
+
+    async def test_asgi_streams_from_an_async_iterator(self):
+        expected = await sync_to_async(self.export)(format="csv")
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(reverse("export_entries"), {"format": "csv"})
+        # Served as is: a sync iterator would be read into a list first
+        self.assertTrue(response.is_async)
+        self.assertEqual(b"".join([chunk async for chunk in response.streaming_content]).decode(), expected)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(reverse("export_entries"), {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("export_entries"), {"start": "2024-13-01"}).status_code, 400)
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="importer", password="import-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 3)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def upload(self, name, content):
+        return self.client.post(
+            reverse("import_entries"),
+            {"file": SimpleUploadedFile(name, content.encode())},
+            HTTP_ACCEPT="application/json",
+        ).json()
+
+    def test_csv_upserts_by_date(self):
+        today = date.today()
+        result = self.upload("entries.csv", (
+            "date,mood,sleep_duration,yoga,note\n"
+            f"{today},5,6,yes,\"Imported, with a comma\"\n"
+            "2020-01-01,2,,no,\n"
+            "2020-01-02,7,1,no,\n"
+            "not-a-date,3,1,no,\n"
+        ))
+
+        self.assertEqual(result["imported"], 2)
+        self.assertEqual(result["invalid"], 2)
+        self.assertEqual(result["errors"][0], "line 4: mood must be one of [1, 2, 3, 4, 5], got 7")
+        updated = MoodEntry.objects.get(habit=self.habit, date=today)
+        self.assertEqual((updated.mood, updated.sleep_duration, updated.note), (5, 6, "Imported, with a comma"))
+        self.assertIsNone(MoodEntry.objects.get(habit=self.habit, date=date(2020, 1, 1)).sleep_duration)
+        self.assertEqual(self.habit.stats.entry_count, 4)
+
+    def test_rejects_non_utf8_file(self):
+        response = self.client.post(
+            reverse("import_entries"),
+            {"file": SimpleUploadedFile("entries.csv", "date,mood,sleep_duration,yoga,note\n2020-01-01,3,2,no,Café\n".encode("latin-1"))},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not UTF-8", response.json()["error"])
+        self.assertFalse(MoodEntry.objects.filter(habit=self.habit, date=date(2020, 1, 1)).exists())
+
+    def test_command_rejects_unreadable_files(self):
+        header = "date,mood,sleep_duration,yoga,note\n"
+        cases = {
+            "not UTF-8": (header + "2020-01-01,3,2,no,Café\n").encode("latin-1"),
+            "not valid CSV": (header + "2020-01-01,3,2,no," + "x" * 200000 + "\n").encode(),
+        }
+        for message, content in cases.items():
+            with self.subTest(message), tempfile.NamedTemporaryFile(suffix=".csv") as f:
+                f.write(content)
+                f.flush()
+                with self.assertRaisesMessage(CommandError, message):
+                    call_command("import_entries", f.name, username=self.user.username, stdout=StringIO())
+        self.assertFalse(MoodEntry.objects.filter(habit=self.habit, date=date(2020, 1, 1)).exists())
+
+    def test_ndjson_round_trip(self):
+        exported = b"".join(self.client.get(reverse("export_entries"), {"format": "ndjson"}).streaming_content)
+        MoodEntry.objects.filter(habit=self.habit).delete()
+
+        result = self.upload("entries.ndjson", exported.decode() + "\n[1, 2]\n")
+
+        self.assertEqual((result["imported"], result["invalid"]), (3, 1))
+        self.assertEqual(MoodEntry.objects.filter(habit=self.habit, note="Felt productive and calm.").count(), 1)
+
+
+class UpsertTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="upserter", password="upsert-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 3)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def assertBookkeepingConsistent(self):
+        self.assertEqual(verify_stats([self.habit.id]), [])
+        self.assertEqual(verify_rollups([self.habit.id]), [])
+
+    def test_tracker_double_submit_updates_todays_entry(self):
+        for mood in ("2", "4"):
+            self.client.post(reverse("habits_tracker"), {"mood": mood, "sleep_duration": "3", "yoga": "no"})
+
+        self.assertEqual(MoodEntry.objects.get(habit=self.habit, date=date.today()).mood, 4)
+        self.assertEqual(MoodEntry.objects.filter(habit=self.habit).count(), 3)
+        self.assertBookkeepingConsistent()
+
+    def post_batch(self, entries):
+        return self.client.post(reverse("batch_entries"), {"entries": entries}, content_type="application/json")
+
+    def test_batch_upserts_every_day_in_one_request(self):
+        today = date.today()
+        response = self.post_batch([
+            {"date": str(today), "mood": 1, "sleep_duration": 2, "yoga": "no", "note": "Queued offline."},
+            {"date": "2020-01-01", "mood": 5, "yoga": True},
+            {"date": "2020-01-02", "mood": 3, "sleep_duration": 4, "yoga": "yes"},
+        ])
+
+        self.assertEqual(response.json(), {"created": 2, "updated": 1})
+        self.assertEqual(MoodEntry.objects.get(habit=self.habit, date=today).note, "Queued offline.")
+        self.assertEqual(self.habit.stats.entry_count, 5)
+        self.assertBookkeepingConsistent()
+
+    def test_invalid_batch_saves_nothing(self):
+        response = self.post_batch([
+            {"date": "2020-01-01", "mood": 5, "yoga": "no"},
+            {"date": "2020-01-02", "mood": 9, "yoga": "no"},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], ["entries[1]: mood must be one of [1, 2, 3, 4, 5], got 9"])
+        self.assertFalse(MoodEntry.objects.filter(habit=self.habit, date__year=2020).exists())
+
+
+class SyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="syncer", password="sync-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 3)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def sync(self, **params):
+        return self.client.get(reverse("sync_entries"), params).json()
+
+    def test_delta_after_full_sync_holds_only_the_changes(self):
+        full = self.sync()
+        self.assertEqual(len(full["changes"]), 3)
+        self.assertFalse(full["has_more"])
+
+        oldest, newest = MoodEntry.objects.filter(habit=self.habit).order_by("date")[::2]
+        self.client.post(reverse("edit_entry", args=[newest.id]), {"mood": "1", "sleep_duration": "2", "yoga": "no"})
+        self.client.post(reverse("delete_entry", args=[oldest.id]))
+
+        delta = self.sync(since=full["next_cursor"])
+        self.assertEqual(
+            [(change["id"], change["deleted"]) for change in delta["changes"]],
+            [(newest.id, False), (oldest.id, True)],
+        )
+        self.assertEqual(delta["changes"][0]["mood"], 1)
+
+        caught_up = self.sync(since=delta["next_cursor"])
+        self.assertEqual((caught_up["changes"], caught_up["next_cursor"]), ([], delta["next_cursor"]))
+
+    def test_pages_through_changes(self):
+        first = self.sync(limit=2)
+        second = self.sync(since=first["next_cursor"], limit=2)
+
+        self.assertTrue(first["has_more"])
+        self.assertFalse(second["has_more"])
+        ids = [change["id"] for change in first["changes"] + second["changes"]]
+        self.assertCountEqual(ids, MoodEntry.objects.filter(habit=self.habit).values_list("id", flat=True))
+
+    def test_deletes_outside_the_view_leave_tombstones(self):
+        full = self.sync()
+        first, second, _ = MoodEntry.objects.filter(habit=self.habit).order_by("date")
+        deleted_ids = [first.id, second.id]
+        first.delete()  # as the admin does
+        MoodEntry.objects.filter(id=second.id).delete()  # as commands do
+
+        delta = self.sync(since=full["next_cursor"])
+        self.assertCountEqual(
+            [(change["id"], change["deleted"]) for change in delta["changes"]],
+            [(entry_id, True) for entry_id in deleted_ids],
+        )
+
+    def test_deleting_the_habit_starts_a_new_feed(self):
+        full = self.sync()
+        self.habit.delete()
+        forget_default_habit(self.user.pk)
+        self.client.get(reverse("habits_tracker"))  # creates the new default habit
+
+        fresh = self.sync(since=full["next_cursor"])
+        self.assertNotEqual(fresh["habit_id"], full["habit_id"])
+        self.assertFalse(DeletedEntry.objects.exists())
+
+    def test_rejects_malformed_cursor(self):
+        response = self.client.get(reverse("sync_entries"), {"since": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SeedEntriesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="gardener", password="garden-password")
+
+    def seed(self, *args, **options):
+        out = StringIO()
+        call_command("seed_entries", *args, stdout=out, **options)
+        return out.getvalue()
+
+    def rows(self):
+        return list(
+            MoodEntry.objects.filter(habit__user=self.user).order_by("date")
+            .values_list("date", "mood", "yoga", "sleep_duration", "note")
+        )
+
+    def test_same_seed_gives_same_rows(self):
+        self.seed(username="gardener", days=30, seed=11)
+        first = self.rows()
+        self.seed(username="gardener", days=30, seed=11, overwrite=True)
+        self.assertEqual(len(first), 30)
+        self.assertEqual(self.rows(), first)
+
+    def test_existing_dates_are_skipped_unless_overwritten(self):
+        habit = Action.objects.create(user=self.user, name=DEFAULT_HABIT_NAME)
+        mine = MoodEntry.objects.create(habit=habit, date=date.today(), mood=1, note="My own entry")
+
+        output = self.seed(username="gardener", days=5, seed=1)
+        self.assertIn("Created: 4, Skipped: 1", output)
+        self.assertEqual(MoodEntry.objects.get(id=mine.id).note, "My own entry")
+
+        self.seed(username="gardener", days=5, seed=1, overwrite=True)
+        self.assertFalse(MoodEntry.objects.filter(id=mine.id).exists())
+        self.assertEqual(MoodEntry.objects.filter(habit=habit).count(), 5)
+        # Sync clients are told about every replaced entry
+        self.assertEqual(DeletedEntry.objects.filter(habit=habit).count(), 5)
+
+    def test_timestamps_are_stored_like_the_orm_stores_them(self):
+        started = timezone.now()
+        self.seed(username="gardener", days=3, seed=4)
+        habit = Action.objects.get(user=self.user)
+        mine = MoodEntry.objects.create(habit=habit, date=date(2020, 1, 1), mood=3)
+        # The sync cursor orders by the stored value: seeded rows come before a later write
+        changed = MoodEntry.objects.filter(habit=habit).order_by("updated_at", "id").values_list("id", flat=True)
+        self.assertEqual(list(changed)[-1], mine.id)
+        for entry in MoodEntry.objects.filter(habit=habit).exclude(id=mine.id):
+            self.assertTrue(started <= entry.updated_at <= mine.updated_at)
+
+    def test_synthetic_users_come_with_derived_data_in_step(self):
+        self.seed(users=3, user_prefix="bulk", days=20, seed=2)
+        habit_ids = list(Action.objects.filter(user__username__startswith="bulk").values_list("id", flat=True))
+        self.assertEqual(len(habit_ids), 3)
+        self.assertEqual(MoodEntry.objects.filter(habit_id__in=habit_ids).count(), 60)
+        self.assertEqual(verify_stats(habit_ids), [])
+        self.assertEqual(verify_rollups(habit_ids), [])
+        self.assertEqual(verify_streaks(habit_ids), [])
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="metrics", password="metrics-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 10)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        for histogram in HISTOGRAMS:
+            histogram.clear()
+        self.client.force_login(self.user)
+
+    def test_server_timing_counts_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("mood_history"))
+        timing = response.headers["Server-Timing"]
+        self.assertIn(f'desc="{len(queries)} queries"', timing)
+        self.assertIn("tpl;dur=", timing)
+        self.assertIn("total;dur=", timing)
+
+    def test_metrics_exposes_view_histograms(self):
+        self.client.get(reverse("all_entries"))
+        response = self.client.get(reverse("metrics"))
+        body = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn('habits_request_duration_seconds_count{view="all_entries"} 1', body)
+        self.assertIn('habits_request_queries_bucket{view="all_entries",le="+Inf"} 1', body)
+        self.assertIn('habits_response_bytes_count{view="all_entries"} 1', body)
+
+    def test_metrics_forbidden_to_other_addresses(self):
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=[], METRICS_TOKEN="scrape-secret")
+    def test_metrics_bearer_token(self):
+        self.client.logout()
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer wrong"}).status_code, 403)
+        self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer scrape-secret"}).status_code, 200)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_timed(self):
+        response = self.client.get(reverse("mood_history"))
+        self.assertNotIn("Server-Timing", response.headers)
+        self.assertNotIn('view="mood_history"', self.client.get(reverse("metrics")).content.decode())
+
+
+class YearHeatmapTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="heatmap", password="heatmap-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        create_history(cls.habit, 40)
+
+    def setUp(self):
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+
+    def year(self, year):
+        payload = self.client.get(reverse("year_heatmap"), {"year": year}).json()
+        return payload, base64.b64decode(payload["data"])
+
+    def test_packs_every_entry_of_the_year(self):
+        today = date.today()
+        payload, days = self.year(today.year)
+        self.assertEqual(len(days), YEAR_SLOTS)
+        self.assertEqual(payload["days"], (date(today.year, 12, 31) - date(today.year, 1, 1)).days + 1)
+        for entry in MoodEntry.objects.filter(habit=self.habit, date__year=today.year):
+            self.assertEqual(
+                unpack_day(days[entry.date.timetuple().tm_yday - 1]),
+                (entry.mood, entry.sleep_duration, entry.yoga),
+            )
+        self.assertEqual(sum(map(bool, days)), MoodEntry.objects.filter(habit=self.habit, date__year=today.year).count())
+
+    def test_unpack_round_trip(self):
+        self.assertEqual(unpack_day(pack_day(5, 6, True)), (5, 6, True))
+        self.assertEqual(unpack_day(pack_day(1, None, False)), (1, None, False))
+        self.assertIsNone(unpack_day(0))
+
+    def test_write_invalidates_cached_year(self):
+        today = date.today()
+        self.year(today.year)
+        self.client.post(reverse("habits_tracker"), {"mood": "2", "sleep_duration": "1", "yoga": "no"})
+        _, days = self.year(today.year)
+        self.assertEqual(unpack_day(days[today.timetuple().tm_yday - 1]), (2, 1, False))
+
+    def test_cached_year_takes_one_query(self):
+        self.client.get(reverse("habits_tracker"))
+        self.year(2020)
+        with self.assertNumQueries(1):
+            _, days = self.year(2020)
+        self.assertFalse(any(days))
+
+
+class StreakTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="streaks", password="streaks-password")
+        cls.habit = Action.objects.create(user=cls.user, name="Daily Mood")
+        record_bulk_write([cls.habit.id])
+
+    def stored(self):
+        return HabitStats.objects.values(*STREAK_FIELDS).get(habit=self.habit)
+
+    def write(self, day, yoga):
+        upsert_entries(self.habit.id, [MoodEntry(habit=self.habit, date=day, mood=3, sleep_duration=3, yoga=yoga)])
+
+    def delete(self, entry):
+        with transaction.atomic():
+            entry.delete()
+            record_entry_write(self.habit.id, before=entry_state(entry))
+
+    def test_incremental_updates_match_a_recount(self):
+        rng = random.Random(7)
+        start = date(2026, 1, 1)
+        for step in range(300):
+            day = start + timedelta(days=rng.randrange(60))
+            entry = MoodEntry.objects.filter(habit=self.habit, date=day).first()
+            if entry and rng.random() < 0.4:
+                self.delete(entry)
+            else:
+                self.write(day, rng.random() < 0.6)
+            with self.subTest(step=step, day=day):
+                self.assertEqual(self.stored(), compute_streaks([self.habit.id])[self.habit.id])
+
+    def test_extending_or_shortening_the_latest_run_reads_nothing(self):
+        end = date(2026, 3, 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(add_day(self.habit.id, "log", (4, end, 9, 1), end + timedelta(days=1)), (5, end + timedelta(days=1), 9, 1))
+            self.assertEqual(remove_day(self.habit.id, "log", (4, end, 9, 1), end), (3, end - timedelta(days=1), 9, 1))
+            self.assertEqual(remove_day(self.habit.id, "log", (9, end, 9, 2), end), (8, end - timedelta(days=1), 9, 1))
+
+    def test_deleting_from_one_of_two_best_runs_reads_only_its_neighbourhood(self):
+        start = date(2026, 1, 1)
+        for offset in [*range(5), *range(10, 15)]:
+            self.write(start + timedelta(days=offset), False)
+        self.assertEqual(self.stored()["log_streak_best_runs"], 2)
+
+        entry = MoodEntry.objects.get(habit=self.habit, date=start + timedelta(days=2))
+        entry.delete()
+        streak = (5, start + timedelta(days=14), 5, 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(remove_day(self.habit.id, "log", streak, entry.date), streak[:3] + (1,))
+        # The last run that long: the best is recounted
+        entry = MoodEntry.objects.get(habit=self.habit, date=start + timedelta(days=12))
+        entry.delete()
+        self.assertEqual(
+            remove_day(self.habit.id, "log", streak[:3] + (1,), entry.date),
+            (2, start + timedelta(days=14), 2, 4),
+        )
+
+    def test_tracker_shows_current_streaks(self):
+        create_history(self.habit, 5)
+        clear_caches()
+        forget_default_habit(self.user.pk)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("habits_tracker"))
+        self.assertContains(response, "<strong>5</strong> days in a row")
+
+    def test_rebuild_streaks_command(self):
+        create_history(self.habit, 12)
+        HabitStats.objects.filter(habit=self.habit).update(log_streak=1, log_streak_best=1)
+        self.assertTrue(verify_streaks([self.habit.id]))
+        call_command("rebuild_streaks", stdout=StringIO())
+        self.assertEqual(verify_streaks([self.habit.id]), [])
+        self.assertEqual(self.stored()["log_streak_best"], 12)
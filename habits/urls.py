@@ -7,7 +7,17 @@ urlpatterns = [
     path('login/', views.login_view, name='login_view'),
     path('logout/', views.logout_view, name='logout_view'),
     path('history/', views.mood_history, name='mood_history'),
+    path('history/weekly/', views.weekly_summary, name='weekly_summary'),
+    path('history/chart/', views.chart_data, name='chart_data'),
+    path('history/year/', views.year_heatmap, name='year_heatmap'),
     path('entries/', views.all_entries, name='all_entries'),
+    path('entries/api/', views.entries_api, name='entries_api'),
+    path('entries/search/', views.search_entries_api, name='search_entries'),
+    path('entries/export/', views.export_entries, name='export_entries'),
+    path('entries/import/', views.import_entries, name='import_entries'),
+    path('entries/batch/', views.batch_entries_api, name='batch_entries'),
+    path('sync/', views.sync_entries, name='sync_entries'),
     path('edit/<int:entry_id>/', views.edit_entry, name='edit_entry'),
+    path('metrics', views.metrics, name='metrics'),  # Prometheus' default scrape path
     path('delete/<int:entry_id>/', views.delete_entry, name='delete_entry'),
 ]
\ No newline at end of file
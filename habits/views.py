@@ -3,19 +3,59 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db import IntegrityError
-from .models import Action, MoodEntry
-from datetime import date
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.utils.crypto import constant_time_compare
+from asgiref.sync import sync_to_async
+from .charts import (
+    CHART_METHODS, CHART_RANGES, DEFAULT_POINTS, DEFAULT_RANGE, MAX_POINTS, chart_rows, chart_series,
+)
+from .entries import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, akeyset_page, entry_filters, filter_entries, keyset_page, serialize_entry,
+)
+from .exports import EXPORT_FORMATS, aexport_lines, aexport_rows, export_lines, export_rows, parse_export_range
+from .heatmap import YEAR_SLOTS, habit_year
+from .imports import MAX_BATCH_ENTRIES, MAX_ERRORS, build_entries, clean_batch, detect_format, import_records
+from .metrics import render_metrics
+from .models import MoodEntry
+from .pages import UserPage
+from .resolvers import (
+    aget_default_habit_id, aget_default_habit_stats, awith_default_habit,
+    get_default_habit_id, get_default_habit_stats, with_default_habit,
+)
+from .rollups import DEFAULT_SUMMARY_WEEKS, MAX_SUMMARY_WEEKS, amonth_rollups, recent_weeks, serialize_rollup, week_start
+from .search import search_entries
+from .stats import aget_habit_stats
+from .streaks import current_streaks
+from .sync import DEFAULT_SYNC_LIMIT, MAX_SYNC_LIMIT, changes_since
+from .writes import entry_state, record_entry_write, upsert_entries
+from datetime import date, timedelta
+import asyncio
+import base64
 import calendar
+import codecs
+import csv
 import json
 
-def habits_tracker(request):
+async def _auser(request):
+    """The request's user, loaded without blocking the event loop.
+
+    It also replaces the lazy request.user, so templates (the navbar's
+    `user`) read the loaded user instead of querying synchronously.
+    """
+    request.user = await request.auser()
+    return request.user
+
+
+async def habits_tracker(request):
     """Main mood tracker page"""
     # Check if user is authenticated
-    if not request.user.is_authenticated:
+    user = await _auser(request)
+    if not user.is_authenticated:
         # Check if any users exist in the system (first time app usage)
-        if not User.objects.exists():
+        if not await User.objects.aexists():
             # First time using the app - redirect to signup
             messages.info(request, 'Welcome to Do Your Best! 🌟 Create your account to start your wellness journey.')
             return redirect('signup_view')
@@ -24,12 +64,6 @@ def habits_tracker(request):
             messages.info(request, 'Please log in to access your habit tracker.')
             return redirect('login_view')
     
-    # Get or create the default habit for this user
-    action, created = Action.objects.get_or_create(
-        user=request.user,
-        name="Daily Mood"
-    )
-    
     if request.method == 'POST':
         mood = request.POST.get('mood')
         sleep_duration = request.POST.get('sleep_duration')
@@ -47,60 +81,66 @@ def habits_tracker(request):
         # Get today's date
         today = date.today()
         
-        # Check if entry already exists for today
-        existing_entry = MoodEntry.objects.filter(
-            habit=action,
-            date=today
-        ).first()
-        
-        if existing_entry:
-            # Update existing entry
-            existing_entry.mood = int(mood)
-            existing_entry.sleep_duration = int(sleep_duration)
-            existing_entry.yoga = yoga_bool
-            existing_entry.note = note
-            existing_entry.save()
-            messages.success(request, '🌟 Entry updated! You\'re doing your best! 🌟')
-        else:
-            # Create new mood entry
-            MoodEntry.objects.create(
-                habit=action,
+        # Create or update today's entry in one upsert (a double submit just
+        # updates it). Transactions are sync only: the write and its
+        # bookkeeping run in one thread hop.
+        def save(habit_id):
+            entry = MoodEntry(
+                habit_id=habit_id,
                 date=today,
                 mood=int(mood),
                 sleep_duration=int(sleep_duration),
                 yoga=yoga_bool,
-                note=note
+                note=note,
             )
+            return upsert_entries(habit_id, [entry])
+        
+        # Into the default habit, created if needed (cached, usually no query)
+        created = await awith_default_habit(request, sync_to_async(save))
+        if created:
             messages.success(request, '🌟 Entry saved! You\'re doing your best! 🌟')
+        else:
+            messages.success(request, '🌟 Entry updated! You\'re doing your best! 🌟')
         
         return redirect('habits_tracker')
     
     # Get today's date
     today = date.today()
     
+    # Unchanged since the browser's copy? (one primary-key read, no entries).
+    # The first visit creates the default habit and its stats row.
+    habit_id, habit_stats = await aget_default_habit_stats(request)
+    if habit_id is None:
+        habit_id = await aget_default_habit_id(request, create=True)
+        habit_stats = await aget_habit_stats(habit_id)
+    page = UserPage(request, 'tracker', habit_stats, today=today)
+    not_modified = page.not_modified()
+    if not_modified:
+        return not_modified
+    
     # Check if user already has an entry for today
-    today_entry = MoodEntry.objects.filter(
-        habit=action,
+    today_entry = await MoodEntry.objects.filter(
+        habit_id=habit_id,
         date=today
-    ).first()
+    ).afirst()
     
     context = {
-        'username': request.user.first_name or request.user.username,
+        'username': user.first_name or user.username,
         'today': today,
         'today_entry': today_entry,
+        # Stored on the stats row read above: no query of their own
+        'streaks': current_streaks(habit_stats, today),
     }
     
-    return render(request, 'habits/index.html', context)
+    return page.add_validators(render(request, 'habits/index.html', context))
 
 
 @login_required
-def mood_history(request):
+async def mood_history(request):
     """View mood history with monthly calendar"""
-    # Get the user's Daily Mood habit
-    try:
-        habit = Action.objects.get(user=request.user, name="Daily Mood")
-    except Action.DoesNotExist:
-        habit = None
+    user = await _auser(request)
+    # Get the user's Daily Mood habit and its running totals
+    habit_id, habit_stats = await aget_default_habit_stats(request)
     
     # Get year and month from request, default to current
     year = request.GET.get('year')
@@ -125,34 +165,42 @@ def mood_history(request):
         month = 1
         year += 1
     
-    # Get all entries for this user (for overall stats)
-    all_entries = []
-    if habit:
-        all_entries = MoodEntry.objects.filter(habit=habit).order_by('-date')
-    
-    # Get entries for the current month
-    month_entries = []
-    if habit:
-        first_day = date(year, month, 1)
-        last_day = date(year, month, calendar.monthrange(year, month)[1])
-        month_entries = MoodEntry.objects.filter(
-            habit=habit,
-            date__gte=first_day,
-            date__lte=last_day
-        ).order_by('date')
-    
-    # Calculate statistics (based on all entries)
+    # Calculate statistics (based on all entries) from the running totals
     stats = {
-        'total_entries': len(all_entries),
+        'total_entries': 0,
         'avg_mood': 0,
         'avg_sleep': 0,
         'yoga_count': 0,
     }
+    month_rollup = None
+    month_weeks = []
+    analytics = None
+    page = None
     
-    if all_entries:
-        stats['avg_mood'] = sum(e.mood for e in all_entries) / len(all_entries)
-        stats['avg_sleep'] = sum(e.sleep_duration for e in all_entries) / len(all_entries)
-        stats['yoga_count'] = sum(1 for e in all_entries if e.yoga)
+    if habit_id:
+        # Unchanged since the browser's copy, or rendered and cached since the last write
+        page = UserPage(request, 'history', habit_stats, year=year, month=month)
+        cached = page.not_modified() or await page.aget_cached()
+        if cached:
+            return cached
+        
+        stats['total_entries'] = habit_stats.entry_count
+        stats['avg_mood'] = habit_stats.avg_mood
+        stats['avg_sleep'] = habit_stats.avg_sleep
+        stats['yoga_count'] = habit_stats.yoga_count
+        
+        # Correlations over the whole history (cached per version too) and
+        # the month's rollups are independent reads. analytics pulls in NumPy,
+        # so it is imported on the first history page rather than at startup.
+        from .analytics import habit_analytics
+        load_analytics = (
+            sync_to_async(habit_analytics)(habit_id, habit_stats.version)
+            if habit_stats.entry_count else asyncio.sleep(0)
+        )
+        analytics, (month_rollup, month_weeks) = await asyncio.gather(
+            load_analytics,
+            amonth_rollups(habit_id, year, month),
+        )
     
     # Calculate previous and next month
     prev_month = month - 1
@@ -167,71 +215,13 @@ def mood_history(request):
         next_month = 1
         next_year += 1
     
-    # Serialize entries to JSON for JavaScript
-    entries_json = json.dumps([
-        {
-            'date': entry.date.strftime('%Y-%m-%d'),
-            'mood': entry.mood,
-            'sleep': entry.sleep_duration,
-            'yoga': entry.yoga,
-            'note': entry.note
-        }
-        for entry in all_entries
-    ])
-    
-    month_entries_json = json.dumps([
-        {
-            'date': entry.date.strftime('%Y-%m-%d'),
-            'mood': entry.mood,
-            'sleep': entry.sleep_duration,
-            'yoga': entry.yoga,
-            'note': entry.note
-        }
-        for entry in month_entries
-    ])
-    
-    # Create Django data for JavaScript
-    django_data = {
-        'currentYear': year,
-        'currentMonth': month,
-        'prevYear': prev_year,
-        'prevMonth': prev_month,
-        'nextYear': next_year,
-        'nextMonth': next_month,
-        'avgMood': round(stats['avg_mood'], 1) if stats['avg_mood'] else 0,
-        'avgSleep': round(stats['avg_sleep'], 1) if stats['avg_sleep'] else 0,
-        'yogaCount': stats['yoga_count'],
-        'hasEntries': len(all_entries) > 0,
-        'allEntries': [
-            {
-                'date': entry.date.strftime('%Y-%m-%d'),
-                'mood': entry.mood,
-                'sleep': entry.sleep_duration,
-                'yoga': entry.yoga,
-                'note': entry.note
-            }
-            for entry in all_entries
-        ],
-        'monthEntries': [
-            {
-                'date': entry.date.strftime('%Y-%m-%d'),
-                'mood': entry.mood,
-                'sleep': entry.sleep_duration,
-                'yoga': entry.yoga,
-                'note': entry.note
-            }
-            for entry in month_entries
-        ]
-    }
-    
+    # The template renders the month's rollups itself; the charts fetch their data
     context = {
-        'entries': all_entries,
-        'month_entries': month_entries,
-        'entries_json': entries_json,
-        'month_entries_json': month_entries_json,
-        'django_data_json': django_data,
-        'username': request.user.first_name or request.user.username,
+        'month_rollup': month_rollup,
+        'month_weeks': month_weeks,
+        'username': user.first_name or user.username,
         'stats': stats,
+        'analytics': analytics,
         'current_year': year,
         'current_month': month,
         'current_month_name': calendar.month_name[month],
@@ -241,34 +231,339 @@ def mood_history(request):
         'next_month': next_month,
     }
     
-    return render(request, 'habits/history.html', context)
+    response = render(request, 'habits/history.html', context)
+    if page:
+        response = await page.acache(response)
+    return response
 
 @login_required
-def all_entries(request):
-    """View all mood entries with search and filter"""
-    # Get the user's Daily Mood habit
+def chart_data(request):
+    """JSON chart series for a date range, downsampled to at most `points` points"""
+    chart_range = request.GET.get('range', DEFAULT_RANGE)
+    if chart_range not in CHART_RANGES:
+        chart_range = DEFAULT_RANGE
+    method = request.GET.get('method', 'avg')
+    if method not in CHART_METHODS:
+        method = 'avg'
     try:
-        habit = Action.objects.get(user=request.user, name="Daily Mood")
-        entries = MoodEntry.objects.filter(habit=habit).order_by('-date')
-    except Action.DoesNotExist:
-        entries = []
+        points = min(max(int(request.GET.get('points', DEFAULT_POINTS)), 10), MAX_POINTS)
+    except ValueError:
+        points = DEFAULT_POINTS
+    
+    habit_id, habit_stats = get_default_habit_stats(request)
+    page = None
+    if habit_id:
+        page = UserPage(request, 'chart', habit_stats,
+                        range=chart_range, method=method, points=points, today=date.today())
+        not_modified = page.not_modified()
+        if not_modified:
+            return not_modified
+    rows = chart_rows(habit_id, CHART_RANGES[chart_range]) if habit_id else []
+    
+    response = JsonResponse({
+        'range': chart_range,
+        'method': method,
+        'total': len(rows),
+        'series': chart_series(rows, points, method),
+    })
+    return page.add_validators(response) if page else response
+
+@login_required
+def year_heatmap(request):
+    """Mood, sleep and yoga for every day of ?year=, packed one byte per day (see habits/heatmap.py)"""
+    try:
+        year = min(max(int(request.GET.get('year', date.today().year)), 1), 9999)
+    except ValueError:
+        year = date.today().year
+    
+    habit_id, habit_stats = get_default_habit_stats(request)
+    page = None
+    if habit_id:
+        page = UserPage(request, 'year', habit_stats, year=year)
+        not_modified = page.not_modified()
+        if not_modified:
+            return not_modified
+        packed = habit_year(habit_id, year, habit_stats.version)
+    else:
+        packed = bytes(YEAR_SLOTS)
+    
+    response = JsonResponse({
+        'year': year,
+        'days': 366 if calendar.isleap(year) else 365,
+        'data': base64.b64encode(packed).decode(),
+    })
+    return page.add_validators(response) if page else response
+
+@login_required
+def weekly_summary(request):
+    """Weekly averages chart for the last N weeks, read from the week rollups"""
+    try:
+        weeks = min(max(int(request.GET.get('weeks', DEFAULT_SUMMARY_WEEKS)), 1), MAX_SUMMARY_WEEKS)
+    except ValueError:
+        weeks = DEFAULT_SUMMARY_WEEKS
+    
+    today = date.today()
+    habit_id, habit_stats = get_default_habit_stats(request)
+    page = None
+    if habit_id:
+        page = UserPage(request, 'weekly', habit_stats, weeks=weeks, week=week_start(today))
+        not_modified = page.not_modified()
+        if not_modified:
+            return not_modified
+    rollups = {rollup.start: rollup for rollup in recent_weeks(habit_id, weeks, today)} if habit_id else {}
+    
+    # One point per week, including the weeks with no entries
+    first_week = week_start(today) - timedelta(weeks=weeks - 1)
+    summary = []
+    for i in range(weeks):
+        start = first_week + timedelta(weeks=i)
+        rollup = rollups.get(start)
+        summary.append(serialize_rollup(rollup) if rollup else {
+            'period': 'week', 'start': start.isoformat(), 'entries': 0,
+            'avg_mood': None, 'min_mood': None, 'max_mood': None, 'avg_sleep': None, 'yoga_days': 0,
+        })
     
     context = {
-        'entries': entries,
+        'weeks': weeks,
+        'summary': summary,
+        'has_entries': bool(rollups),
         'username': request.user.first_name or request.user.username,
     }
     
-    return render(request, 'habits/entries.html', context)
+    response = render(request, 'habits/weekly.html', context)
+    return page.add_validators(response) if page else response
+
+@login_required
+async def all_entries(request):
+    """View mood entries with search and filter (later pages load from entries_api)"""
+    user = await _auser(request)
+    filters = entry_filters(request.GET)
+    entries = []
+    next_cursor = None
+    total_entries = 0
+    
+    page = None
+    
+    # Get the user's Daily Mood habit
+    habit_id, habit_stats = await aget_default_habit_stats(request)
+    if habit_id:
+        # Unchanged since the browser's copy, or rendered and cached since the last write
+        page = UserPage(request, 'entries', habit_stats, **filters)
+        cached = page.not_modified() or await page.aget_cached()
+        if cached:
+            return cached
+        entries, next_cursor = await akeyset_page(filter_entries(habit_id, **filters))
+        total_entries = habit_stats.entry_count
+    
+    context = {
+        'entries': entries,
+        'next_cursor': next_cursor,
+        'total_entries': total_entries,
+        'filters': filters,
+        'username': user.first_name or user.username,
+    }
+    
+    response = render(request, 'habits/entries.html', context)
+    if page:
+        response = await page.acache(response)
+    return response
+
+
+@login_required
+def entries_api(request):
+    """JSON page of entries, filtered in SQL and keyset-paginated on (date, id)"""
+    filters = entry_filters(request.GET)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    
+    habit_id, habit_stats = get_default_habit_stats(request)
+    if not habit_id:
+        return JsonResponse({'entries': [], 'next_cursor': None})
+    
+    cursor = request.GET.get('cursor')
+    user_page = UserPage(request, 'entries_api', habit_stats, cursor=cursor, limit=limit, **filters)
+    not_modified = user_page.not_modified()
+    if not_modified:
+        return not_modified
+    
+    try:
+        page, next_cursor = keyset_page(filter_entries(habit_id, **filters), cursor, limit)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    
+    return user_page.add_validators(JsonResponse({
+        'entries': [serialize_entry(entry) for entry in page],
+        'next_cursor': next_cursor,
+    }))
+
+@login_required
+def search_entries_api(request):
+    """Ranked prefix search over the user's entry notes"""
+    query = request.GET.get('q', '').strip()
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        limit = 20
+    
+    habit_id, habit_stats = get_default_habit_stats(request)
+    if not habit_id:
+        return JsonResponse({'query': query, 'entries': []})
+    
+    page = UserPage(request, 'search', habit_stats, q=query, limit=limit)
+    not_modified = page.not_modified()
+    if not_modified:
+        return not_modified
+    
+    results = search_entries(habit_id, query, limit) if query else []
+    
+    return page.add_validators(JsonResponse({
+        'query': query,
+        'entries': [serialize_entry(entry) for entry in results],
+    }))
+
+@login_required
+def sync_entries(request):
+    """Entries changed or deleted since ?since=<cursor>, oldest change first (everything without one)"""
+    since = request.GET.get('since') or None
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_SYNC_LIMIT)), 1), MAX_SYNC_LIMIT)
+    except ValueError:
+        limit = DEFAULT_SYNC_LIMIT
+    
+    habit_id, habit_stats = get_default_habit_stats(request)
+    if not habit_id:
+        return JsonResponse({'habit_id': None, 'changes': [], 'next_cursor': since, 'has_more': False})
+    
+    user_page = UserPage(request, 'sync', habit_stats, since=since, limit=limit)
+    not_modified = user_page.not_modified()
+    if not_modified:
+        return not_modified
+    
+    try:
+        changes, next_cursor, has_more = changes_since(habit_id, since, limit)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    
+    # Deleting a habit leaves no tombstones (they would go with it): a client
+    # seeing another habit_id than last time starts over without a cursor
+    return user_page.add_validators(JsonResponse({
+        'habit_id': habit_id,
+        'changes': changes,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    }))
+
+@login_required
+def export_entries(request):
+    """Download the user's entries as CSV or NDJSON, streamed row by row"""
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Unknown export format')
+    
+    try:
+        start, end = parse_export_range(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid date range')
+    
+    habit_id = get_default_habit_id(request)
+    if habit_id and isinstance(request, ASGIRequest):
+        # Under ASGI Django would read a sync iterator into memory whole
+        # before sending it: stream from an async one instead
+        lines = aexport_lines(aexport_rows(habit_id, start, end), fmt)
+    else:
+        lines = export_lines(export_rows(habit_id, start, end) if habit_id else [], fmt)
+    
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="mood-entries-{request.user.username}.{fmt}"'
+    return response
+
+@login_required
+def import_entries(request):
+    """Upload a CSV or NDJSON file of entries; rows are upserted by date"""
+    if request.method != 'POST':
+        return redirect('all_entries')
+    
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    
+    def rejected(error):
+        if wants_json:
+            return JsonResponse({'error': error}, status=400)
+        messages.error(request, error)
+        return redirect('all_entries')
+    
+    upload = request.FILES.get('file')
+    fmt = request.POST.get('format') or (detect_format(upload.name) if upload else None)
+    if not upload or fmt not in EXPORT_FORMATS:
+        return rejected('Please choose a .csv or .ndjson file to import.')
+    
+    # Decode the upload line by line rather than reading it all into memory.
+    # An unreadable file rolls the whole import back.
+    def import_upload(habit_id):
+        upload.seek(0)
+        return import_records(habit_id, codecs.iterdecode(upload, 'utf-8-sig'), fmt)
+    
+    try:
+        result = with_default_habit(request, import_upload)
+    except UnicodeDecodeError:
+        return rejected('The file is not UTF-8 text: save it as UTF-8 and import it again.')
+    except csv.Error as exc:
+        return rejected(f'The file is not valid CSV: {exc}')
+    
+    if wants_json:
+        return JsonResponse(result)
+    if result['imported']:
+        messages.success(request, f"📥 Imported {result['imported']} entries!")
+    if result['invalid']:
+        messages.error(request, f"Skipped {result['invalid']} invalid rows ({'; '.join(result['errors'][:3])}).")
+    return redirect('all_entries')
+
+@login_required
+def batch_entries_api(request):
+    """Upsert many days at once, for clients that queue entries offline; all or nothing"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST a JSON object with an "entries" list'}, status=405)
+    
+    try:
+        records = json.loads(request.body)['entries']
+    except (ValueError, KeyError, TypeError):
+        records = None
+    if not isinstance(records, list) or not records:
+        return JsonResponse({'error': 'Expected a JSON object with a non-empty "entries" list'}, status=400)
+    if len(records) > MAX_BATCH_ENTRIES:
+        return JsonResponse({'error': f'At most {MAX_BATCH_ENTRIES} entries per request'}, status=400)
+    
+    rows, errors = clean_batch(records)
+    if errors:
+        return JsonResponse({'error': 'Nothing was saved', 'errors': errors[:MAX_ERRORS]}, status=400)
+    
+    # One transaction, one upsert and one round of bookkeeping for the whole batch
+    def save(habit_id):
+        entries = build_entries(habit_id, rows)
+        return upsert_entries(habit_id, entries), len(entries)
+    
+    created, saved = with_default_habit(request, save)
+    return JsonResponse({'created': created, 'updated': saved - created})
 
 @login_required
 def delete_entry(request, entry_id):
     """Delete a mood entry"""
     if request.method == 'POST':
-        try:
-            entry = MoodEntry.objects.get(id=entry_id, habit__user=request.user)
-            entry.delete()
+        with transaction.atomic():
+            # Read the entry under the write lock: a double submit or a concurrent
+            # delete then finds nothing left, rather than counting it out twice
+            entry = MoodEntry.objects.select_for_update().filter(id=entry_id, habit__user=request.user).first()
+            # Also leaves the tombstone that tells syncing clients to drop their copy (habits.signals)
+            deleted = entry.delete()[0] if entry else 0
+            if deleted:
+                record_entry_write(entry.habit_id, before=entry_state(entry))
+        if deleted:
             messages.success(request, 'Entry deleted successfully!')
-        except MoodEntry.DoesNotExist:
+        else:
             messages.error(request, 'Entry not found!')
     
     return redirect('all_entries')
@@ -286,13 +581,23 @@ def edit_entry(request, entry_id):
         note = request.POST.get('note', '')
         
         if mood and sleep_duration and yoga:
-            entry.mood = int(mood)
-            entry.sleep_duration = int(sleep_duration)
-            entry.yoga = True if yoga == 'yes' else False
-            entry.note = note
-            entry.save()
+            with transaction.atomic():
+                # Re-read under the write lock, so `before` is the row this save
+                # replaces (and a concurrently deleted entry is not saved again)
+                entry = MoodEntry.objects.select_for_update().filter(id=entry_id, habit__user=request.user).first()
+                if entry is not None:
+                    before = entry_state(entry)
+                    entry.mood = int(mood)
+                    entry.sleep_duration = int(sleep_duration)
+                    entry.yoga = True if yoga == 'yes' else False
+                    entry.note = note
+                    entry.save()
+                    record_entry_write(entry.habit_id, before, entry_state(entry))
             
-            messages.success(request, '✨ Entry updated successfully!')
+            if entry is None:
+                messages.error(request, 'Entry not found!')
+            else:
+                messages.success(request, '✨ Entry updated successfully!')
             return redirect('all_entries')
     
     context = {
@@ -306,6 +611,21 @@ def edit_entry(request, entry_id):
     return render(request, 'habits/index.html', context)
 
 
+def _metrics_token_ok(request):
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    return bool(token) and constant_time_compare(authorization, f'Bearer {token}')
+
+
+def metrics(request):
+    """This process's request histograms in the Prometheus text format, for staff, METRICS_TOKEN and METRICS_ALLOWED_IPS"""
+    if not (request.user.is_staff or _metrics_token_ok(request)
+            or request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS):
+        return HttpResponseForbidden()
+    
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 def signup_view(request):
     """User registration"""
     if request.user.is_authenticated:
@@ -0,0 +1,28 @@
+"""Work a new WSGI/ASGI worker does before its first request.
+
+With the cached template loader, a template is parsed once per process,
+on the first request that renders it. precompile_templates() does that
+for every project template at startup instead, so autoscaled workers
+don't spend their first requests parsing (config/wsgi.py, config/asgi.py).
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+
+
+def precompile_templates(engine_alias="django"):
+    """Load every template under the engine's DIRS (templates/, templates/habits/) into its loader cache."""
+    engine = engines[engine_alias].engine
+    names = []
+    for directory in map(Path, engine.dirs):
+        for path in sorted(directory.rglob("*.html")):
+            name = path.relative_to(directory).as_posix()
+            engine.get_template(name)
+            names.append(name)
+    return names
+
+
+def warm_up():
+    if settings.PRECOMPILE_TEMPLATES:
+        precompile_templates()
@@ -0,0 +1,76 @@
+"""One place to keep every derived table in step with MoodEntry writes.
+
+Views call record_entry_write() for single-entry changes and importers
+call record_bulk_write() after loading many rows, always inside the
+transaction that wrote the entries. Both bump the habit's
+HabitStats.version, which is what cached derived data is keyed on.
+upsert_entries() writes entries by (habit, date) and does its own
+bookkeeping.
+"""
+from django.db import transaction
+
+from .models import MoodEntry
+from .rollups import rebuild_rollups, refresh_rollups
+from .stats import TOTAL_FIELDS, bump_versions, entry_totals, rebuild_stats, record_entry_change
+from .streaks import streak_changes
+
+# Written on conflict with an existing (habit, date) entry
+UPSERT_FIELDS = ["mood", "sleep_duration", "yoga", "note", "updated_at"]
+
+
+def entry_state(entry):
+    """What the bookkeeping needs to know about an entry, captured before it changes."""
+    return {"date": entry.date, "totals": entry_totals(entry)}
+
+
+def record_entry_write(habit_id, before=None, after=None):
+    """Apply one entry write; `before`/`after` are entry_state() dicts (None for a create or a delete)."""
+    record_entry_change(
+        habit_id,
+        before["totals"] if before else None,
+        after["totals"] if after else None,
+        **streak_changes(habit_id, [before] if before else [], [after] if after else []),
+    )
+    refresh_rollups(habit_id, {state["date"] for state in (before, after) if state})
+
+
+def record_entries_write(habit_id, before=(), after=()):
+    """record_entry_write() for many entries: one totals UPDATE and one rollup refresh for all of them."""
+    record_entry_change(habit_id, _sum_totals(before), _sum_totals(after), **streak_changes(habit_id, before, after))
+    refresh_rollups(habit_id, {state["date"] for state in (*before, *after)})
+
+
+def _sum_totals(states):
+    return {field: sum(state["totals"][field] for state in states) for field in TOTAL_FIELDS}
+
+
+def upsert_entries(habit_id, entries):
+    """Create or update the habit's entries for their dates in one transaction; returns how many were created.
+
+    `entries` are unsaved MoodEntry objects, one per date, written with a
+    single INSERT ... ON CONFLICT DO UPDATE (per SQL batch), so a double
+    submit updates the row instead of failing on the (habit, date)
+    constraint. The entries being replaced are read first, in the same
+    transaction, for the totals; SQLite's IMMEDIATE transactions (see
+    settings.DATABASES) hold the write lock from that read on.
+    """
+    with transaction.atomic():
+        replaced = MoodEntry.objects.filter(
+            habit_id=habit_id, date__in=[entry.date for entry in entries]
+        ).only("date", "mood", "sleep_duration", "yoga")
+        before = [entry_state(entry) for entry in replaced]
+        MoodEntry.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["habit", "date"],
+            update_fields=UPSERT_FIELDS,
+        )
+        record_entries_write(habit_id, before, [entry_state(entry) for entry in entries])
+    return len(entries) - len(before)
+
+
+def record_bulk_write(habit_ids):
+    """Rebuild everything derived from the given habits' entries after a bulk load."""
+    rebuild_stats(habit_ids)
+    rebuild_rollups(habit_ids)
+    bump_versions(habit_ids)
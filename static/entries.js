@@ -0,0 +1,165 @@
+// Search and Filter functionality (filters run on the server, pages load as you scroll)
+const filterForm = document.getElementById('filterForm');
+const searchInput = document.getElementById('searchInput');
+const moodFilter = document.getElementById('moodFilter');
+const yogaFilter = document.getElementById('yogaFilter');
+const entriesContainer = document.getElementById('entriesContainer');
+const entriesList = document.getElementById('entriesList');
+const sentinel = document.getElementById('entriesSentinel');
+const emptyState = document.getElementById('emptyState');
+const apiUrl = entriesContainer.dataset.apiUrl;
+
+let nextCursor = entriesContainer.dataset.nextCursor;
+let shownCount = entriesList.children.length;
+let loading = false;
+let requestId = 0;
+let searchTimer = null;
+
+const moodIcons = { 1: '😢', 2: '😕', 3: '😐', 4: '😊', 5: '😄' };
+const moodLabels = { 1: 'Terrible', 2: 'Not Great', 3: 'Okay', 4: 'Good', 5: 'Amazing' };
+const sleepLabels = { 1: '4h-', 2: '5h', 3: '6h', 4: '7h', 5: '8h', 6: '9h+' };
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+function renderEntryCard(entry) {
+    const note = entry.note ? `
+        <div class="entry-note">
+            <div class="note-label">Note</div>
+            <div class="note-text">${escapeHtml(entry.note)}</div>
+        </div>` : '';
+    return `
+    <div class="entry-card">
+        <div class="entry-header">
+            <div class="entry-date">📅 ${entry.date_display}</div>
+            <div class="entry-actions">
+                <a href="/edit/${entry.id}/" class="btn btn-edit">✏️ Edit</a>
+                <button class="btn btn-delete"
+                        data-entry-id="${entry.id}"
+                        data-entry-date="${entry.date_short}"
+                        onclick="confirmDelete(this.dataset.entryId, this.dataset.entryDate)">
+                    🗑️ Delete
+                </button>
+            </div>
+        </div>
+        <div class="entry-details">
+            <div class="detail-item">
+                <div class="detail-icon">${moodIcons[entry.mood] || ''}</div>
+                <div class="detail-text">
+                    <span class="detail-label">Mood</span>
+                    <span class="detail-value">${moodLabels[entry.mood] || ''}</span>
+                </div>
+            </div>
+            <div class="detail-item">
+                <div class="detail-icon">😴</div>
+                <div class="detail-text">
+                    <span class="detail-label">Sleep</span>
+                    <span class="detail-value">${sleepLabels[entry.sleep] || ''}</span>
+                </div>
+            </div>
+            <div class="detail-item">
+                <div class="detail-icon">${entry.yoga ? '🧘' : '❌'}</div>
+                <div class="detail-text">
+                    <span class="detail-label">Yoga</span>
+                    <span class="detail-value">${entry.yoga ? 'Yes' : 'No'}</span>
+                </div>
+            </div>
+        </div>${note}
+    </div>`;
+}
+
+function currentFilters() {
+    const params = new URLSearchParams();
+    if (searchInput.value.trim()) params.set('q', searchInput.value.trim());
+    if (moodFilter.value) params.set('mood', moodFilter.value);
+    if (yogaFilter.value) params.set('yoga', yogaFilter.value);
+    return params;
+}
+
+function updateStatus() {
+    document.getElementById('shownCount').textContent = shownCount;
+    document.getElementById('moreMarker').textContent = nextCursor ? '+' : '';
+    sentinel.hidden = !nextCursor;
+    emptyState.hidden = shownCount > 0;
+}
+
+async function loadEntries(reset) {
+    if (loading && !reset) return;
+
+    const params = currentFilters();
+    if (!reset) params.set('cursor', nextCursor);
+    const thisRequest = ++requestId;
+    loading = true;
+
+    try {
+        const response = await fetch(`${apiUrl}?${params}`, { headers: { 'Accept': 'application/json' } });
+        if (!response.ok || thisRequest !== requestId) return;
+        const data = await response.json();
+        // A newer filter change may have started while this one was in flight
+        if (thisRequest !== requestId) return;
+
+        if (reset) {
+            entriesList.innerHTML = '';
+            shownCount = 0;
+        }
+        entriesList.insertAdjacentHTML('beforeend', data.entries.map(renderEntryCard).join(''));
+        shownCount += data.entries.length;
+        nextCursor = data.next_cursor || '';
+        updateStatus();
+
+        // Re-arm the observer in case the sentinel is still on screen
+        observer.unobserve(sentinel);
+        observer.observe(sentinel);
+    } finally {
+        if (thisRequest === requestId) loading = false;
+    }
+}
+
+function applyFilters() {
+    const params = currentFilters().toString();
+    history.replaceState(null, '', params ? `?${params}` : window.location.pathname);
+    loadEntries(true);
+}
+
+// Infinite scroll: fetch the next chunk as the sentinel comes into view
+const observer = new IntersectionObserver(items => {
+    if (items[0].isIntersecting && nextCursor) loadEntries(false);
+}, { rootMargin: '400px' });
+observer.observe(sentinel);
+
+searchInput.addEventListener('input', () => {
+    clearTimeout(searchTimer);
+    searchTimer = setTimeout(applyFilters, 250);
+});
+moodFilter.addEventListener('change', applyFilters);
+yogaFilter.addEventListener('change', applyFilters);
+filterForm.addEventListener('submit', e => {
+    e.preventDefault();
+    clearTimeout(searchTimer);
+    applyFilters();
+});
+
+// Delete confirmation modal
+function confirmDelete(entryId, date) {
+    const modal = document.getElementById('deleteModal');
+    const deleteForm = document.getElementById('deleteForm');
+    const deleteDate = document.getElementById('deleteDate');
+
+    deleteDate.textContent = date;
+    deleteForm.action = `/delete/${entryId}/`;
+    modal.classList.add('show');
+}
+
+function closeDeleteModal() {
+    document.getElementById('deleteModal').classList.remove('show');
+}
+
+// Close modal on outside click
+document.getElementById('deleteModal').addEventListener('click', function(e) {
+    if (e.target === this) {
+        closeDeleteModal();
+    }
+});
@@ -0,0 +1,325 @@
+// Mood emoji mapping
+const moodEmojis = {
+    1: '😞',
+    2: '😐',
+    3: '🙂',
+    4: '😄',
+    5: '🤩'
+};
+
+// Sleep duration labels
+const sleepLabels = {
+    1: '4h-',
+    2: '5h',
+    3: '6h',
+    4: '7h',
+    5: '8h',
+    6: '9h+'
+};
+
+// Sleep hour values for better visualization
+const sleepHours = {
+    1: 3.5,
+    2: 5,
+    3: 6,
+    4: 7,
+    5: 8,
+    6: 9.5
+};
+
+// Sleep hours for a (possibly averaged) sleep duration choice
+function toSleepHours(value) {
+    const low = Math.floor(value);
+    const high = Math.ceil(value);
+    return Math.round((sleepHours[low] + (sleepHours[high] - sleepHours[low]) * (value - low)) * 10) / 10;
+}
+
+// Line the series up on one set of date labels (LTTB picks different days per series)
+function alignSeries(series) {
+    const labels = [...new Set([...series.mood, ...series.sleep, ...series.yoga].map(point => point[0]))].sort();
+    const position = new Map(labels.map((label, index) => [label, index]));
+    const align = (points, transform) => {
+        const values = new Array(labels.length).fill(null);
+        points.forEach(([day, value]) => { values[position.get(day)] = transform(value); });
+        return values;
+    };
+    return {
+        labels: labels.map(day => new Date(day + 'T00:00:00').toLocaleDateString(undefined, { month: 'short', day: 'numeric', year: labels.length > 60 ? '2-digit' : undefined })),
+        mood: align(series.mood, value => value),
+        sleep: align(series.sleep, toSleepHours),
+        yoga: align(series.yoga, value => value),
+    };
+}
+
+const chartCanvas = document.getElementById('combinedChart');
+let combinedChart = null;
+let chartRequest = 0;
+
+// Fetch the downsampled series for a range and (re)draw the chart
+async function loadChart(range) {
+    const requestId = ++chartRequest;
+    const points = Math.min(Math.max(Math.floor(chartCanvas.clientWidth / 4), 30), 500);
+    const params = new URLSearchParams({ range: range, points: points, method: 'lttb' });
+    const response = await fetch(`${chartCanvas.dataset.url}?${params}`, { headers: { 'Accept': 'application/json' } });
+    if (!response.ok || requestId !== chartRequest) return;
+    const data = alignSeries((await response.json()).series);
+
+    if (combinedChart) {
+        combinedChart.data.labels = data.labels;
+        combinedChart.data.datasets[0].data = data.mood;
+        combinedChart.data.datasets[1].data = data.sleep;
+        combinedChart.data.datasets[2].data = data.yoga.map(value => value === null ? null : value * 5);
+        combinedChart.data.datasets[2].pointStyle = data.yoga.map(value => value ? 'circle' : 'crossRot');
+        combinedChart.data.datasets[2].pointBackgroundColor = data.yoga.map(value => value ? '#9966FF' : 'rgba(153, 102, 255, 0.3)');
+        combinedChart.update();
+        return;
+    }
+    renderChart(data);
+}
+
+function renderChart(chartData) {
+    const pointRadius = chartData.labels.length > 60 ? 2 : 6;
+
+    // Common chart options
+    const commonOptions = {
+        responsive: true,
+        maintainAspectRatio: false,
+        interaction: {
+            mode: 'index',
+            intersect: false,
+        },
+        plugins: {
+            legend: {
+                display: false
+            },
+            tooltip: {
+                backgroundColor: 'rgba(0, 0, 0, 0.8)',
+                padding: 12,
+                titleFont: {
+                    size: 14,
+                    weight: 'bold'
+                },
+                bodyFont: {
+                    size: 13
+                },
+                borderColor: 'rgba(255, 255, 255, 0.1)',
+                borderWidth: 1
+            }
+        }
+    };
+
+    // Combined Chart - All metrics in one chart
+    const combinedCtx = chartCanvas.getContext('2d');
+
+    combinedChart = new Chart(combinedCtx, {
+        type: 'line',
+        data: {
+            labels: chartData.labels,
+            datasets: [
+                {
+                    label: 'Mood',
+                    data: chartData.mood,
+                    borderColor: '#FF5F5F',
+                    backgroundColor: 'rgba(255, 95, 95, 0.1)',
+                    fill: false,
+                    tension: 0.4,
+                    spanGaps: true,
+                    pointRadius: pointRadius,
+                    pointBackgroundColor: '#FF3838',
+                    pointBorderColor: '#fff',
+                    pointBorderWidth: 2,
+                    yAxisID: 'y'
+                },
+                {
+                    label: 'Sleep Duration (hours)',
+                    data: chartData.sleep,
+                    borderColor: '#36A2EB',
+                    backgroundColor: 'rgba(54, 162, 235, 0.1)',
+                    fill: false,
+                    tension: 0.4,
+                    spanGaps: true,
+                    pointRadius: pointRadius - 1,
+                    pointBackgroundColor: '#36A2EB',
+                    pointBorderColor: '#fff',
+                    pointBorderWidth: 2,
+                    yAxisID: 'y1'
+                },
+                {
+                    label: 'Yoga Practice',
+                    data: chartData.yoga.map(value => value === null ? null : value * 5), // Scale to 5 for visibility
+                    borderColor: '#9966FF',
+                    backgroundColor: 'rgba(153, 102, 255, 0.1)',
+                    fill: false,
+                    tension: 0,
+                    spanGaps: true,
+                    pointRadius: pointRadius + 2,
+                    pointStyle: chartData.yoga.map(value => value ? 'circle' : 'crossRot'),
+                    pointBackgroundColor: chartData.yoga.map(value => 
+                        value ? '#9966FF' : 'rgba(153, 102, 255, 0.3)'
+                    ),
+                    pointBorderColor: '#fff',
+                    pointBorderWidth: 2,
+                    yAxisID: 'y'
+                }
+            ]
+        },
+        options: {
+            ...commonOptions,
+            interaction: {
+                mode: 'index',
+                intersect: false,
+            },
+            scales: {
+                x: {
+                    grid: {
+                        display: false
+                    },
+                    ticks: {
+                        autoSkip: true,
+                        maxTicksLimit: 15,
+                        font: {
+                            size: 12
+                        }
+                    }
+                },
+                y: {
+                    type: 'linear',
+                    display: true,
+                    position: 'left',
+                    min: 0,
+                    max: 6,
+                    ticks: {
+                        stepSize: 1,
+                        padding: 10,
+                        font: {
+                            size: 12
+                        },
+                        callback: function(value) {
+                            if (value === 5) return '🧘 Yoga';
+                            return moodEmojis[value] || '';
+                        }
+                    },
+                    grid: {
+                        color: 'rgba(0, 0, 0, 0.05)',
+                        drawBorder: false
+                    }
+                },
+                y1: {
+                    type: 'linear',
+                    display: true,
+                    position: 'right',
+                    min: 0,
+                    max: 10,
+                    ticks: {
+                        stepSize: 1,
+                        padding: 10,
+                        font: {
+                            size: 12
+                        },
+                        callback: function(value) {
+                            return value + 'h';
+                        }
+                    },
+                    grid: {
+                        drawOnChartArea: false,
+                    },
+                }
+            },
+            plugins: {
+                ...commonOptions.plugins,
+                legend: {
+                    display: true,
+                    position: 'top',
+                    labels: {
+                        usePointStyle: true,
+                        padding: 20,
+                        font: {
+                            size: 12
+                        }
+                    }
+                },
+                tooltip: {
+                    ...commonOptions.plugins.tooltip,
+                    callbacks: {
+                        label: function(context) {
+                            const datasetLabel = context.dataset.label;
+                            const value = context.parsed.y;
+
+                            if (datasetLabel === 'Mood') {
+                                const moodLabels = {
+                                    1: 'Terrible',
+                                    2: 'Not Great', 
+                                    3: 'Okay',
+                                    4: 'Good',
+                                    5: 'Amazing'
+                                };
+                                const rounded = Math.round(value);
+                                const average = Number.isInteger(value) ? '' : ` (avg ${value.toFixed(1)})`;
+                                return `${moodEmojis[rounded]} ${moodLabels[rounded]}${average}`;
+                            } else if (datasetLabel === 'Sleep Duration (hours)') {
+                                return `😴 ${value}h sleep`;
+                            } else if (datasetLabel === 'Yoga Practice') {
+                                if (value === 5) return '🧘 Practiced yoga';
+                                if (value === 0) return '❌ No yoga today';
+                                return `🧘 Yoga on ${Math.round(value * 20)}% of days`;
+                            }
+                            return `${datasetLabel}: ${value}`;
+                        }
+                    }
+                }
+            }
+        }
+    });
+}
+
+if (chartCanvas) {
+    // Load the chart after first paint so it never delays the page itself
+    window.addEventListener('load', () => loadChart('30d'));
+
+    document.querySelectorAll('#chartRanges .period-link').forEach(link => {
+        link.addEventListener('click', event => {
+            event.preventDefault();
+            document.querySelectorAll('#chartRanges .period-link').forEach(other => other.classList.remove('active'));
+            link.classList.add('active');
+            loadChart(link.dataset.range);
+        });
+    });
+}
+
+// Year heatmap: one packed byte per day (bits 0-2 mood, 3-5 sleep, 6 yoga; see habits/heatmap.py)
+const heatmap = document.getElementById('yearHeatmap');
+
+async function loadHeatmap() {
+    const year = Number(heatmap.dataset.year);
+    const response = await fetch(`${heatmap.dataset.url}?year=${year}`, { headers: { 'Accept': 'application/json' } });
+    if (!response.ok) return;
+    const payload = await response.json();
+    const days = Uint8Array.from(atob(payload.data), char => char.charCodeAt(0));
+
+    const cells = document.createDocumentFragment();
+    // Rows are Monday to Sunday: pad the first column up to January 1st
+    const firstWeekday = (new Date(year, 0, 1).getDay() + 6) % 7;
+    for (let i = 0; i < firstWeekday; i++) {
+        const blank = document.createElement('span');
+        blank.className = 'heatmap-cell blank';
+        cells.appendChild(blank);
+    }
+    for (let slot = 0; slot < payload.days; slot++) {
+        const value = days[slot];
+        const mood = value & 7;
+        const sleep = (value >> 3) & 7;
+        const yoga = (value & 64) !== 0;
+        const day = new Date(year, 0, slot + 1).toLocaleDateString(undefined, { month: 'short', day: 'numeric' });
+        const cell = document.createElement('span');
+        cell.className = 'heatmap-cell' + (mood ? ` mood-${mood}` : '') + (yoga ? ' yoga' : '');
+        cell.title = mood
+            ? `${day}: ${moodEmojis[mood]}${sleep ? ` · 😴 ${sleepLabels[sleep]}` : ''}${yoga ? ' · 🧘' : ''}`
+            : `${day}: no entry`;
+        cells.appendChild(cell);
+    }
+    heatmap.replaceChildren(cells);
+}
+
+if (heatmap) {
+    window.addEventListener('load', loadHeatmap);
+}
@@ -0,0 +1,13 @@
+// Handle button selection UI
+document.querySelectorAll('input[type="radio"]').forEach(radio => {
+    radio.addEventListener('change', function() {
+        // Remove selected class from siblings
+        const parent = this.closest('.mood-options, .sleep-grid, .yoga-toggle');
+        parent.querySelectorAll('label').forEach(label => {
+            label.classList.remove('selected');
+        });
+
+        // Add selected class to current label
+        this.closest('label').classList.add('selected');
+    });
+});
@@ -0,0 +1,103 @@
+const weeklyData = JSON.parse(document.getElementById('weekly-data').textContent);
+const weeklyCanvas = document.getElementById('weeklyChart');
+
+// Sleep hour values for the sleep duration choices, interpolated for weekly averages
+const sleepChoiceHours = { 1: 3.5, 2: 5, 3: 6, 4: 7, 5: 8, 6: 9.5 };
+const sleepHours = value => {
+    if (value === null || value === 0) return null;
+    const low = Math.floor(value);
+    const high = Math.ceil(value);
+    const hours = sleepChoiceHours[low] + (sleepChoiceHours[high] - sleepChoiceHours[low]) * (value - low);
+    return Math.round(hours * 10) / 10;
+};
+
+if (weeklyCanvas) {
+    const labels = weeklyData.map(week => {
+        const start = new Date(week.start + 'T00:00:00');
+        return start.toLocaleDateString(undefined, { month: 'short', day: 'numeric' });
+    });
+
+    new Chart(weeklyCanvas.getContext('2d'), {
+        type: 'bar',
+        data: {
+            labels: labels,
+            datasets: [
+                {
+                    type: 'line',
+                    label: 'Average Mood',
+                    data: weeklyData.map(week => week.avg_mood),
+                    borderColor: '#FF5F5F',
+                    backgroundColor: '#FF3838',
+                    tension: 0.3,
+                    spanGaps: true,
+                    yAxisID: 'y'
+                },
+                {
+                    type: 'line',
+                    label: 'Average Sleep (hours)',
+                    data: weeklyData.map(week => sleepHours(week.avg_sleep)),
+                    borderColor: '#36A2EB',
+                    backgroundColor: '#36A2EB',
+                    tension: 0.3,
+                    spanGaps: true,
+                    yAxisID: 'y1'
+                },
+                {
+                    label: 'Yoga Days',
+                    data: weeklyData.map(week => week.yoga_days),
+                    backgroundColor: 'rgba(153, 102, 255, 0.35)',
+                    borderRadius: 6,
+                    yAxisID: 'y'
+                }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            interaction: {
+                mode: 'index',
+                intersect: false,
+            },
+            scales: {
+                x: {
+                    grid: {
+                        display: false
+                    }
+                },
+                y: {
+                    position: 'left',
+                    min: 0,
+                    max: 7,
+                    ticks: {
+                        stepSize: 1
+                    }
+                },
+                y1: {
+                    position: 'right',
+                    min: 0,
+                    max: 10,
+                    ticks: {
+                        callback: value => value + 'h'
+                    },
+                    grid: {
+                        drawOnChartArea: false
+                    }
+                }
+            },
+            plugins: {
+                legend: {
+                    position: 'top',
+                    labels: {
+                        usePointStyle: true,
+                        padding: 20
+                    }
+                },
+                tooltip: {
+                    callbacks: {
+                        footer: items => `${weeklyData[items[0].dataIndex].entries} day(s) tracked`
+                    }
+                }
+            }
+        }
+    });
+}